@@ -1,8 +1,5 @@
 from jen20_pulumi_aws_vpc import Vpc, VpcArgs
 from pulumi import export
-from pulumi_aws import get_availability_zones
-
-zones = get_availability_zones(state="available")
 
 vpc = Vpc("example-vpc", VpcArgs(
     description="Example VPC",
@@ -10,7 +7,7 @@ vpc = Vpc("example-vpc", VpcArgs(
         "Project": "Python Example VPC",
     },
     base_cidr="192.168.0.0/16",
-    availability_zone_names=zones.names,
+    availability_zone_count=3,
     zone_name="example.local",
     create_s3_endpoint=True,
     create_dynamodb_endpoint=True,
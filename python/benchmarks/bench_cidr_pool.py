@@ -0,0 +1,42 @@
+# Copyright 2018-2019, James Nugent.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can obtain
+# one at http://mozilla.org/MPL/2.0/.
+
+"""
+Measures the time taken to allocate many blocks from a CidrPool, and fails if
+it exceeds a budget.
+
+Run from the `python` directory with:
+
+    python -m benchmarks.bench_cidr_pool
+"""
+import argparse
+import sys
+import timeit
+
+from jen20_pulumi_aws_vpc.cidr_pool import CidrPool
+
+
+def allocate(count: int, prefix_length: int):
+    pool = CidrPool("10.0.0.0/8")
+    for _ in range(count):
+        pool.allocate(prefix_length)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--allocations", type=int, default=10000, help="Number of /22 blocks to allocate")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of runs; the fastest is reported")
+    parser.add_argument("--budget", type=float, default=1.0, help="Maximum time in seconds for the fastest run")
+    args = parser.parse_args()
+
+    elapsed = min(timeit.repeat(lambda: allocate(args.allocations, 22), number=1, repeat=args.repeat))
+    print(f"{args.allocations} allocations: {elapsed * 1000:.1f}ms ({elapsed / args.allocations * 1e6:.1f}us each)")
+    if elapsed > args.budget:
+        sys.exit(f"Allocation took longer than the budget of {args.budget}s")
+
+
+if __name__ == "__main__":
+    main()
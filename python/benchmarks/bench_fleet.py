@@ -0,0 +1,130 @@
+# Copyright 2018-2019, James Nugent.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can obtain
+# one at http://mozilla.org/MPL/2.0/.
+
+"""
+Compares constructing many VPCs with a VpcFleet against constructing each Vpc
+in a loop, using pulumi.runtime mocks in place of an engine.
+
+Both programs create the same VPCs, allocated from a supernet and spread over
+two regions, with availability zones looked up at runtime. Each run is made in
+a fresh process, and reports wall-clock time, memory allocated and invokes made:
+
+    python -m benchmarks.bench_fleet
+"""
+import argparse
+import gc
+import multiprocessing
+import time
+import tracemalloc
+from typing import Dict
+
+REGIONS = ("us-west-2", "eu-west-1")
+AVAILABILITY_ZONE_NAMES = ["a", "b", "c", "d"]
+
+
+class CountingMocks:
+    """
+    pulumi.runtime.Mocks which count registered resources and invokes, and echo inputs back as state.
+    """
+
+    def __init__(self):
+        self.resource_count = 0
+        self.call_count = 0
+
+    def new_resource(self, args):
+        self.resource_count += 1
+        return f"{args.name}-id", dict(args.inputs)
+
+    def call(self, args):
+        self.call_count += 1
+        if args.token == "aws:index/getAvailabilityZones:getAvailabilityZones":
+            return {"names": AVAILABILITY_ZONE_NAMES}
+        return {}
+
+
+def _program(vpc_count: int, fleet: bool):
+    # Imported here so that import time is not included in the measurement
+    import pulumi
+    import pulumi_aws
+    from jen20_pulumi_aws_vpc import CidrPool, Vpc, VpcArgs, VpcFleet, VpcFleetArgs
+
+    def spec():
+        return {f"vpc-{i}": {"description": f"Benchmark {i}", "region": REGIONS[i % len(REGIONS)]}
+                for i in range(vpc_count)}
+
+    shared_args = {"base_tags": {"Project": "Benchmark"}, "availability_zone_count": 3}
+
+    def fleet_program():
+        providers = {region: pulumi_aws.Provider(region, region=region) for region in REGIONS}
+        VpcFleet("fleet", VpcFleetArgs.from_supernet("10.0.0.0/8", 20, spec(), providers, **shared_args))
+
+    def loop_program():
+        providers = {region: pulumi_aws.Provider(region, region=region) for region in REGIONS}
+        pool = CidrPool("10.0.0.0/8")
+        for name, vpc_args in spec().items():
+            args = VpcArgs(**{**shared_args, **vpc_args, "base_cidr": pool.allocate(20)})
+            Vpc(name, args, opts=pulumi.ResourceOptions(providers={"aws": providers[args.region]}))
+
+    return fleet_program if fleet else loop_program
+
+
+def _run(vpc_count: int, fleet: bool, trace: bool) -> Dict:
+    import pulumi
+
+    mocks = CountingMocks()
+    pulumi.runtime.set_mocks(mocks, preview=False)
+    program = _program(vpc_count, fleet)
+
+    gc.collect()
+    if trace:
+        tracemalloc.start()
+    started = time.perf_counter()
+    pulumi.runtime.test(program)()
+    elapsed = time.perf_counter() - started
+
+    result = {"resources": mocks.resource_count, "invokes": mocks.call_count, "wall_ms": elapsed * 1000}
+    if trace:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result["allocated_kib"] = peak / 1024
+    return result
+
+
+def measure(vpc_count: int, fleet: bool) -> Dict:
+    """
+    Runs a program constructing `vpc_count` VPCs, with or without a VpcFleet, and returns its
+    metrics. Intended to be called in a fresh process.
+    """
+    # Construct a single VPC before measuring, so that imports and one-off runtime initialisation
+    # are excluded from the measurements
+    _run(1, fleet, trace=False)
+    result = _run(vpc_count, fleet, trace=False)
+    result["allocated_kib"] = _run(vpc_count, fleet, trace=True)["allocated_kib"]
+    return result
+
+
+def _measure_in_subprocess(vpc_count: int, fleet: bool) -> Dict:
+    # Each run needs a fresh process, since the Pulumi runtime keeps global state
+    with multiprocessing.get_context("spawn").Pool(processes=1) as pool:
+        return pool.apply(measure, (vpc_count, fleet))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--vpcs", type=int, nargs="+", default=[10, 50, 100],
+                        help="The numbers of VPCs to construct")
+    args = parser.parse_args()
+
+    print(f"{'vpcs':>5} {'program':>7} {'resources':>9} {'invokes':>7} {'wall ms':>9} {'alloc KiB':>10}")
+    for vpc_count in args.vpcs:
+        for fleet in (False, True):
+            result = _measure_in_subprocess(vpc_count, fleet)
+            print(f"{vpc_count:>5} {'fleet' if fleet else 'loop':>7} {result['resources']:>9} "
+                  f"{result['invokes']:>7} {result['wall_ms']:>9.1f} {result['allocated_kib']:>10.1f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
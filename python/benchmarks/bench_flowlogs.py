@@ -0,0 +1,109 @@
+# Copyright 2018-2019, James Nugent.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can obtain
+# one at http://mozilla.org/MPL/2.0/.
+
+"""
+Measures the throughput and memory use of the flow log parser and aggregations.
+
+Synthetic gzip-compressed logs in the default format are generated at two
+sizes, and each is parsed, with and without aggregation, in a fresh process.
+Peak RSS should not grow with the size of the log. Run from the `python`
+directory with:
+
+    python -m benchmarks.bench_flowlogs --records 5000000
+"""
+import argparse
+import gzip
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from typing import Dict
+
+
+def generate(path: str, records: int, seed: int = 0):
+    """
+    Writes a gzip-compressed flow log of `records` records, with traffic between hosts in a 10.0.0.0/16 VPC and the
+    internet.
+    """
+    rng = random.Random(seed)
+    internal = [f"10.0.{rng.choice((0, 1, 2, 64, 65, 128))}.{rng.randrange(1, 255)}" for _ in range(500)]
+    external = [f"{rng.randrange(1, 224)}.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}"
+                for _ in range(20000)]
+    with gzip.open(path, "wt", compresslevel=1) as f:
+        f.write("version account-id interface-id srcaddr dstaddr srcport dstport protocol packets bytes start end "
+                "action log-status\n")
+        for i in range(records):
+            source, destination = rng.choice(internal), rng.choice(external if i % 3 else internal)
+            if i % 2:
+                source, destination = destination, source
+            action = "REJECT" if i % 17 == 0 else "ACCEPT"
+            f.write(f"2 123456789010 eni-{i % 64:017x} {source} {destination} {rng.randrange(1024, 65536)} "
+                    f"{rng.choice((22, 443, 5432, 8080))} 6 {rng.randrange(1, 100)} {rng.randrange(40, 150000)} "
+                    f"{1600000000 + i // 1000} {1600000060 + i // 1000} {action} OK\n")
+
+
+def measure(path: str, aggregations: bool) -> Dict:
+    """
+    Parses a log, optionally aggregating its records, and returns the number of records, elapsed time and peak RSS.
+    Intended to be called in a fresh process.
+    """
+    # pylint: disable=import-outside-toplevel
+    from jen20_pulumi_aws_vpc import SubnetDistributor
+    from jen20_pulumi_aws_vpc.flowlogs import BytesPerSubnet, RejectedFlows, TopTalkers, aggregate, read_flow_log
+
+    started = time.perf_counter()
+    records = 0
+    if aggregations:
+        counter = _Counter()
+        aggregate(read_flow_log(path), counter, TopTalkers(), RejectedFlows(),
+                  BytesPerSubnet.from_distributor(SubnetDistributor("10.0.0.0/16", 3)))
+        records = counter.records
+    else:
+        for batch in read_flow_log(path):
+            records += len(batch)
+    elapsed = time.perf_counter() - started
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != "darwin":
+        peak_rss *= 1024
+    return {"records": records, "seconds": elapsed, "peak_rss_mib": peak_rss / (1 << 20)}
+
+
+class _Counter:
+    def __init__(self):
+        self.records = 0
+
+    def update(self, batch):
+        self.records += len(batch)
+
+
+def _measure_in_subprocess(path: str, aggregations: bool) -> Dict:
+    with multiprocessing.get_context("spawn").Pool(processes=1) as pool:
+        return pool.apply(measure, (path, aggregations))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=2000000, help="Number of records in the larger log")
+    args = parser.parse_args()
+
+    print(f"{'records':>10} {'file MiB':>9} {'aggregations':>12} {'records/s':>11} {'peak rss MiB':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        for records in (args.records // 10, args.records):
+            path = os.path.join(directory, f"flow-{records}.log.gz")
+            generate(path, records)
+            size = os.path.getsize(path) / (1 << 20)
+            for aggregations in (False, True):
+                result = _measure_in_subprocess(path, aggregations)
+                print(f"{result['records']:>10} {size:>9.1f} {str(aggregations):>12} "
+                      f"{result['records'] / result['seconds']:>11.0f} {result['peak_rss_mib']:>12.1f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
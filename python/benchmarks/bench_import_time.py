@@ -0,0 +1,63 @@
+# Copyright 2018-2019, James Nugent.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can obtain
+# one at http://mozilla.org/MPL/2.0/.
+
+"""
+Measures the time taken to import the package for planning, compared with
+importing the Vpc component, using `python -X importtime`.
+
+Run from the `python` directory with:
+
+    python -m benchmarks.bench_import_time
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import Tuple
+
+CASES = [
+    ("SubnetDistributor", "from jen20_pulumi_aws_vpc import SubnetDistributor"),
+    ("VpcPlan", "from jen20_pulumi_aws_vpc import VpcArgs, VpcPlan"),
+    ("Vpc", "from jen20_pulumi_aws_vpc import Vpc"),
+]
+
+_REPORT_MODULES = "import sys; print(sum(name.split('.')[0] in ('pulumi', 'pulumi_aws') for name in sys.modules))"
+
+
+def import_time(statement: str) -> Tuple[float, int]:
+    """
+    Returns the total import time in milliseconds of a statement run in a fresh interpreter, and the
+    number of Pulumi modules it imported.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"{statement}; {_REPORT_MODULES}"],
+                               cwd=root, capture_output=True, text=True, check=True)
+
+    total_us = 0
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        # Only top-level imports are counted, since their cumulative time includes their children
+        if not module[1:].startswith(" "):
+            total_us += int(cumulative)
+    return total_us / 1000, int(completed.stdout.strip())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Number of runs of each case; the fastest is reported")
+    args = parser.parse_args()
+
+    print(f"{'import':>18} {'time (ms)':>10} {'pulumi modules':>15}")
+    for name, statement in CASES:
+        runs = [import_time(statement) for _ in range(args.repeat)]
+        elapsed, module_count = min(runs)
+        print(f"{name:>18} {elapsed:>10.1f} {module_count:>15}")
+
+
+if __name__ == "__main__":
+    main()
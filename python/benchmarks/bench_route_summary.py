@@ -0,0 +1,44 @@
+# Copyright 2018-2019, James Nugent.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can obtain
+# one at http://mozilla.org/MPL/2.0/.
+
+"""
+Measures the time taken to summarise many peer prefixes around local and
+excluded blocks, and fails if it exceeds a budget.
+
+Run from the `python` directory with:
+
+    python -m benchmarks.bench_route_summary
+"""
+import argparse
+import random
+import sys
+import timeit
+
+from jen20_pulumi_aws_vpc import CidrPool, summarise_routes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--prefixes", type=int, default=10000, help="Number of /24 peer prefixes to summarise")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of runs; the fastest is reported")
+    parser.add_argument("--budget", type=float, default=1.0, help="Maximum time in seconds for the fastest run")
+    args = parser.parse_args()
+
+    pool = CidrPool("10.0.0.0/8")
+    blocks = [pool.allocate(24) for _ in range(args.prefixes * 2)]
+    random.Random(0).shuffle(blocks)
+    peers, local, excluded = blocks[:args.prefixes], blocks[args.prefixes:args.prefixes + 1], blocks[args.prefixes + 1:]
+
+    summary = summarise_routes(peers, local=local, excluded=excluded, within=["10.0.0.0/8"])
+    elapsed = min(timeit.repeat(lambda: summarise_routes(peers, local=local, excluded=excluded, within=["10.0.0.0/8"]),
+                                number=1, repeat=args.repeat))
+    print(f"{args.prefixes} prefixes summarised to {len(summary)} routes: {elapsed * 1000:.1f}ms")
+    if elapsed > args.budget:
+        sys.exit(f"Summarisation took longer than the budget of {args.budget}s")
+
+
+if __name__ == "__main__":
+    main()
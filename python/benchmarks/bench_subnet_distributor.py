@@ -0,0 +1,68 @@
+# Copyright 2018-2019, James Nugent.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can obtain
+# one at http://mozilla.org/MPL/2.0/.
+
+"""
+Compares the integer-arithmetic SubnetDistributor with the previous
+implementation, which enumerated every candidate subnet in order to select one.
+
+Run from the `python` directory with:
+
+    python -m benchmarks.bench_subnet_distributor
+"""
+import argparse
+import ipaddress
+import math
+import timeit
+
+from jen20_pulumi_aws_vpc.subnet_distributor import SubnetDistributor
+
+
+class EnumeratingSubnetDistributor:
+    """
+    The SubnetDistributor implementation prior to the introduction of CidrBlock,
+    retained here as a baseline.
+    """
+
+    @staticmethod
+    def __cidr_subnet(base_address: str, prefix_extension: int, subnet_number: int) -> str:
+        return str(list(ipaddress.ip_network(base_address).subnets(prefix_extension))[subnet_number])
+
+    def __init__(self, base_cidr: str, az_count: int):
+        new_bits_per_az = int(math.log(1 << (az_count - 1).bit_length(), 2))
+        az_bases = [self.__cidr_subnet(base_cidr, new_bits_per_az, i) for i in range(az_count)]
+        self.private_subnets = [self.__cidr_subnet(block, 1, 0) for block in az_bases]
+        self.public_subnets = [self.__cidr_subnet(self.__cidr_subnet(block, 1, 1), 1, 0) for block in az_bases]
+
+
+def _time_per_call(factory, base_cidr: str, az_count: int, number: int) -> float:
+    return min(timeit.repeat(lambda: factory(base_cidr, az_count), number=number, repeat=3)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=200, help="Constructions per timing sample")
+    args = parser.parse_args()
+
+    print(f"{'base':>14} {'azs':>4} {'enumerating (us)':>17} {'integer (us)':>13} {'speedup':>8}")
+    for prefix_length in range(8, 29, 4):
+        base_cidr = f"10.0.0.0/{prefix_length}"
+        for az_count in (1, 2, 3, 4, 6, 8, 12, 16):
+            if prefix_length + (az_count - 1).bit_length() + 2 > 32:
+                continue
+
+            legacy = EnumeratingSubnetDistributor(base_cidr, az_count)
+            current = SubnetDistributor(base_cidr, az_count)
+            assert legacy.private_subnets == current.private_subnets
+            assert legacy.public_subnets == current.public_subnets
+
+            legacy_time = _time_per_call(EnumeratingSubnetDistributor, base_cidr, az_count, args.number)
+            current_time = _time_per_call(SubnetDistributor, base_cidr, az_count, args.number)
+            print(f"{base_cidr:>14} {az_count:>4} {legacy_time * 1e6:>17.1f} {current_time * 1e6:>13.1f} "
+                  f"{legacy_time / current_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+# Copyright 2018-2019, James Nugent.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can obtain
+# one at http://mozilla.org/MPL/2.0/.
+
+"""
+Measures the cost to a Pulumi program of constructing Vpc components, using
+pulumi.runtime mocks in place of an engine.
+
+Each scenario runs in a fresh process, and reports the number of resources
+registered, wall-clock time, peak RSS, and memory allocated and retained per
+VPC. Results can be saved as JSON and compared with those of another release:
+
+    python -m benchmarks.bench_vpc --output before.json
+    python -m benchmarks.bench_vpc --output after.json --compare before.json
+"""
+import argparse
+import gc
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+from typing import Dict, List, NamedTuple
+
+AVAILABILITY_ZONES = [f"us-west-2{chr(ord('a') + i)}" for i in range(16)]
+
+# Metrics for which a larger value in the current run than in the baseline is a regression
+METRICS = ("resources_per_vpc", "wall_ms_per_vpc", "peak_rss_mib", "allocated_kib_per_vpc", "retained_kib_per_vpc")
+
+
+class Scenario(NamedTuple):
+    """
+    A benchmark scenario: `vpc_count` VPCs, each spanning `az_count` availability zones.
+    `flow_logs` is one of "none", "s3" or "cloudwatch".
+    """
+    vpc_count: int
+    az_count: int
+    endpoints: bool
+    flow_logs: str
+
+    @property
+    def key(self) -> str:
+        return (f"vpcs={self.vpc_count} azs={self.az_count} endpoints={self.endpoints} "
+                f"flow_logs={self.flow_logs}")
+
+
+def scenarios(quick: bool) -> List[Scenario]:
+    """
+    Returns the scenario matrix: every availability zone count with and without endpoints and
+    flow logs for a single VPC, and a range of VPC counts per program.
+    """
+    az_counts = (1, 3, 16) if quick else (1, 2, 3, 4, 6, 8, 12, 16)
+    vpc_counts = (1, 10, 100) if quick else (1, 10, 50, 100, 250, 500)
+
+    matrix = [Scenario(1, az_count, endpoints, flow_logs)
+              for az_count in az_counts
+              for endpoints in (False, True)
+              for flow_logs in ("none", "s3", "cloudwatch")]
+    matrix.extend(Scenario(vpc_count, 3, True, "none") for vpc_count in vpc_counts if vpc_count > 1)
+    return matrix
+
+
+class CountingMocks:
+    """
+    pulumi.runtime.Mocks which count registered resources, and echo inputs back as state.
+    """
+
+    def __init__(self):
+        self.resource_count = 0
+
+    def new_resource(self, args):
+        self.resource_count += 1
+        return f"{args.name}-id", dict(args.inputs)
+
+    def call(self, _):
+        return {}
+
+
+def _program(scenario: Scenario):
+    # Imported here so that import time is not included in the measurement
+    from jen20_pulumi_aws_vpc import CidrPool, Vpc, VpcArgs
+
+    pool = CidrPool("10.0.0.0/8")
+
+    def program():
+        for i in range(scenario.vpc_count):
+            vpc = Vpc(f"bench-{i}", VpcArgs(
+                description=f"Benchmark {i}",
+                base_tags={"Project": "Benchmark"},
+                base_cidr=pool.allocate(20),
+                availability_zone_names=AVAILABILITY_ZONES[:scenario.az_count],
+                create_s3_endpoint=scenario.endpoints,
+                create_dynamodb_endpoint=scenario.endpoints,
+            ))
+            if scenario.flow_logs == "s3":
+                vpc.enableFlowLoggingToS3("arn:aws:s3:::flow-logs", "ALL")
+            elif scenario.flow_logs == "cloudwatch":
+                vpc.enableFlowLoggingToCloudWatchLogs("ALL")
+
+    return program
+
+
+def _run(scenario: Scenario, trace: bool) -> Dict:
+    import pulumi
+
+    mocks = CountingMocks()
+    pulumi.runtime.set_mocks(mocks, preview=False)
+    program = _program(scenario)
+
+    gc.collect()
+    if trace:
+        tracemalloc.start()
+    started = time.perf_counter()
+    pulumi.runtime.test(program)()
+    elapsed = time.perf_counter() - started
+
+    result = {"resources": mocks.resource_count, "wall_seconds": elapsed}
+    if trace:
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result.update(allocated_bytes=peak, retained_bytes=current)
+    return result
+
+
+def measure(scenario: Scenario, trace: bool) -> Dict:
+    """
+    Runs a scenario and returns its metrics. With `trace`, memory allocation is measured using
+    tracemalloc, otherwise wall-clock time and peak RSS are measured. Intended to be called in a
+    fresh process.
+    """
+    # Construct a single VPC before measuring, so that imports and one-off runtime initialisation
+    # are excluded from the measurements
+    _run(scenario._replace(vpc_count=1), trace=False)
+
+    result = _run(scenario, trace)
+    if trace:
+        return {
+            "allocated_kib_per_vpc": result["allocated_bytes"] / 1024 / scenario.vpc_count,
+            "retained_kib_per_vpc": result["retained_bytes"] / 1024 / scenario.vpc_count,
+        }
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != "darwin":
+        peak_rss *= 1024
+    return {
+        "resources": result["resources"],
+        "resources_per_vpc": result["resources"] / scenario.vpc_count,
+        "wall_ms": result["wall_seconds"] * 1000,
+        "wall_ms_per_vpc": result["wall_seconds"] * 1000 / scenario.vpc_count,
+        "peak_rss_mib": peak_rss / (1 << 20),
+    }
+
+
+def _measure_in_subprocess(scenario: Scenario, trace: bool) -> Dict:
+    # Each run needs a fresh process, since the Pulumi runtime keeps global state
+    with multiprocessing.get_context("spawn").Pool(processes=1) as pool:
+        return pool.apply(measure, (scenario, trace))
+
+
+def compare(results: List[Dict], baseline: Dict, threshold: float) -> List[str]:
+    """
+    Returns a description of each metric which regressed by more than `threshold` (a fraction)
+    relative to the baseline results.
+    """
+    baseline_by_key = {Scenario(**{field: result[field] for field in Scenario._fields}).key: result
+                       for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        key = Scenario(**{field: result[field] for field in Scenario._fields}).key
+        before = baseline_by_key.get(key)
+        if before is None:
+            continue
+        for metric in METRICS:
+            if before[metric] and (result[metric] - before[metric]) / before[metric] > threshold:
+                regressions.append(f"{key}: {metric} {before[metric]:.1f} -> {result[metric]:.1f}")
+    return regressions
+
+
+def _package_version(name: str) -> str:
+    try:
+        from importlib import metadata  # pylint: disable=import-outside-toplevel
+        return metadata.version(name)
+    except Exception:  # pylint: disable=broad-except
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="Run a reduced scenario matrix")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Compare results with those in this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Fractional increase in a metric which is reported as a regression")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'vpcs':>5} {'azs':>4} {'endpoints':>9} {'flow logs':>10} {'resources/vpc':>13} "
+          f"{'ms/vpc':>8} {'peak rss MiB':>12} {'alloc KiB/vpc':>13} {'kept KiB/vpc':>12}")
+    for scenario in scenarios(args.quick):
+        result = {
+            **scenario._asdict(),
+            **_measure_in_subprocess(scenario, trace=False),
+            **_measure_in_subprocess(scenario, trace=True),
+        }
+        results.append(result)
+        print(f"{scenario.vpc_count:>5} {scenario.az_count:>4} {str(scenario.endpoints):>9} "
+              f"{scenario.flow_logs:>10} {result['resources_per_vpc']:>13.1f} {result['wall_ms_per_vpc']:>8.2f} "
+              f"{result['peak_rss_mib']:>12.1f} {result['allocated_kib_per_vpc']:>13.1f} "
+              f"{result['retained_kib_per_vpc']:>12.1f}", flush=True)
+
+    report = {
+        "python": platform.python_version(),
+        "pulumi": _package_version("pulumi"),
+        "pulumi_aws": _package_version("pulumi_aws"),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
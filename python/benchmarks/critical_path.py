@@ -0,0 +1,193 @@
+# Copyright 2018-2019, James Nugent.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can obtain
+# one at http://mozilla.org/MPL/2.0/.
+
+"""
+Estimates the deployment time of a Vpc component from its resource dependency graph.
+
+The graph is recorded by constructing a Vpc under pulumi.runtime mocks. Each
+resource depends on its parent (which must be created before the child is
+registered) and on every resource it references. A per-type latency model gives
+the time taken to create each resource, and the longest path through the graph
+is the estimated wall-clock time of a deployment with unlimited parallelism.
+
+Run from the `python` directory with:
+
+    python -m benchmarks.critical_path --azs 3
+"""
+import argparse
+import json
+import multiprocessing
+from typing import Dict, List, NamedTuple, Tuple
+
+# Approximate time in seconds for AWS to create each type of resource
+LATENCY_MODEL: Dict[str, float] = {
+    "aws:ec2/vpc:Vpc": 3.0,
+    "aws:ec2/internetGateway:InternetGateway": 3.0,
+    "aws:ec2/subnet:Subnet": 2.0,
+    "aws:ec2/defaultRouteTable:DefaultRouteTable": 2.0,
+    "aws:ec2/routeTable:RouteTable": 2.0,
+    "aws:ec2/route:Route": 2.0,
+    "aws:ec2/routeTableAssociation:RouteTableAssociation": 1.0,
+    "aws:ec2/eip:Eip": 2.0,
+    "aws:ec2/natGateway:NatGateway": 120.0,
+    "aws:ec2/vpcEndpoint:VpcEndpoint": 10.0,
+    "aws:ec2/securityGroup:SecurityGroup": 3.0,
+    "aws:ec2/egressOnlyInternetGateway:EgressOnlyInternetGateway": 3.0,
+    "aws:ec2/flowLog:FlowLog": 3.0,
+    "aws:iam/role:Role": 2.0,
+    "aws:iam/rolePolicy:RolePolicy": 2.0,
+    "aws:cloudwatch/logGroup:LogGroup": 1.0,
+    "aws:cloudwatch/metricAlarm:MetricAlarm": 1.0,
+}
+
+# Interface endpoints take far longer to create than gateway endpoints
+INTERFACE_ENDPOINT_LATENCY = 90.0
+
+
+class Node(NamedTuple):
+    """
+    A registered resource and the URNs of the resources it must wait for.
+    """
+    urn: str
+    type: str
+    name: str
+    custom: bool
+    interface_endpoint: bool
+    dependencies: Tuple[str, ...]
+
+
+def _recording_monitor(nodes: List[Node]):
+    from pulumi.runtime import mocks  # pylint: disable=import-outside-toplevel
+    from pulumi.runtime import rpc  # pylint: disable=import-outside-toplevel
+
+    class RecordingMonitor(mocks.MockMonitor):
+        def RegisterResource(self, request):  # pylint: disable=invalid-name
+            response = super().RegisterResource(request)
+            if request.type != "pulumi:pulumi:Stack":
+                dependencies = set(request.dependencies)
+                for property_dependencies in request.propertyDependencies.values():
+                    dependencies.update(property_dependencies.urns)
+                if request.parent and "::pulumi:pulumi:Stack::" not in request.parent:
+                    dependencies.add(request.parent)
+                endpoint_type = rpc.deserialize_properties(request.object).get("vpcEndpointType")
+                nodes.append(Node(response.urn, request.type, request.name, request.custom,
+                                  endpoint_type == "Interface", tuple(sorted(dependencies))))
+            return response
+
+    return RecordingMonitor
+
+
+class _Mocks:
+    def new_resource(self, args):
+        return f"{args.name}-id", dict(args.inputs)
+
+    def call(self, _):
+        return {}
+
+
+def record_graph(az_count: int, vpc_kwargs: Dict, flow_logs: bool) -> List[Node]:
+    """
+    Constructs a Vpc under mocks, and returns the resources it registers. Intended to be called
+    in a fresh process, since the Pulumi runtime keeps global state.
+    """
+    import pulumi  # pylint: disable=import-outside-toplevel
+    from jen20_pulumi_aws_vpc import Vpc, VpcArgs  # pylint: disable=import-outside-toplevel
+
+    nodes: List[Node] = []
+    mocks = _Mocks()
+    pulumi.runtime.set_mocks(mocks, preview=False, monitor=_recording_monitor(nodes)(mocks))
+
+    def program():
+        vpc = Vpc("analysis", VpcArgs(
+            description="Analysis",
+            base_tags={},
+            base_cidr="10.0.0.0/16",
+            availability_zone_names=[f"us-west-2{chr(ord('a') + i)}" for i in range(az_count)],
+            **vpc_kwargs,
+        ))
+        if flow_logs:
+            vpc.enableFlowLoggingToCloudWatchLogs("ALL")
+
+    pulumi.runtime.test(program)()
+    return nodes
+
+
+def latency(node: Node) -> float:
+    """
+    Returns the modelled creation time of a resource. Component resources take no time.
+    """
+    if not node.custom:
+        return 0.0
+    if node.interface_endpoint:
+        return INTERFACE_ENDPOINT_LATENCY
+    return LATENCY_MODEL.get(node.type, 1.0)
+
+
+def critical_path(nodes: List[Node]) -> Tuple[float, List[Node]]:
+    """
+    Returns the estimated deployment time, and the resources on the longest path through the
+    dependency graph in creation order.
+    """
+    by_urn = {node.urn: node for node in nodes}
+    finish: Dict[str, float] = {}
+    predecessor: Dict[str, str] = {}
+
+    # Resources are registered after all of their dependencies, so registration order is a
+    # topological order of the graph.
+    for node in nodes:
+        start = 0.0
+        for dependency in node.dependencies:
+            if dependency in finish and finish[dependency] > start:
+                start = finish[dependency]
+                predecessor[node.urn] = dependency
+        finish[node.urn] = start + latency(node)
+
+    if not finish:
+        return 0.0, []
+    urn = max(finish, key=finish.get)
+    total = finish[urn]
+    path = [by_urn[urn]]
+    while urn in predecessor:
+        urn = predecessor[urn]
+        path.append(by_urn[urn])
+    return total, list(reversed(path))
+
+
+def analyse(az_count: int, vpc_kwargs: Dict, flow_logs: bool) -> Dict:
+    """
+    Records and analyses the dependency graph of a Vpc in a fresh process.
+    """
+    with multiprocessing.get_context("spawn").Pool(processes=1) as pool:
+        nodes = [Node(*node) for node in pool.apply(record_graph, (az_count, vpc_kwargs, flow_logs))]
+    total, path = critical_path(nodes)
+    return {
+        "resources": sum(1 for node in nodes if node.custom),
+        "serial_seconds": sum(latency(node) for node in nodes),
+        "critical_path_seconds": total,
+        "critical_path": [f"{node.type} {node.name} ({latency(node):.0f}s)" for node in path if node.custom],
+    }
+
+
+def _print_report(title: str, report: Dict):
+    print(f"{title}: {report['resources']} resources, {report['serial_seconds']:.0f}s if serial, "
+          f"{report['critical_path_seconds']:.0f}s estimated")
+    for step in report["critical_path"]:
+        print(f"    {step}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--azs", type=int, default=3, help="Number of availability zones")
+    parser.add_argument("--flow-logs", action="store_true", help="Enable flow logging to CloudWatch Logs")
+    parser.add_argument("--args", default="{}", help="Additional VpcArgs keyword arguments, as JSON")
+    args = parser.parse_args()
+
+    vpc_kwargs = json.loads(args.args)
+    _print_report("Vpc", analyse(args.azs, vpc_kwargs, args.flow_logs))
+
+
+if __name__ == "__main__":
+    main()
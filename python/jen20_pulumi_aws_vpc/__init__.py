@@ -6,6 +6,63 @@
 
 """
 A module for creating a good-practice AWS VPC using Pulumi.
+
+Address planning APIs do not depend on Pulumi, and are imported eagerly.
+Components which do depend on Pulumi and the AWS provider are imported on
+first access, so that planning scripts and tests do not pay for importing them.
 """
+import importlib
+from typing import TYPE_CHECKING
+
+from .cidr_pool import CidrPool
+from .fleet_args import VpcFleetArgs
+from .iam_helpers import assume_role_policy_for_principal, policy_document, policy_statement
+from .instrumentation import Instrumentation
+from .plan import VpcPlan
+from .route_summary import summarise_routes
+from .subnet_distributor import SubnetDistributor
+from .subnet_layout import SubnetLayout, SubnetRouting, SubnetTier
+from .vpc_args import NatStrategy, VpcArgs
+
+if TYPE_CHECKING:
+    # Loaded lazily by __getattr__ at runtime; imported here for type checkers and linters
+    from .vpc import Vpc
+    from .vpc_fleet import VpcFleet
+
+# Attributes which are loaded from the named submodule on first access
+_LAZY_ATTRIBUTES = {
+    "Vpc": ".vpc",
+    "VpcFleet": ".vpc_fleet",
+}
+
+__all__ = [
+    "CidrPool",
+    "Instrumentation",
+    "NatStrategy",
+    "SubnetDistributor",
+    "SubnetLayout",
+    "SubnetRouting",
+    "SubnetTier",
+    "Vpc",
+    "VpcArgs",
+    "VpcFleet",
+    "VpcFleetArgs",
+    "VpcPlan",
+    "assume_role_policy_for_principal",
+    "policy_document",
+    "policy_statement",
+    "summarise_routes",
+]
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
 
-from .vpc import *
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
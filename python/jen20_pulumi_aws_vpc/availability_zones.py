@@ -0,0 +1,44 @@
+# Copyright 2018-2019, James Nugent.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can obtain
+# one at http://mozilla.org/MPL/2.0/.
+
+"""
+Contains helpers for looking up the availability zones in which components
+create subnets, shared by `Vpc` and `VpcFleet`.
+"""
+from typing import Sequence
+
+import pulumi
+from pulumi_aws import get_availability_zones
+
+try:
+    from pulumi_aws import get_availability_zones_output
+except ImportError:
+    # Versions of pulumi_aws prior to 4.x do not have Output-returning invokes
+    get_availability_zones_output = None
+
+
+def available_zone_names(opts: pulumi.InvokeOptions) -> pulumi.Output:
+    """
+    Looks up the names of the available availability zones in the region of the provider given in `opts`.
+
+    :param opts: The options with which to invoke the lookup, e.g. its parent and provider.
+    """
+    if get_availability_zones_output is not None:
+        return get_availability_zones_output(state="available", opts=opts).names
+    return pulumi.Output.from_input(get_availability_zones(state="available", opts=opts).names)
+
+
+def zone_name(names: Sequence[str], index: int) -> str:
+    """
+    Returns the name of the availability zone at `index`, raising a ValueError if there are too few zones.
+
+    :param names: The names of the available availability zones.
+    :param index: The index of the availability zone in which a subnet was planned.
+    """
+    if index >= len(names):
+        raise ValueError(f"A subnet was planned in availability zone {index + 1}, but only "
+                         f"{len(names)} availability zones are available: {', '.join(names)}")
+    return names[index]
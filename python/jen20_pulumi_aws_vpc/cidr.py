@@ -0,0 +1,100 @@
+# Copyright 2018-2019, James Nugent.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can obtain
+# one at http://mozilla.org/MPL/2.0/.
+
+"""
+Contains an integer representation of CIDR blocks, and the arithmetic used to
+derive subnets from them without enumerating the address space.
+"""
+import ipaddress
+from typing import NamedTuple
+
+_MAX_PREFIX_LENGTH = {4: 32, 6: 128}
+
+
+class CidrBlock(NamedTuple):
+    """
+    A CIDR block represented as an integer network address and a prefix length.
+    Strings are only produced when the block is formatted with `str()`.
+    """
+    network: int
+    prefix_length: int
+    version: int = 4
+
+    @staticmethod
+    def parse(cidr: str) -> 'CidrBlock':
+        """
+        Parses a CIDR block such as "10.0.0.0/16" or "2001:db8::/56". Host bits
+        must not be set.
+
+        :param cidr: The CIDR block to parse.
+        """
+        parsed = ipaddress.ip_network(cidr)
+        return CidrBlock(int(parsed.network_address), parsed.prefixlen, parsed.version)
+
+    @property
+    def max_prefix_length(self) -> int:
+        """
+        The number of bits in an address of this block's IP version.
+        """
+        return _MAX_PREFIX_LENGTH[self.version]
+
+    @property
+    def num_addresses(self) -> int:
+        """
+        The number of addresses contained in the block.
+        """
+        return 1 << (self.max_prefix_length - self.prefix_length)
+
+    @property
+    def last(self) -> int:
+        """
+        The integer value of the last address contained in the block.
+        """
+        return self.network + self.num_addresses - 1
+
+    def subnet(self, new_bits: int, number: int) -> 'CidrBlock':
+        """
+        Returns the `number`th subnet obtained by extending the prefix of this
+        block by `new_bits` bits. This is computed directly rather than by
+        enumerating the preceding subnets.
+
+        :param new_bits: The number of bits by which to extend the prefix.
+        :param number: The zero-based index of the subnet to return.
+        """
+        new_prefix_length = self.prefix_length + new_bits
+        if new_bits < 0 or new_prefix_length > self.max_prefix_length:
+            raise ValueError(f"Requested {new_bits} new bits, but only "
+                             f"{self.max_prefix_length - self.prefix_length} are available.")
+        if not 0 <= number < (1 << new_bits):
+            raise ValueError(f"Subnet number {number} does not fit in {new_bits} new bits.")
+
+        return CidrBlock(self.network + (number << (self.max_prefix_length - new_prefix_length)),
+                         new_prefix_length, self.version)
+
+    def contains(self, other: 'CidrBlock') -> bool:
+        """
+        Returns whether `other` lies entirely within this block.
+
+        :param other: The block to test.
+        """
+        return (self.version == other.version
+                and self.prefix_length <= other.prefix_length
+                and self.network <= other.network <= self.last)
+
+    def overlaps(self, other: 'CidrBlock') -> bool:
+        """
+        Returns whether this block and `other` share any addresses.
+
+        :param other: The block to test.
+        """
+        return self.version == other.version and self.network <= other.last and other.network <= self.last
+
+    def __str__(self) -> str:
+        if self.version == 4:
+            network = self.network
+            return f"{network >> 24}.{(network >> 16) & 0xff}.{(network >> 8) & 0xff}.{network & 0xff}/" \
+                   f"{self.prefix_length}"
+        return f"{ipaddress.IPv6Address(self.network)}/{self.prefix_length}"
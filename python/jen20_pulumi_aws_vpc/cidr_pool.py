@@ -0,0 +1,174 @@
+# Copyright 2018-2019, James Nugent.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can obtain
+# one at http://mozilla.org/MPL/2.0/.
+
+"""
+Contains an allocator which hands out non-overlapping CIDR blocks from a supernet.
+"""
+import heapq
+from typing import Dict, Iterable, List, Set
+
+from .cidr import CidrBlock
+
+
+class CidrPool:
+    """
+    A CidrPool hands out non-overlapping blocks of a requested prefix length from
+    a supernet, for example to choose the `base_cidr` of each of a number of VPCs.
+
+    Free space is tracked as buddy free-lists - one per prefix length - so that
+    allocation and release take time proportional to the prefix length rather
+    than to the number of blocks already allocated. Allocation always returns
+    the lowest-addressed block from the smallest free block which fits, so the
+    same supernet, used blocks and sequence of calls always produce the same
+    blocks.
+    """
+
+    def __init__(self, supernet: str, used: Iterable[str] = ()):
+        """
+        Constructs a CidrPool.
+
+        :param supernet: The CIDR block from which to allocate, e.g. "10.0.0.0/8".
+        :param used: CIDR blocks which are already in use and must not be allocated. Blocks which do
+                     not overlap the supernet are ignored, and blocks within another used block are
+                     merged into it.
+        """
+        self.supernet = CidrBlock.parse(supernet)
+        self.__free_sets: Dict[int, Set[int]] = {}
+        self.__free_heaps: Dict[int, List[int]] = {}
+        self.__allocated: Dict[int, int] = {}
+
+        self.__add_free(self.supernet.network, self.supernet.prefix_length)
+
+        # Used blocks, e.g. from existing route tables, may repeat or nest. In
+        # address order, with larger blocks first, any block within another used
+        # block is within the last one reserved.
+        blocks = set()
+        for cidr in used:
+            block = CidrBlock.parse(cidr)
+            if block.contains(self.supernet):
+                block = self.supernet
+            if self.supernet.contains(block):
+                blocks.add((block.network, block.prefix_length))
+        last = None
+        for network, prefix_length in sorted(blocks):
+            block = CidrBlock(network, prefix_length, self.supernet.version)
+            if last is None or not last.contains(block):
+                self.__reserve(block)
+                last = block
+
+    def __add_free(self, network: int, prefix_length: int):
+        self.__free_sets.setdefault(prefix_length, set()).add(network)
+        heapq.heappush(self.__free_heaps.setdefault(prefix_length, []), network)
+
+    def __pop_lowest_free(self, prefix_length: int):
+        free_set = self.__free_sets.get(prefix_length)
+        if not free_set:
+            return None
+        heap = self.__free_heaps[prefix_length]
+        while True:
+            network = heapq.heappop(heap)
+            # Entries for blocks which have since been coalesced are removed lazily
+            if network in free_set:
+                free_set.remove(network)
+                return network
+
+    def __block_size(self, prefix_length: int) -> int:
+        return 1 << (self.supernet.max_prefix_length - prefix_length)
+
+    def __split_down(self, network: int, from_prefix_length: int, to_prefix_length: int, target: int):
+        # Halve the free block until it is the requested size, returning the
+        # halves which do not contain target to the free lists.
+        for prefix_length in range(from_prefix_length + 1, to_prefix_length + 1):
+            half = self.__block_size(prefix_length)
+            if target >= network + half:
+                self.__add_free(network, prefix_length)
+                network += half
+            else:
+                self.__add_free(network + half, prefix_length)
+
+    def __reserve(self, block: CidrBlock):
+        for prefix_length in range(block.prefix_length, self.supernet.prefix_length - 1, -1):
+            candidate = block.network & ~(self.__block_size(prefix_length) - 1)
+            free_set = self.__free_sets.get(prefix_length)
+            if free_set and candidate in free_set:
+                free_set.remove(candidate)
+                self.__split_down(candidate, prefix_length, block.prefix_length, block.network)
+                self.__allocated[block.network] = block.prefix_length
+                return
+        raise ValueError(f"CIDR block {block} overlaps a block which is already allocated.")
+
+    def __check_prefix_length(self, prefix_length: int):
+        if not self.supernet.prefix_length <= prefix_length <= self.supernet.max_prefix_length:
+            raise ValueError(f"Prefix length {prefix_length} is outside the range "
+                             f"{self.supernet.prefix_length}-{self.supernet.max_prefix_length} "
+                             f"available in {self.supernet}.")
+
+    def allocate(self, prefix_length: int) -> str:
+        """
+        Allocates the next free block with the given prefix length.
+
+        :param prefix_length: The prefix length of the block to allocate, e.g. 16 for a /16.
+        :return: The allocated CIDR block, suitable for use as `VpcArgs.base_cidr`.
+        """
+        self.__check_prefix_length(prefix_length)
+        for free_prefix_length in range(prefix_length, self.supernet.prefix_length - 1, -1):
+            network = self.__pop_lowest_free(free_prefix_length)
+            if network is not None:
+                self.__split_down(network, free_prefix_length, prefix_length, network)
+                self.__allocated[network] = prefix_length
+                return str(CidrBlock(network, prefix_length, self.supernet.version))
+        raise ValueError(f"No free /{prefix_length} block remains in {self.supernet}.")
+
+    def reserve(self, cidr: str):
+        """
+        Marks a specific block as allocated.
+
+        :param cidr: The CIDR block to reserve. It must lie within the supernet and not overlap any
+                     allocated block.
+        """
+        block = CidrBlock.parse(cidr)
+        if not self.supernet.contains(block):
+            raise ValueError(f"CIDR block {block} is not within {self.supernet}.")
+        self.__reserve(block)
+
+    def release(self, cidr: str):
+        """
+        Returns a previously allocated or reserved block to the pool, coalescing it with any free
+        neighbouring blocks so that it can be reused by larger allocations.
+
+        :param cidr: The CIDR block to release.
+        """
+        block = CidrBlock.parse(cidr)
+        if self.__allocated.get(block.network) != block.prefix_length or block.version != self.supernet.version:
+            raise ValueError(f"CIDR block {block} is not allocated from this pool.")
+        del self.__allocated[block.network]
+
+        network, prefix_length = block.network, block.prefix_length
+        while prefix_length > self.supernet.prefix_length:
+            buddy = network ^ self.__block_size(prefix_length)
+            free_set = self.__free_sets.get(prefix_length)
+            if not free_set or buddy not in free_set:
+                break
+            free_set.remove(buddy)
+            network &= ~self.__block_size(prefix_length)
+            prefix_length -= 1
+        self.__add_free(network, prefix_length)
+
+    @property
+    def allocated(self) -> List[str]:
+        """
+        The blocks currently allocated or reserved, in address order.
+        """
+        return [str(CidrBlock(network, self.__allocated[network], self.supernet.version))
+                for network in sorted(self.__allocated)]
+
+    @property
+    def free_addresses(self) -> int:
+        """
+        The number of addresses in the supernet which are not allocated.
+        """
+        return sum(len(networks) * self.__block_size(prefix_length)
+                   for prefix_length, networks in self.__free_sets.items())
@@ -0,0 +1,220 @@
+# Copyright 2018-2019, James Nugent.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can obtain
+# one at http://mozilla.org/MPL/2.0/.
+
+"""
+Contains the command line interface, which plans the address space of many VPCs
+without Pulumi:
+
+    python -m jen20_pulumi_aws_vpc plan vpcs.csv > layouts.jsonl
+    python -m jen20_pulumi_aws_vpc plan --check < vpcs.csv
+
+Input is CSV, read from a file or from stdin, with a row per VPC. If the first
+row is a header, it names the columns `base_cidr`, `az_count` and `name`;
+otherwise the columns are in that order. `az_count` may be omitted if
+`--az-count` is given, and `name` defaults to the line number.
+"""
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+from typing import IO, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from .cidr import CidrBlock
+from .fleet_args import find_overlaps
+from .subnet_layout import DEFAULT_TIERS, SubnetLayout
+
+COLUMNS = ("base_cidr", "az_count", "name")
+
+# Inputs with fewer rows than this are planned in-process, since starting a pool would take longer
+_MIN_ROWS_PER_PROCESS = 256
+
+
+class InputRow(NamedTuple):
+    """
+    A VPC to plan, read from line `line` of the input. `az_count` is as given, and is validated when the VPC is
+    planned.
+    """
+    line: int
+    name: str
+    base_cidr: str
+    az_count: str
+
+
+def read_rows(lines: Iterable[str], default_az_count: Optional[int] = None) -> Iterator[InputRow]:
+    """
+    Reads the VPCs to plan from CSV, skipping blank lines and lines starting with "#".
+
+    :param lines: The lines of the input.
+    :param default_az_count: The number of availability zones of VPCs with no `az_count`.
+    """
+    columns: Optional[Sequence[str]] = None
+    reader = csv.reader(lines)
+    for values in reader:
+        values = [value.strip() for value in values]
+        if not any(values) or values[0].startswith("#"):
+            continue
+        if columns is None:
+            if "base_cidr" in values:
+                columns = values
+                continue
+            columns = COLUMNS
+
+        fields = dict(zip(columns, values))
+        yield InputRow(line=reader.line_num,
+                       name=fields.get("name") or f"line {reader.line_num}",
+                       base_cidr=fields.get("base_cidr", ""),
+                       az_count=fields.get("az_count") or str(default_az_count or ""))
+
+
+def plan_row(row: InputRow) -> Tuple[InputRow, Optional[str], Optional[str]]:
+    """
+    Plans the subnets of a VPC with the default tiers used by `Vpc`, returning the row, the layout as a line of
+    JSON, and an error message if the row could not be planned.
+
+    :param row: The VPC to plan.
+    """
+    if not row.az_count:
+        return row, None, "az_count must be given, either in the input or with --az-count"
+    try:
+        az_count = int(row.az_count)
+    except ValueError:
+        az_count = 0
+    if az_count < 1:
+        return row, None, f"az_count must be a positive integer, not {row.az_count!r}"
+
+    try:
+        layout = SubnetLayout(row.base_cidr, az_count, DEFAULT_TIERS)
+    except ValueError as e:
+        return row, None, str(e)
+
+    zones = [{
+        "index": index,
+        "cidr_block": str(zone),
+        "private": str(layout.blocks["private"][index]),
+        "public": str(layout.blocks["public"][index]),
+        "spare": [str(block) for block in layout.spare_blocks[index]],
+    } for index, zone in enumerate(layout.az_blocks)]
+
+    return row, json.dumps({
+        "name": row.name,
+        "base_cidr": row.base_cidr,
+        "az_count": az_count,
+        "availability_zones": zones,
+    }, separators=(",", ":")), None
+
+
+def plan_rows(rows: Iterable[InputRow], jobs: int) -> Iterator[Tuple[InputRow, Optional[str], Optional[str]]]:
+    """
+    Plans each row, in input order. Large inputs are spread over `jobs` processes, and results are yielded as they
+    are completed rather than once every row has been planned.
+
+    :param rows: The VPCs to plan.
+    :param jobs: The maximum number of processes to use.
+    """
+    rows = iter(rows)
+    first = []
+    for row in rows:
+        first.append(row)
+        if len(first) >= _MIN_ROWS_PER_PROCESS:
+            break
+
+    if jobs <= 1 or len(first) < _MIN_ROWS_PER_PROCESS:
+        yield from map(plan_row, first)
+        yield from map(plan_row, rows)
+        return
+
+    with multiprocessing.Pool(processes=jobs) as pool:
+        yield from pool.imap(plan_row, itertools.chain(first, rows), chunksize=_MIN_ROWS_PER_PROCESS // 4)
+
+
+def check_rows(rows: Iterable[InputRow]) -> Tuple[List[dict], List[str]]:
+    """
+    Checks that the base CIDR blocks of the rows do not overlap, returning a record of each overlap found and the
+    errors in the input.
+
+    :param rows: The VPCs to check.
+    """
+    rows_by_name: Dict[str, InputRow] = {}
+    blocks: Dict[str, CidrBlock] = {}
+    errors = []
+    for row in rows:
+        if row.name in rows_by_name:
+            errors.append(f"line {row.line}: {row.name} is also named on line {rows_by_name[row.name].line}")
+            continue
+        try:
+            blocks[row.name] = CidrBlock.parse(row.base_cidr)
+        except ValueError as e:
+            errors.append(f"line {row.line}: {e}")
+            continue
+        rows_by_name[row.name] = row
+
+    overlaps = find_overlaps(blocks)
+    return [{
+        "name": rows_by_name[second].name,
+        "base_cidr": rows_by_name[second].base_cidr,
+        "overlaps": rows_by_name[first].name,
+        "overlaps_base_cidr": rows_by_name[first].base_cidr,
+    } for first, second in overlaps], errors
+
+
+def main(argv: Optional[Sequence[str]] = None, stdin: IO[str] = None, stdout: IO[str] = None,
+         stderr: IO[str] = None) -> int:
+    """
+    Runs the command line interface, returning the exit status: 0 on success, 1 if any row could not be planned or
+    any overlaps were found, and 2 for usage errors.
+
+    :param argv: The command line arguments, excluding the program name. Defaults to `sys.argv[1:]`.
+    """
+    stdin, stdout, stderr = stdin or sys.stdin, stdout or sys.stdout, stderr or sys.stderr
+
+    parser = argparse.ArgumentParser(prog="python -m jen20_pulumi_aws_vpc",
+                                     description="Plans the address space of VPCs without Pulumi.")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    commands.required = True
+    plan = commands.add_parser("plan", help="Write the subnet layout of each VPC as JSON Lines",
+                               description="Writes the subnet layout of each VPC in the input as a line of JSON. "
+                                           "Input is CSV of base_cidr, az_count and name.")
+    plan.add_argument("input", nargs="?", default="-", help="A CSV file, or - to read stdin (the default)")
+    plan.add_argument("--az-count", type=int, help="The number of availability zones of VPCs with no az_count")
+    plan.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                      help="The maximum number of processes with which to plan large inputs")
+    plan.add_argument("--check", action="store_true",
+                      help="Write each pair of overlapping VPCs as a line of JSON, instead of layouts")
+    args = parser.parse_args(argv)
+
+    if args.input == "-":
+        return _plan(args, stdin, stdout, stderr)
+    try:
+        f = open(args.input, newline="", encoding="utf-8")  # pylint: disable=consider-using-with
+    except OSError as e:
+        print(f"{parser.prog}: {e}", file=stderr)
+        return 2
+    with f:
+        return _plan(args, f, stdout, stderr)
+
+
+def _plan(args: argparse.Namespace, lines: IO[str], stdout: IO[str], stderr: IO[str]) -> int:
+    rows = read_rows(lines, args.az_count)
+
+    if args.check:
+        overlaps, errors = check_rows(rows)
+        for overlap in overlaps:
+            print(json.dumps(overlap, separators=(",", ":")), file=stdout)
+        for error in errors:
+            print(error, file=stderr)
+        return 1 if overlaps or errors else 0
+
+    failed = False
+    for row, layout, error in plan_rows(rows, args.jobs):
+        if error is not None:
+            print(f"line {row.line}: {error}", file=stderr)
+            failed = True
+        else:
+            print(layout, file=stdout)
+    return 1 if failed else 0
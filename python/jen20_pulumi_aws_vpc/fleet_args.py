@@ -0,0 +1,113 @@
+# Copyright 2018-2019, James Nugent.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can obtain
+# one at http://mozilla.org/MPL/2.0/.
+
+"""
+Contains the arguments for the VpcFleet component. This module does not import
+Pulumi, so that fleets can be planned and validated without it.
+"""
+import copy
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+from .cidr import CidrBlock
+from .cidr_pool import CidrPool
+from .plan import VpcPlan
+from .vpc_args import VpcArgs
+
+if TYPE_CHECKING:
+    import pulumi
+
+
+class VpcFleetArgs:
+    """
+    The arguments necessary to construct a `VpcFleet` resource.
+    """
+
+    def __init__(self,
+                 vpcs: Mapping[str, VpcArgs],
+                 providers: 'Optional[Mapping[str, pulumi.ProviderResource]]' = None):
+        """
+        Constructs a VpcFleetArgs. The base CIDR blocks of the VPCs must not overlap, even if they are in different
+        regions, so that any of them can later be peered or attached to a transit gateway.
+
+        :param vpcs: The arguments of each VPC, by Pulumi resource name. The `region` of each VPC defaults to the
+               region configured for the AWS provider (`aws:region`). If the fleet is created with an explicit AWS
+               provider, it defaults to that provider's region in `providers`, and must otherwise be given.
+        :param providers: The AWS provider with which to create the VPCs in each region, by region name. VPCs in
+               other regions are created with the fleet's provider.
+        """
+        self.vpcs = dict(vpcs)
+        self.providers = dict(providers or {})
+
+        overlaps = find_overlaps({name: args.base_cidr for name, args in self.vpcs.items()})
+        if overlaps:
+            raise ValueError("VPCs in a fleet must not overlap: " +
+                             ", ".join(f"{first} overlaps {second}" for first, second in overlaps))
+
+    @staticmethod
+    def from_supernet(supernet: str,
+                      prefix_length: int,
+                      vpcs: Mapping[str, Mapping[str, Any]],
+                      providers: 'Optional[Mapping[str, pulumi.ProviderResource]]' = None,
+                      used: Iterable[str] = (),
+                      **shared_args) -> 'VpcFleetArgs':
+        """
+        Constructs a VpcFleetArgs from a fleet spec, allocating the base CIDR block of each VPC from a supernet with a
+        `CidrPool`. Blocks are allocated in the order of `vpcs`, so VPCs added to the end of the spec do not
+        re-address existing VPCs.
+
+        :param supernet: The CIDR block from which to allocate VPC blocks, e.g. "10.0.0.0/8".
+        :param prefix_length: The prefix length of the block allocated to each VPC, e.g. 16 for a /16.
+        :param vpcs: The `VpcArgs` arguments specific to each VPC, such as `description` and `region`, by Pulumi
+               resource name. These take precedence over `shared_args`.
+        :param providers: The AWS provider with which to create the VPCs in each region, by region name.
+        :param used: CIDR blocks within the supernet which are already in use and must not be allocated.
+        :param shared_args: `VpcArgs` arguments shared by every VPC, such as `base_tags`.
+        """
+        pool = CidrPool(supernet, used)
+        return VpcFleetArgs({name: VpcArgs(**{**shared_args, **vpc_args, "base_cidr": pool.allocate(prefix_length)})
+                             for name, vpc_args in vpcs.items()}, providers)
+
+    def with_region(self, default_region: Optional[str]) -> Dict[str, VpcArgs]:
+        """
+        Returns a copy of the arguments of each VPC, with `region` set to the default region for those which have
+        none. The arguments given to the fleet are not modified.
+
+        :param default_region: The region of VPCs which do not specify one.
+        """
+        resolved = {}
+        for name, args in self.vpcs.items():
+            resolved[name] = copy.copy(args)
+            resolved[name].region = args.region or default_region
+        return resolved
+
+    def plans(self, default_region: Optional[str]) -> Dict[str, VpcPlan]:
+        """
+        Plans every VPC in the fleet, by Pulumi resource name.
+
+        :param default_region: The region of VPCs which do not specify one.
+        """
+        return {name: VpcPlan.from_args(name, args, args.region)
+                for name, args in self.with_region(default_region).items()}
+
+
+def find_overlaps(cidrs: Mapping[str, Union[str, CidrBlock]]) -> List[Tuple[str, str]]:
+    """
+    Returns pairs of names whose CIDR blocks overlap, in address order. Blocks are sorted and swept once, so every
+    block which overlaps a lower-addressed block is reported, paired with the block reaching furthest above it.
+
+    :param cidrs: CIDR blocks by name, e.g. the `base_cidr` of each VPC, either as strings or already parsed.
+    """
+    blocks = sorted(((CidrBlock.parse(cidr) if isinstance(cidr, str) else cidr, name) for name, cidr in cidrs.items()),
+                    key=lambda item: (item[0].version, item[0].network, item[0].prefix_length))
+
+    overlaps = []
+    furthest_block, furthest_name = None, None
+    for block, name in blocks:
+        if furthest_block is not None and furthest_block.overlaps(block):
+            overlaps.append((furthest_name, name))
+        if furthest_block is None or furthest_block.version != block.version or block.last > furthest_block.last:
+            furthest_block, furthest_name = block, name
+    return overlaps
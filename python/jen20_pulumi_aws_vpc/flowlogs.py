@@ -0,0 +1,391 @@
+# Copyright 2018-2019, James Nugent.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can obtain
+# one at http://mozilla.org/MPL/2.0/.
+
+"""
+Contains a streaming parser for VPC flow log records, and aggregations over the
+parsed records. Files are read incrementally and records are held in columnar
+batches, so memory use does not depend on the size of the logs.
+"""
+import gzip
+import heapq
+import io
+import os
+import socket
+from array import array
+from bisect import bisect_right
+from itertools import islice, repeat
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+
+from .cidr import CidrBlock
+from .subnet_distributor import SubnetDistributor
+
+#: The fields of the default (version 2) flow log format.
+DEFAULT_FIELDS = ("version", "account-id", "interface-id", "srcaddr", "dstaddr", "srcport", "dstport", "protocol",
+                  "packets", "bytes", "start", "end", "action", "log-status")
+
+#: Every field available in version 2 to 5 custom flow log formats.
+KNOWN_FIELDS = frozenset(DEFAULT_FIELDS + (
+    "vpc-id", "subnet-id", "instance-id", "tcp-flags", "type", "pkt-srcaddr", "pkt-dstaddr",
+    "region", "az-id", "sublocation-type", "sublocation-id",
+    "pkt-src-aws-service", "pkt-dst-aws-service", "flow-direction", "traffic-path",
+))
+
+#: Fields which are stored as integers. Missing values ("-") are represented as -1.
+INTEGER_FIELDS = frozenset({
+    "version", "srcport", "dstport", "protocol", "packets", "bytes", "start", "end", "tcp-flags", "traffic-path",
+})
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_READ_BUFFER_SIZE = 1 << 20
+
+Source = Union[str, "os.PathLike[str]", BinaryIO]
+
+
+def parse_format(log_format: str) -> Tuple[str, ...]:
+    """
+    Returns the fields of a flow log format.
+
+    :param log_format: A format as given to `ec2.FlowLog`, e.g. "${version} ${srcaddr} ${dstaddr}", or the header
+                       line of a flow log file, e.g. "version srcaddr dstaddr".
+    """
+    return tuple(field[2:-1] if field.startswith("${") and field.endswith("}") else field
+                 for field in log_format.split())
+
+
+class FlowRecordBatch:
+    """
+    A batch of flow log records, stored by column. Integer fields are stored as
+    `array.array` of signed 64-bit integers, and other fields as lists of strings.
+    """
+    __slots__ = ("fields", "columns", "_index")
+
+    def __init__(self, fields: Tuple[str, ...], columns: Tuple[Union[array, List[str]], ...]):
+        self.fields = fields
+        self.columns = columns
+        self._index = {field: i for i, field in enumerate(fields)}
+
+    def __len__(self) -> int:
+        return len(self.columns[0]) if self.columns else 0
+
+    def __iter__(self) -> Iterator[Tuple[Any, ...]]:
+        """
+        Iterates over the records in the batch as tuples, in field order.
+        """
+        return zip(*self.columns)
+
+    def column(self, field: str) -> Union[array, List[str]]:
+        """
+        Returns the values of a field for every record in the batch.
+
+        :param field: The field name, e.g. "srcaddr" or "log-status".
+        """
+        try:
+            return self.columns[self._index[field]]
+        except KeyError:
+            raise KeyError(f"Flow log records do not have a {field!r} field") from None
+
+
+def read_flow_log(source: Source,
+                  log_format: Optional[str] = None,
+                  batch_size: int = 8192) -> Iterator[FlowRecordBatch]:
+    """
+    Parses a flow log, yielding its records in batches. Gzip-compressed logs,
+    as delivered to S3, are detected and decompressed as they are read. Only
+    plain-text logs can be parsed, not those delivered to S3 as Parquet files.
+
+    :param source: The path of a log file, or a binary file object such as the `Body` of an S3 `get_object` response.
+                   File objects are not closed.
+    :param log_format: The format of the records, as given to `ec2.FlowLog`. If omitted, the format is read from the
+                       header line of the file, or the default format is assumed if there is no header line.
+    :param batch_size: The maximum number of records in each batch.
+    """
+    if isinstance(source, (str, bytes, os.PathLike)):
+        with open(source, "rb", buffering=0) as f:
+            yield from _read_lines(_text_lines(f), log_format, batch_size)
+    else:
+        yield from _read_lines(_text_lines(source), log_format, batch_size)
+
+
+def read_flow_logs(sources: Iterable[Source],
+                   log_format: Optional[str] = None,
+                   batch_size: int = 8192) -> Iterator[FlowRecordBatch]:
+    """
+    Parses a sequence of flow logs, yielding their records in batches. See `read_flow_log`.
+
+    :param sources: The paths or binary file objects of the logs.
+    :param log_format: The format of the records, if the logs do not have header lines.
+    :param batch_size: The maximum number of records in each batch.
+    """
+    for source in sources:
+        yield from read_flow_log(source, log_format, batch_size)
+
+
+class _RawReader(io.RawIOBase):
+    # Adapts any object with a read method to the raw I/O interface, without
+    # taking ownership of it.
+    def __init__(self, f):
+        super().__init__()
+        self._f = f
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self._f.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def _text_lines(f) -> io.TextIOWrapper:
+    binary = io.BufferedReader(_RawReader(f), _READ_BUFFER_SIZE)
+    if binary.peek(2)[:2] == _GZIP_MAGIC:
+        binary = gzip.GzipFile(fileobj=binary, mode="rb")
+    return io.TextIOWrapper(binary, encoding="utf-8")
+
+
+def _read_lines(lines: Iterator[str], log_format: Optional[str], batch_size: int) -> Iterator[FlowRecordBatch]:
+    first = next(lines, None)
+    if first is None:
+        return
+    header = first.split()
+    if log_format is not None:
+        fields = parse_format(log_format)
+        pending = [] if tuple(header) == fields else [first]
+    elif header and header[0] in KNOWN_FIELDS:
+        fields, pending = tuple(header), []
+    else:
+        fields, pending = DEFAULT_FIELDS, [first]
+
+    integer_columns = tuple(field in INTEGER_FIELDS for field in fields)
+    batch = _parse_batch(pending + list(islice(lines, batch_size - len(pending))), fields, integer_columns)
+    while batch is not None:
+        if len(batch):
+            yield batch
+        batch = _parse_batch(list(islice(lines, batch_size)), fields, integer_columns)
+
+
+def _parse_batch(lines: List[str], fields: Tuple[str, ...], integer_columns: Tuple[bool, ...]) \
+        -> Optional[FlowRecordBatch]:
+    if not lines:
+        return None
+    width = len(fields)
+    # Truncated or malformed lines are skipped rather than misaligning the columns
+    rows = [row for row in map(str.split, lines) if len(row) == width]
+    if not rows:
+        return FlowRecordBatch(fields, ())
+    columns = tuple(_integer_column(column) if is_integer else list(column)
+                    for column, is_integer in zip(zip(*rows), integer_columns))
+    return FlowRecordBatch(fields, columns)
+
+
+def _integer_column(values: Sequence[str]) -> array:
+    try:
+        return array("q", map(int, values))
+    except ValueError:
+        # Records with a log-status of NODATA or SKIPDATA have no values
+        return array("q", (int(value) if value != "-" else -1 for value in values))
+
+
+def aggregate(batches: Iterable[FlowRecordBatch], *aggregations):
+    """
+    Feeds every batch to each of the given aggregations in a single pass, and returns the aggregations.
+
+    :param batches: Batches of records, as returned by `read_flow_log`.
+    :param aggregations: Objects with an `update(batch)` method, such as `TopTalkers` or `BytesPerSubnet`.
+    """
+    for batch in batches:
+        for aggregation in aggregations:
+            aggregation.update(batch)
+    return aggregations
+
+
+class TopFlows:
+    """
+    Finds the heaviest flows in a stream of records, grouped by `key_fields`
+    and weighted by `weight_field`, or by the number of records if that is
+    None.
+
+    At most `capacity` groups are tracked, so memory use is bounded. While no
+    more than `capacity` distinct groups have been seen the totals are exact;
+    beyond that they are lower bounds, low by at most `error` (the Misra-Gries
+    summary), and every group heavier than `error` is retained.
+    """
+
+    def __init__(self,
+                 key_fields: Sequence[str],
+                 weight_field: Optional[str] = "bytes",
+                 action: Optional[str] = None,
+                 capacity: int = 10000):
+        """
+        Constructs a TopFlows.
+
+        :param key_fields: The fields identifying a group of records, e.g. ("srcaddr", "dstaddr").
+        :param weight_field: The integer field to total, or None to count records.
+        :param action: If given, only records with this action ("ACCEPT" or "REJECT") are included.
+        :param capacity: The maximum number of groups to track.
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.key_fields = tuple(key_fields)
+        self.weight_field = weight_field
+        self.action = action
+        self.capacity = capacity
+        self.total = 0
+        self.error = 0
+        self._totals: Dict[Tuple[Any, ...], int] = {}
+
+    def update(self, batch: FlowRecordBatch):
+        """
+        Adds a batch of records to the totals.
+
+        :param batch: A batch of records, as returned by `read_flow_log`.
+        """
+        keys = zip(*(batch.column(field) for field in self.key_fields))
+        weights = batch.column(self.weight_field) if self.weight_field else repeat(1)
+        if self.action is not None:
+            action = self.action
+            rows = ((key, weight) for key, weight, record_action in zip(keys, weights, batch.column("action"))
+                    if record_action == action)
+        else:
+            rows = zip(keys, weights)
+
+        totals = self._totals
+        batch_total = 0
+        for key, weight in rows:
+            if weight > 0:
+                totals[key] = totals.get(key, 0) + weight
+                batch_total += weight
+        self.total += batch_total
+
+        if len(totals) > self.capacity:
+            threshold = heapq.nlargest(self.capacity + 1, totals.values())[-1]
+            self.error += threshold
+            self._totals = {key: value - threshold for key, value in totals.items() if value > threshold}
+
+    def top(self, n: int = 10) -> List[Tuple[Tuple[Any, ...], int]]:
+        """
+        Returns the `n` heaviest groups and their totals, heaviest first.
+
+        :param n: The number of groups to return.
+        """
+        return sorted(self._totals.items(), key=lambda item: (-item[1], item[0]))[:n]
+
+
+class TopTalkers(TopFlows):
+    """
+    Finds the pairs of addresses which exchanged the most bytes.
+    """
+
+    def __init__(self, capacity: int = 10000):
+        """
+        Constructs a TopTalkers.
+
+        :param capacity: The maximum number of address pairs to track. See `TopFlows`.
+        """
+        super().__init__(("srcaddr", "dstaddr"), "bytes", capacity=capacity)
+
+
+class RejectedFlows(TopFlows):
+    """
+    Counts rejected records by source, destination, destination port and protocol.
+    """
+
+    def __init__(self, capacity: int = 10000):
+        """
+        Constructs a RejectedFlows.
+
+        :param capacity: The maximum number of flows to track. See `TopFlows`.
+        """
+        super().__init__(("srcaddr", "dstaddr", "dstport", "protocol"), None, action="REJECT", capacity=capacity)
+
+
+class BytesPerSubnet:
+    """
+    Totals the bytes sent from and received by each subnet of a VPC. Records
+    are attributed to subnets by address, so traffic between two interfaces in
+    the VPC, which is recorded by both, is counted twice.
+    """
+
+    # Addresses are looked up in a bounded cache, since most traffic involves
+    # a small number of hosts.
+    _CACHE_SIZE = 1 << 16
+
+    def __init__(self, subnets: Mapping[str, str]):
+        """
+        Constructs a BytesPerSubnet.
+
+        :param subnets: The IPv4 CIDR block of each subnet, by name. Subnets must not overlap.
+        """
+        blocks = sorted((CidrBlock.parse(cidr), name) for name, cidr in subnets.items())
+        for (block, name), (next_block, next_name) in zip(blocks, blocks[1:]):
+            if block.overlaps(next_block):
+                raise ValueError(f"Subnets {name} ({block}) and {next_name} ({next_block}) overlap")
+        self._networks = [block.network for block, _ in blocks]
+        self._lasts = [block.last for block, _ in blocks]
+        self._names = [name for _, name in blocks]
+        self._cache: Dict[str, Optional[str]] = {}
+
+        self.sent: Dict[str, int] = {name: 0 for name in subnets}
+        self.received: Dict[str, int] = {name: 0 for name in subnets}
+
+    @staticmethod
+    def from_distributor(distributor: SubnetDistributor) -> 'BytesPerSubnet':
+        """
+        Constructs a BytesPerSubnet for the subnets of a SubnetDistributor layout, named "public-0", "private-0" and
+        so on by availability zone index.
+
+        :param distributor: The SubnetDistributor.
+        """
+        return BytesPerSubnet({
+            **{f"public-{i}": cidr for i, cidr in enumerate(distributor.public_subnets)},
+            **{f"private-{i}": cidr for i, cidr in enumerate(distributor.private_subnets)},
+        })
+
+    @staticmethod
+    def from_plan(plan) -> 'BytesPerSubnet':
+        """
+        Constructs a BytesPerSubnet for the subnets of a VpcPlan, named by their resource names.
+
+        :param plan: The VpcPlan.
+        """
+        return BytesPerSubnet({subnet.resource_name: subnet.cidr_block
+                               for subnet in plan.public_subnets + plan.private_subnets + plan.isolated_subnets})
+
+    def subnet_of(self, address: str) -> Optional[str]:
+        """
+        Returns the name of the subnet containing an address, or None if no subnet contains it.
+
+        :param address: An IPv4 address.
+        """
+        try:
+            value = int.from_bytes(socket.inet_aton(address), "big")
+        except OSError:
+            return None
+        i = bisect_right(self._networks, value) - 1
+        if i >= 0 and value <= self._lasts[i]:
+            return self._names[i]
+        return None
+
+    def update(self, batch: FlowRecordBatch):
+        """
+        Adds a batch of records to the totals.
+
+        :param batch: A batch of records, as returned by `read_flow_log`.
+        """
+        cache, sent, received = self._cache, self.sent, self.received
+        for source, destination, byte_count in zip(batch.column("srcaddr"), batch.column("dstaddr"),
+                                                   batch.column("bytes")):
+            if byte_count <= 0:
+                continue
+            for address, totals in ((source, sent), (destination, received)):
+                try:
+                    subnet = cache[address]
+                except KeyError:
+                    if len(cache) >= self._CACHE_SIZE:
+                        cache.clear()
+                    subnet = cache[address] = self.subnet_of(address)
+                if subnet is not None:
+                    totals[subnet] += byte_count
@@ -6,8 +6,88 @@
 
 """
 Contains helper methods for building IAM policies.
+
+Policy documents are rendered as canonical JSON - with sorted keys, sorted and
+de-duplicated values and no whitespace - so that the same policy always
+produces the same string, and providers do not see a change where there is
+none.
 """
+import functools
 import json
+from typing import Iterable, Mapping, NamedTuple, Optional, Tuple, Union
+
+POLICY_VERSION = "2012-10-17"
+
+Values = Tuple[str, ...]
+
+
+class PolicyStatement(NamedTuple):
+    """
+    A statement of an IAM policy document, in canonical form. Statements should be constructed with
+    `policy_statement`. `principals` is either "*" or pairs of principal type and principals, and `conditions` pairs
+    of condition operator and pairs of condition key and values, each sorted.
+    """
+    effect: str
+    actions: Values
+    resources: Values
+    principals: Union[str, Tuple[Tuple[str, Values], ...]]
+    conditions: Tuple[Tuple[str, Tuple[Tuple[str, Values], ...]], ...]
+    sid: Optional[str]
+
+
+def policy_statement(actions: Union[str, Iterable[str]],
+                     resources: Union[str, Iterable[str]] = (),
+                     *,
+                     principals: Union[str, Mapping[str, Union[str, Iterable[str]]], None] = None,
+                     conditions: Optional[Mapping[str, Mapping[str, Union[str, Iterable[str]]]]] = None,
+                     effect: str = "Allow",
+                     sid: Optional[str] = None) -> PolicyStatement:
+    """
+    Creates a statement of an IAM policy document.
+
+    :param actions: The action or actions to which the statement applies, e.g. "sts:AssumeRole".
+    :param resources: The resource or resources to which the statement applies, e.g. "*". Omitted from the statement
+           if empty, as in trust policies.
+    :param principals: "*", or the principals to which the statement applies by principal type, e.g.
+           `{"Service": "vpc-flow-logs.amazonaws.com"}`.
+    :param conditions: The conditions under which the statement applies, by condition operator and condition key,
+           e.g. `{"StringEquals": {"aws:SourceAccount": "123456789012"}}`.
+    :param effect: "Allow" or "Deny".
+    :param sid: An optional identifier for the statement.
+    """
+    if effect not in ("Allow", "Deny"):
+        raise ValueError(f"effect must be 'Allow' or 'Deny', not {effect!r}")
+
+    canonical_actions = _canonical_values(actions)
+    if not canonical_actions:
+        raise ValueError("A policy statement must have at least one action")
+
+    if principals is None or principals == "*":
+        canonical_principals = principals or ()
+    else:
+        canonical_principals = tuple(sorted((principal_type, _canonical_values(values))
+                                            for principal_type, values in principals.items()))
+
+    canonical_conditions = tuple(sorted(
+        (operator, tuple(sorted((key, _canonical_values(values)) for key, values in keys.items())))
+        for operator, keys in (conditions or {}).items()))
+
+    return PolicyStatement(effect, canonical_actions, _canonical_values(resources), canonical_principals,
+                           canonical_conditions, sid)
+
+
+@functools.lru_cache(maxsize=256)
+def policy_document(*statements: PolicyStatement) -> str:
+    """
+    Renders a policy document containing the given statements, in order, as canonical JSON. Identical documents are
+    rendered once, and the same string returned thereafter.
+
+    :param statements: The statements of the policy, as created by `policy_statement`.
+    """
+    return json.dumps({
+        "Version": POLICY_VERSION,
+        "Statement": [_statement_json(statement) for statement in statements],
+    }, sort_keys=True, separators=(",", ":"))
 
 
 def assume_role_policy_for_principal(principal) -> str:
@@ -15,15 +95,36 @@ def assume_role_policy_for_principal(principal) -> str:
     Creates a policy allowing the given principal to call the sts:AssumeRole
     action.
 
-    :param any principal: The principal
+    :param any principal: The principal, e.g. `{"Service": "vpc-flow-logs.amazonaws.com"}`
     """
-    return json.dumps({
-        "Version": "2012-10-17",
-        "Statement": [
-            {
-                "Effect": "Allow",
-                "Principal": principal,
-                "Action": "sts:AssumeRole"
-            }
-        ]
-    })
+    return policy_document(policy_statement("sts:AssumeRole", principals=principal))
+
+
+def _canonical_values(values: Union[str, Iterable[str]]) -> Values:
+    if isinstance(values, str):
+        return (values,)
+    return tuple(sorted(set(values)))
+
+
+def _json_values(values: Values) -> Union[str, list]:
+    # A single value is rendered as a string rather than a list, as AWS returns it
+    return values[0] if len(values) == 1 else list(values)
+
+
+def _statement_json(statement: PolicyStatement) -> dict:
+    result = {
+        "Effect": statement.effect,
+        "Action": _json_values(statement.actions),
+    }
+    if statement.sid is not None:
+        result["Sid"] = statement.sid
+    if statement.resources:
+        result["Resource"] = _json_values(statement.resources)
+    if statement.principals == "*":
+        result["Principal"] = "*"
+    elif statement.principals:
+        result["Principal"] = {principal_type: _json_values(values) for principal_type, values in statement.principals}
+    if statement.conditions:
+        result["Condition"] = {operator: {key: _json_values(values) for key, values in keys}
+                               for operator, keys in statement.conditions}
+    return result
@@ -0,0 +1,152 @@
+# Copyright 2018-2019, James Nugent.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can obtain
+# one at http://mozilla.org/MPL/2.0/.
+
+"""
+Contains opt-in instrumentation of components, which records the time taken to
+plan them, register their child resources and run their methods. This module
+does not import Pulumi.
+"""
+import contextlib
+import logging
+import time
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class Span(NamedTuple):
+    """
+    A timed piece of work within a component. `kind` is one of:
+
+      - "component": the construction of the component
+      - "operation": work such as planning, or a method call
+      - "resource": the registration of a child resource, of type token `type` and parented to the resource named
+        `parent` (the component's name if it is parented to the component)
+
+    `depth` is the number of spans of the same component enclosing this one. Times are in seconds, and `start` is a
+    value of `time.perf_counter()`.
+    """
+    component: str
+    kind: str
+    name: str
+    type: Optional[str]
+    parent: Optional[str]
+    depth: int
+    start: float
+    duration: float
+
+
+class ComponentSummary(NamedTuple):
+    """
+    The work recorded for a single component. `elapsed` is the time spent constructing the component and running its
+    methods, `registration` the part of it spent registering child resources, and `operations` the time spent in
+    each named operation.
+    """
+    resource_count: int
+    elapsed: float
+    registration: float
+    operations: Dict[str, float]
+
+
+class Instrumentation:
+    """
+    Instrumentation records a `Span` for each piece of work done by the components it is given to, such as a `Vpc`
+    via `VpcArgs.instrumentation`. Spans are kept in `spans`, and can also be passed to a callback as they finish - for
+    example to forward them to a tracing system - or logged.
+
+    Components given no instrumentation do no timing or recording at all.
+    """
+
+    def __init__(self,
+                 on_span: Optional[Callable[[Span], Any]] = None,
+                 logger: Optional[logging.Logger] = None,
+                 level: int = logging.DEBUG):
+        """
+        Constructs an Instrumentation.
+
+        :param on_span: A function called with each span as it finishes.
+        :param logger: A logger to which each span is logged as it finishes.
+        :param level: The level at which spans are logged.
+        """
+        self.on_span = on_span
+        self.logger = logger
+        self.level = level
+        self.spans: List[Span] = []
+        self.__depths: Dict[str, int] = {}
+        self.__names: Dict[int, str] = {}
+
+    @contextlib.contextmanager
+    def span(self, component: str, kind: str, name: str) -> Iterator[None]:
+        """
+        Returns a context manager which records a span for the work done within it.
+
+        :param component: The name of the component doing the work.
+        :param kind: The kind of work, e.g. "operation".
+        :param name: The name of the work, e.g. "plan".
+        """
+        depth = self.__enter(component)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.__finish(Span(component, kind, name, None, None, depth, start, time.perf_counter() - start))
+
+    def register(self, component: str, factory: Callable[..., T], resource_name: str, **kwargs) -> T:
+        """
+        Registers a child resource of a component by calling `factory(resource_name, **kwargs)`, recording a span for
+        it.
+
+        :param component: The name of the component registering the resource.
+        :param factory: The resource class, e.g. `ec2.Subnet`.
+        :param resource_name: The Pulumi resource name.
+        :param kwargs: The arguments of the resource, including `opts`.
+        """
+        opts = kwargs.get("opts")
+        parent = getattr(opts, "parent", None)
+
+        depth = self.__enter(component)
+        start = time.perf_counter()
+        try:
+            resource = factory(resource_name, **kwargs)
+        finally:
+            duration = time.perf_counter() - start
+            self.__depths[component] = depth
+
+        self.__names[id(resource)] = resource_name
+        resource_type = getattr(resource, "pulumi_resource_type", None) or \
+            f"{factory.__module__}.{factory.__qualname__}"
+        self.__finish(Span(component, "resource", resource_name, resource_type, self.__names.get(id(parent), component),
+                           depth, start, duration))
+        return resource
+
+    def summary(self) -> Dict[str, ComponentSummary]:
+        """
+        Returns a summary of the spans recorded for each component, by component name.
+        """
+        summaries: Dict[str, ComponentSummary] = {}
+        for span in self.spans:
+            summary = summaries.setdefault(span.component, ComponentSummary(0, 0.0, 0.0, {}))
+            if span.kind == "operation":
+                summary.operations[span.name] = summary.operations.get(span.name, 0.0) + span.duration
+            summaries[span.component] = summary._replace(
+                resource_count=summary.resource_count + (span.kind == "resource"),
+                elapsed=summary.elapsed + (span.duration if span.depth == 0 else 0.0),
+                registration=summary.registration + (span.duration if span.kind == "resource" else 0.0))
+        return summaries
+
+    def __enter(self, component: str) -> int:
+        depth = self.__depths.get(component, 0)
+        self.__depths[component] = depth + 1
+        return depth
+
+    def __finish(self, span: Span):
+        self.__depths[span.component] = span.depth
+        self.spans.append(span)
+        if self.logger is not None:
+            self.logger.log(self.level, "%s %s %s took %.3fms", span.component, span.kind, span.name,
+                            span.duration * 1000)
+        if self.on_span is not None:
+            self.on_span(span)
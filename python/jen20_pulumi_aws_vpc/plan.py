@@ -0,0 +1,615 @@
+# Copyright 2018-2019, James Nugent.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can obtain
+# one at http://mozilla.org/MPL/2.0/.
+
+"""
+Contains the planning stage of the Vpc component: an immutable description of
+every resource a Vpc will register, computed without a Pulumi engine.
+"""
+import functools
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from .cidr import CidrBlock
+from .subnet_layout import SubnetLayout, SubnetRouting, SubnetTier
+from .vpc_args import NatStrategy, VpcArgs
+
+Tags = Tuple[Tuple[str, str], ...]
+Properties = Tuple[Tuple[str, object], ...]
+
+
+class SubnetPlan(NamedTuple):
+    """
+    A planned subnet. Dual-stack subnets are assigned the /64 numbered
+    `ipv6_subnet_number` from the IPv6 block of the VPC.
+    """
+    resource_name: str
+    name_tag: str
+    cidr_block: str
+    availability_zone_index: int
+    map_public_ip_on_launch: bool
+    ipv6_subnet_number: Optional[int] = None
+
+
+class NatGatewayPlan(NamedTuple):
+    """
+    A planned NAT gateway, and the Elastic IP address allocated to it.
+    """
+    eip_resource_name: str
+    eip_name_tag: str
+    resource_name: str
+    name_tag: str
+    public_subnet_index: int
+    parent: str
+
+
+class RouteTablePlan(NamedTuple):
+    """
+    A planned route table, its default route and its subnet associations. The
+    default route of the public route table targets the internet gateway, and
+    that of a private route table targets the NAT gateway at `nat_gateway_index`.
+    Private route tables have no default route if `nat_gateway_index` is None.
+    In a dual-stack VPC, the IPv6 default route of the public route table
+    targets the internet gateway, and that of a private route table targets the
+    egress-only internet gateway.
+    """
+    resource_name: str
+    name_tag: str
+    parent: str
+    default_route_name: Optional[str]
+    nat_gateway_index: Optional[int]
+    associations: Tuple[Tuple[str, int], ...]
+    ipv6_default_route_name: Optional[str] = None
+
+
+class EndpointPlan(NamedTuple):
+    """
+    A planned gateway VPC endpoint, which is routed from every route table.
+    """
+    resource_name: str
+    service_name: str
+
+
+class InterfaceEndpointPlan(NamedTuple):
+    """
+    A planned interface VPC endpoint, with private DNS enabled, placed in the
+    private subnets at `subnet_indices` (one per availability zone) and
+    protected by the shared interface endpoint security group.
+    """
+    resource_name: str
+    name_tag: str
+    service_name: str
+    subnet_indices: Tuple[int, ...]
+
+
+class SecurityGroupPlan(NamedTuple):
+    """
+    A planned security group admitting HTTPS traffic from the VPC, over IPv6 as
+    well as IPv4 in a dual-stack VPC.
+    """
+    resource_name: str
+    name_tag: str
+    description: str
+
+
+class NatGatewayAlarmPlan(NamedTuple):
+    """
+    A planned CloudWatch alarm on a NAT gateway. `metric` is one of
+    "ErrorPortAllocation", "PacketsDropCount" (alarming on the percentage of
+    packets dropped) or "Bandwidth" (alarming on throughput in Gbps).
+    """
+    resource_name: str
+    name_tag: str
+    nat_gateway_index: int
+    metric: str
+    threshold: float
+
+
+class PlannedResource(NamedTuple):
+    """
+    A single resource in a flattened VpcPlan. The parent is the resource name of
+    the parent resource, or None for resources parented to the component.
+    """
+    type: str
+    name: str
+    parent: Optional[str]
+    properties: Properties
+
+
+class PlanChange(NamedTuple):
+    """
+    A difference between two VpcPlans for a single resource. `action` is one of
+    "create", "delete", "update" or "replace", and `properties` names the
+    properties which differ.
+    """
+    name: str
+    type: str
+    action: str
+    properties: Tuple[str, ...]
+
+
+# The properties of each type of resource which cannot be changed in place. A
+# change to any of them, or to the parent of a resource (which changes its URN),
+# replaces the resource.
+_REPLACEMENT_PROPERTIES = {
+    "aws:ec2/vpc:Vpc": frozenset({"cidr_block"}),
+    "aws:ec2/subnet:Subnet": frozenset({"availability_zone_index", "cidr_block"}),
+    "aws:ec2/natGateway:NatGateway": frozenset({"allocation", "subnet"}),
+    "aws:ec2/route:Route": frozenset({"destination_cidr_block", "destination_ipv6_cidr_block"}),
+    "aws:ec2/routeTableAssociation:RouteTableAssociation": frozenset({"subnet"}),
+    "aws:ec2/vpcEndpoint:VpcEndpoint": frozenset({"service_name"}),
+    "aws:ec2/securityGroup:SecurityGroup": frozenset({"description"}),
+}
+
+
+class VpcPlan(NamedTuple):
+    """
+    A VpcPlan holds every addressing, naming, tagging and topology decision made
+    when constructing a `Vpc`. Plans are tuple-backed, immutable and hashable:
+    they can be cached, compared, and diffed with `VpcPlan.diff` to find the
+    resources which a change would re-address or replace.
+    """
+    name: str
+    base_tags: Tags
+    cidr_block: str
+    vpc_resource_name: str
+    vpc_name_tag: str
+    internet_gateway_resource_name: str
+    internet_gateway_name_tag: str
+    public_subnets: Tuple[SubnetPlan, ...]
+    private_subnets: Tuple[SubnetPlan, ...]
+    public_route_table: RouteTablePlan
+    private_route_tables: Tuple[RouteTablePlan, ...]
+    nat_gateways: Tuple[NatGatewayPlan, ...]
+    endpoints: Tuple[EndpointPlan, ...]
+    nat_gateway_alarms: Tuple[NatGatewayAlarmPlan, ...] = ()
+    interface_endpoints: Tuple[InterfaceEndpointPlan, ...] = ()
+    interface_endpoint_security_group: Optional[SecurityGroupPlan] = None
+    isolated_subnets: Tuple[SubnetPlan, ...] = ()
+    isolated_route_tables: Tuple[RouteTablePlan, ...] = ()
+    enable_ipv6: bool = False
+    egress_only_internet_gateway_resource_name: Optional[str] = None
+    egress_only_internet_gateway_name_tag: Optional[str] = None
+
+    @staticmethod
+    def from_args(name: str, args: VpcArgs, region: Optional[str]) -> 'VpcPlan':
+        """
+        Plans a Vpc. Plans are memoized, so planning many identical VPCs is cheap.
+
+        :param name: The Pulumi resource name of the Vpc.
+        :param args: A VpcArgs object.
+        :param region: The AWS region in which the Vpc will be created, used to name endpoint services.
+        """
+        return _build_plan(_PlanKey(name,
+                                    args.description,
+                                    tuple(sorted(args.base_tags.items())),
+                                    args.base_cidr,
+                                    args.availability_zone_count,
+                                    region,
+                                    args.create_s3_endpoint,
+                                    args.create_dynamodb_endpoint,
+                                    args.nat_strategy,
+                                    args.azs_per_nat_gateway,
+                                    args.nat_gateways_per_az,
+                                    args.nat_gateway_alarms,
+                                    args.nat_gateway_bandwidth_alarm_gbps,
+                                    args.interface_endpoints,
+                                    args.subnet_tiers,
+                                    args.enable_ipv6))
+
+    def tags(self, name_tag: str) -> Dict[str, str]:
+        """
+        Returns the tags for a resource: the base tags, plus the given Name tag.
+
+        :param name_tag: The value of the Name tag.
+        """
+        return {**dict(self.base_tags), "Name": name_tag}
+
+    def resources(self) -> Iterator[PlannedResource]:
+        """
+        Returns every resource in the plan, flattened for comparison.
+        """
+        vpc = self.vpc_resource_name
+        # IPv6 properties are only present in dual-stack plans, so enabling IPv6 updates existing resources
+        yield PlannedResource("aws:ec2/vpc:Vpc", vpc, None, (
+            ("cidr_block", self.cidr_block),
+            *((("assign_generated_ipv6_cidr_block", True),) if self.enable_ipv6 else ()),
+            ("tags", self.tags(self.vpc_name_tag)),
+        ))
+        yield PlannedResource("aws:ec2/internetGateway:InternetGateway", self.internet_gateway_resource_name, vpc, (
+            ("tags", self.tags(self.internet_gateway_name_tag)),
+        ))
+        if self.egress_only_internet_gateway_resource_name is not None:
+            yield PlannedResource("aws:ec2/egressOnlyInternetGateway:EgressOnlyInternetGateway",
+                                  self.egress_only_internet_gateway_resource_name, vpc, (
+                                      ("tags", self.tags(self.egress_only_internet_gateway_name_tag)),
+                                  ))
+
+        for subnet in self.public_subnets + self.private_subnets + self.isolated_subnets:
+            ipv6 = () if subnet.ipv6_subnet_number is None else (("ipv6_subnet_number", subnet.ipv6_subnet_number),)
+            yield PlannedResource("aws:ec2/subnet:Subnet", subnet.resource_name, vpc, (
+                ("availability_zone_index", subnet.availability_zone_index),
+                ("cidr_block", subnet.cidr_block),
+                *ipv6,
+                ("map_public_ip_on_launch", subnet.map_public_ip_on_launch),
+                ("tags", self.tags(subnet.name_tag)),
+            ))
+
+        for nat_gateway in self.nat_gateways:
+            yield PlannedResource("aws:ec2/eip:Eip", nat_gateway.eip_resource_name, nat_gateway.parent, (
+                ("tags", self.tags(nat_gateway.eip_name_tag)),
+            ))
+            yield PlannedResource("aws:ec2/natGateway:NatGateway", nat_gateway.resource_name, nat_gateway.parent, (
+                ("allocation", nat_gateway.eip_resource_name),
+                ("subnet", self.public_subnets[nat_gateway.public_subnet_index].resource_name),
+                ("tags", self.tags(nat_gateway.name_tag)),
+            ))
+
+        route_tables = (self.public_route_table,) + self.private_route_tables + self.isolated_route_tables
+        for route_table in route_tables:
+            yield from self._route_table_resources(route_table)
+
+        for endpoint in self.endpoints:
+            yield PlannedResource("aws:ec2/vpcEndpoint:VpcEndpoint", endpoint.resource_name, vpc, (
+                ("route_tables", tuple(route_table.resource_name for route_table in route_tables)),
+                ("service_name", endpoint.service_name),
+            ))
+
+        security_group = self.interface_endpoint_security_group
+        if security_group is not None:
+            yield PlannedResource("aws:ec2/securityGroup:SecurityGroup", security_group.resource_name, vpc, (
+                ("description", security_group.description),
+                ("ingress_cidr_block", self.cidr_block),
+                *((("ingress_ipv6", True),) if self.enable_ipv6 else ()),
+                ("tags", self.tags(security_group.name_tag)),
+            ))
+        for endpoint in self.interface_endpoints:
+            yield PlannedResource("aws:ec2/vpcEndpoint:VpcEndpoint", endpoint.resource_name, vpc, (
+                ("security_group", security_group.resource_name),
+                ("service_name", endpoint.service_name),
+                ("subnets", tuple(self.private_subnets[i].resource_name for i in endpoint.subnet_indices)),
+                ("tags", self.tags(endpoint.name_tag)),
+            ))
+
+        for alarm in self.nat_gateway_alarms:
+            nat_gateway = self.nat_gateways[alarm.nat_gateway_index].resource_name
+            yield PlannedResource("aws:cloudwatch/metricAlarm:MetricAlarm", alarm.resource_name, nat_gateway, (
+                ("metric", alarm.metric),
+                ("nat_gateway", nat_gateway),
+                ("tags", self.tags(alarm.name_tag)),
+                ("threshold", alarm.threshold),
+            ))
+
+    def _route_table_resources(self, route_table: RouteTablePlan) -> Iterator[PlannedResource]:
+        if route_table is self.public_route_table:
+            route_table_type = "aws:ec2/defaultRouteTable:DefaultRouteTable"
+            target = self.internet_gateway_resource_name
+            ipv6_target = self.internet_gateway_resource_name
+            subnets = self.public_subnets
+        elif route_table in self.isolated_route_tables:
+            route_table_type = "aws:ec2/routeTable:RouteTable"
+            target, ipv6_target = None, None
+            subnets = self.isolated_subnets
+        else:
+            route_table_type = "aws:ec2/routeTable:RouteTable"
+            target = None
+            if route_table.nat_gateway_index is not None:
+                target = self.nat_gateways[route_table.nat_gateway_index].resource_name
+            ipv6_target = self.egress_only_internet_gateway_resource_name
+            subnets = self.private_subnets
+
+        yield PlannedResource(route_table_type, route_table.resource_name, route_table.parent, (
+            ("tags", self.tags(route_table.name_tag)),
+        ))
+        if target is not None:
+            yield PlannedResource("aws:ec2/route:Route", route_table.default_route_name,
+                                  route_table.resource_name, (
+                                      ("destination_cidr_block", "0.0.0.0/0"),
+                                      ("target", target),
+                                  ))
+        if route_table.ipv6_default_route_name is not None:
+            yield PlannedResource("aws:ec2/route:Route", route_table.ipv6_default_route_name,
+                                  route_table.resource_name, (
+                                      ("destination_ipv6_cidr_block", "::/0"),
+                                      ("target", ipv6_target),
+                                  ))
+        for association_name, subnet_index in route_table.associations:
+            yield PlannedResource("aws:ec2/routeTableAssociation:RouteTableAssociation", association_name,
+                                  route_table.resource_name, (
+                                      ("route_table", route_table.resource_name),
+                                      ("subnet", subnets[subnet_index].resource_name),
+                                  ))
+
+    def diff(self, other: 'VpcPlan') -> List[PlanChange]:
+        """
+        Returns the changes required to move from this plan to `other`, ordered by resource name.
+
+        :param other: The new plan.
+        """
+        before = {resource.name: resource for resource in self.resources()}
+        after = {resource.name: resource for resource in other.resources()}
+
+        changes = []
+        for name in sorted(before.keys() | after.keys()):
+            old, new = before.get(name), after.get(name)
+            if new is None:
+                changes.append(PlanChange(name, old.type, "delete", ()))
+            elif old is None:
+                changes.append(PlanChange(name, new.type, "create", ()))
+            elif old.type != new.type:
+                changes.append(PlanChange(name, new.type, "replace", ("type",)))
+            else:
+                old_properties, new_properties = dict(old.properties), dict(new.properties)
+                changed = tuple(sorted(key for key in old_properties.keys() | new_properties.keys()
+                                       if old_properties.get(key) != new_properties.get(key)))
+                if old.parent != new.parent:
+                    changed = tuple(sorted(changed + ("parent",)))
+                if changed:
+                    replacement_properties = _REPLACEMENT_PROPERTIES.get(new.type, frozenset())
+                    replaced = old.parent != new.parent or any(key in replacement_properties for key in changed)
+                    changes.append(PlanChange(name, new.type, "replace" if replaced else "update", changed))
+        return changes
+
+
+class _PlanKey(NamedTuple):
+    # The arguments on which a VpcPlan depends, which key the plan cache
+    name: str
+    description: str
+    base_tags: Tags
+    base_cidr: str
+    az_count: int
+    region: Optional[str]
+    create_s3_endpoint: bool
+    create_dynamodb_endpoint: bool
+    nat_strategy: str
+    azs_per_nat_gateway: int
+    nat_gateways_per_az: int
+    nat_gateway_alarms: bool
+    nat_gateway_bandwidth_alarm_gbps: float
+    interface_endpoints: Tuple[str, ...]
+    subnet_tiers: Tuple[SubnetTier, ...]
+    enable_ipv6: bool
+
+    @property
+    def subnets_per_az(self) -> int:
+        """
+        The number of subnets of each private tier in each availability zone. With
+        several NAT gateways per zone, each private subnet is split so that each
+        part can route through its own NAT gateway.
+        """
+        return self.nat_gateways_per_az if self.nat_strategy == NatStrategy.PER_AZ else 1
+
+    def tiers(self, routing: str) -> List[SubnetTier]:
+        """
+        Returns the subnet tiers with the given routing, in order.
+        """
+        return [tier for tier in self.subnet_tiers if tier.routing == routing]
+
+
+@functools.lru_cache(maxsize=1024)
+def _build_plan(key: _PlanKey) -> VpcPlan:
+    name, description = key.name, key.description
+    layout = SubnetLayout(key.base_cidr, key.az_count, key.subnet_tiers)
+    public_subnets = _plan_subnets(key, layout, SubnetRouting.PUBLIC)
+    private_subnets = _plan_subnets(key, layout, SubnetRouting.PRIVATE)
+    isolated_subnets = _plan_subnets(key, layout, SubnetRouting.ISOLATED)
+    if key.enable_ipv6:
+        _check_ipv6_subnet_numbers(public_subnets + private_subnets + isolated_subnets)
+
+    nat_gateways, private_route_tables = _plan_nat_gateways(key, private_subnets)
+    security_group, interface_endpoints = _plan_interface_endpoints(key)
+
+    plan = VpcPlan(name=name,
+                   base_tags=key.base_tags,
+                   cidr_block=key.base_cidr,
+                   vpc_resource_name=f"{name}-vpc",
+                   vpc_name_tag=f"{description} VPC",
+                   internet_gateway_resource_name=f"{name}-igw",
+                   internet_gateway_name_tag=f"{description} VPC Internet Gateway",
+                   public_subnets=public_subnets,
+                   private_subnets=private_subnets,
+                   public_route_table=_plan_public_route_table(key),
+                   private_route_tables=private_route_tables,
+                   nat_gateways=nat_gateways,
+                   endpoints=_plan_gateway_endpoints(key),
+                   nat_gateway_alarms=_plan_nat_gateway_alarms(key, nat_gateways),
+                   interface_endpoints=interface_endpoints,
+                   interface_endpoint_security_group=security_group,
+                   isolated_subnets=isolated_subnets,
+                   isolated_route_tables=_plan_isolated_route_tables(key),
+                   enable_ipv6=key.enable_ipv6,
+                   egress_only_internet_gateway_resource_name=f"{name}-eigw" if key.enable_ipv6 else None,
+                   egress_only_internet_gateway_name_tag=(f"{description} VPC Egress-Only Internet Gateway"
+                                                          if key.enable_ipv6 else None))
+    _check_resource_names(plan)
+    return plan
+
+
+def _plan_subnets(key: _PlanKey, layout: SubnetLayout, routing: str) -> Tuple[SubnetPlan, ...]:
+    def ipv6_subnet_number(block: CidrBlock) -> Optional[int]:
+        return layout.ipv6_subnet_number(block) if key.enable_ipv6 else None
+
+    subnets = []
+    split_bits = (key.subnets_per_az - 1).bit_length()
+    for tier in key.tiers(routing):
+        title = _tier_title(tier.name)
+        for i, block in enumerate(layout.blocks[tier.name]):
+            if routing == SubnetRouting.PRIVATE and key.subnets_per_az > 1:
+                subnets.extend(SubnetPlan(f"{key.name}-{tier.name}-subnet-{i}-{j}",
+                                          f"{key.description} {title} Subnet {i}-{j}",
+                                          str(block.subnet(split_bits, j)),
+                                          i,
+                                          False,
+                                          ipv6_subnet_number(block.subnet(split_bits, j)))
+                               for j in range(key.subnets_per_az))
+            else:
+                subnets.append(SubnetPlan(f"{key.name}-{tier.name}-subnet-{i}",
+                                          f"{key.description} {title} Subnet {i}",
+                                          str(block),
+                                          i,
+                                          routing == SubnetRouting.PUBLIC,
+                                          ipv6_subnet_number(block)))
+    return tuple(subnets)
+
+
+def _check_ipv6_subnet_numbers(subnets: Tuple[SubnetPlan, ...]):
+    # Each zone has an equal share of the 256 /64s in the VPC's IPv6 block, so small subnets which start close
+    # together within a zone can be assigned the same /64
+    numbered: Dict[int, SubnetPlan] = {}
+    for subnet in subnets:
+        other = numbered.setdefault(subnet.ipv6_subnet_number, subnet)
+        if other is not subnet:
+            raise ValueError(f"Subnets {other.cidr_block} and {subnet.cidr_block} are too close together to be "
+                             f"assigned different IPv6 /64 blocks")
+
+
+def _tier_associations(key: _PlanKey, routing: str, members: List[Tuple[str, int]]) -> Tuple[Tuple[str, int], ...]:
+    # Associates the subnets at each (suffix, position) of every tier with the given routing
+    per_tier = key.az_count * (key.subnets_per_az if routing == SubnetRouting.PRIVATE else 1)
+    return tuple((f"{key.name}-{tier.name}-rta-{suffix}", k * per_tier + position)
+                 for k, tier in enumerate(key.tiers(routing))
+                 for suffix, position in members)
+
+
+def _plan_public_route_table(key: _PlanKey) -> RouteTablePlan:
+    return RouteTablePlan(f"{key.name}-public-rt",
+                          f"{key.description} Public Route Table",
+                          f"{key.name}-vpc",
+                          f"{key.name}-route-public-sn-to-ig",
+                          None,
+                          _tier_associations(key, SubnetRouting.PUBLIC, [(f"{i + 1}", i) for i in range(key.az_count)]),
+                          ipv6_default_route_name=f"{key.name}-route-public-sn-to-ig-ipv6" if key.enable_ipv6 else None)
+
+
+def _plan_nat_gateways(key: _PlanKey, private_subnets: Tuple[SubnetPlan, ...]) \
+        -> Tuple[Tuple[NatGatewayPlan, ...], Tuple[RouteTablePlan, ...]]:
+    # Each group of private subnets shares a NAT gateway and route table. A
+    # group is given by its suffix, and the suffix and position within each
+    # private tier of its subnets.
+    name, description = key.name, key.description
+    if key.subnets_per_az > 1:
+        groups = [(f"{i + 1}-{j + 1}", [(f"{i + 1}-{j + 1}", i * key.subnets_per_az + j)])
+                  for i in range(key.az_count) for j in range(key.subnets_per_az)]
+    else:
+        group_size = max(_nat_group_size(key.nat_strategy, key.azs_per_nat_gateway, key.az_count), 1)
+        groups = [(f"{k + 1}", [(f"{i + 1}", i) for i in range(first, min(first + group_size, key.az_count))])
+                  for k, first in enumerate(range(0, key.az_count, group_size))]
+
+    # The NAT gateway and route table of each group are parented to its first private subnet.
+    nat_gateways = []
+    route_tables = []
+    for suffix, members in groups:
+        subnet = private_subnets[members[0][1]]
+
+        nat_gateway_index, default_route_name = None, None
+        if key.nat_strategy != NatStrategy.NONE:
+            nat_gateway_index, default_route_name = len(nat_gateways), f"{name}-route-private-sn-to-nat-{suffix}"
+            nat_gateways.append(NatGatewayPlan(f"{name}-nat-{suffix}",
+                                               f"{description} NAT Gateway EIP {suffix}",
+                                               f"{name}-nat-gateway-{suffix}",
+                                               f"{description} NAT Gateway {suffix}",
+                                               subnet.availability_zone_index,
+                                               subnet.resource_name))
+
+        route_tables.append(RouteTablePlan(f"{name}-private-rt-{suffix}",
+                                           f"{description} Private RT {suffix}",
+                                           subnet.resource_name,
+                                           default_route_name,
+                                           nat_gateway_index,
+                                           _tier_associations(key, SubnetRouting.PRIVATE, members),
+                                           ipv6_default_route_name=(f"{name}-route-private-sn-to-eigw-{suffix}"
+                                                                    if key.enable_ipv6 else None)))
+    return tuple(nat_gateways), tuple(route_tables)
+
+
+def _plan_isolated_route_tables(key: _PlanKey) -> Tuple[RouteTablePlan, ...]:
+    # Subnets of each isolated tier share a route table with no route to the internet
+    return tuple(RouteTablePlan(f"{key.name}-{tier.name}-rt",
+                                f"{key.description} {_tier_title(tier.name)} Route Table",
+                                f"{key.name}-vpc",
+                                None,
+                                None,
+                                tuple((f"{key.name}-{tier.name}-rta-{i + 1}", k * key.az_count + i)
+                                      for i in range(key.az_count)))
+                 for k, tier in enumerate(key.tiers(SubnetRouting.ISOLATED)))
+
+
+def _plan_nat_gateway_alarms(key: _PlanKey, nat_gateways: Tuple[NatGatewayPlan, ...]) \
+        -> Tuple[NatGatewayAlarmPlan, ...]:
+    if not key.nat_gateway_alarms:
+        return ()
+    return tuple(NatGatewayAlarmPlan(f"{nat_gateway.resource_name}-{alarm_name}-alarm",
+                                     f"{nat_gateway.name_tag} {metric} Alarm",
+                                     i,
+                                     metric,
+                                     threshold)
+                 for i, nat_gateway in enumerate(nat_gateways)
+                 for metric, alarm_name, threshold in (("ErrorPortAllocation", "port-allocation", 0.0),
+                                                       ("PacketsDropCount", "packet-drop", 0.01),
+                                                       ("Bandwidth", "bandwidth",
+                                                        key.nat_gateway_bandwidth_alarm_gbps)))
+
+
+def _plan_gateway_endpoints(key: _PlanKey) -> Tuple[EndpointPlan, ...]:
+    endpoints = []
+    if key.create_s3_endpoint:
+        endpoints.append(EndpointPlan(f"{key.name}-s3-endpoint", f"com.amazonaws.{key.region}.s3"))
+    if key.create_dynamodb_endpoint:
+        endpoints.append(EndpointPlan(f"{key.name}-dynamodb-endpoint", f"com.amazonaws.{key.region}.dynamodb"))
+    return tuple(endpoints)
+
+
+def _plan_interface_endpoints(key: _PlanKey) \
+        -> Tuple[Optional[SecurityGroupPlan], Tuple[InterfaceEndpointPlan, ...]]:
+    if not key.interface_endpoints:
+        return None, ()
+
+    security_group = SecurityGroupPlan(f"{key.name}-endpoints-sg",
+                                       f"{key.description} Interface Endpoints",
+                                       f"HTTPS access to {key.description} VPC interface endpoints")
+
+    # Interface endpoints can have only one subnet in each availability zone,
+    # so they are placed in the first private subnet of each.
+    subnet_indices = tuple(range(0, key.az_count * key.subnets_per_az, key.subnets_per_az))
+    endpoints = []
+    for service in key.interface_endpoints:
+        service_name = _interface_endpoint_service_name(service, key.region)
+        short_name = service_name.rsplit(f"{key.region}.", 1)[-1]
+        endpoints.append(InterfaceEndpointPlan(f"{key.name}-{short_name.replace('.', '-')}-interface-endpoint",
+                                               f"{key.description} {short_name} Endpoint",
+                                               service_name,
+                                               subnet_indices))
+    return security_group, tuple(endpoints)
+
+
+def _check_resource_names(plan: VpcPlan):
+    # Resource names derived from tier names can collide with those of the
+    # fixed resources, e.g. the route table of an isolated tier named "public"
+    # with the public route table. Names identify resources both in the stack
+    # and in VpcPlan.diff, so they must be unique.
+    seen = set()
+    for resource in plan.resources():
+        if resource.name in seen:
+            raise ValueError(f"Resource name {resource.name!r} would be used by more than one resource; rename the "
+                             f"subnet tiers so that their resources have distinct names")
+        seen.add(resource.name)
+
+
+def _tier_title(tier_name: str) -> str:
+    return tier_name.replace("-", " ").replace("_", " ").title()
+
+
+def _nat_group_size(nat_strategy: str, azs_per_nat_gateway: int, az_count: int) -> int:
+    if nat_strategy == NatStrategy.PER_AZ:
+        return 1
+    if nat_strategy == NatStrategy.PER_N_AZS:
+        return azs_per_nat_gateway
+    return az_count
+
+
+def _interface_endpoint_service_name(service: str, region: Optional[str]) -> str:
+    # Services may be given by their full name, or by the part following the region
+    if service.startswith("com.amazonaws.") or service.startswith("aws."):
+        return service
+    return f"com.amazonaws.{region}.{service}"
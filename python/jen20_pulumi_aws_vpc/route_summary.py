@@ -0,0 +1,115 @@
+# Copyright 2018-2019, James Nugent.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can obtain
+# one at http://mozilla.org/MPL/2.0/.
+
+"""
+Contains route summarisation: computing the fewest CIDR blocks which route to a
+set of peer blocks without capturing local or excluded addresses.
+"""
+from bisect import bisect_right
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .cidr import CidrBlock
+
+# An inclusive range of addresses, as integers
+Interval = Tuple[int, int]
+
+
+def summarise_routes(peers: Iterable[str],
+                     local: Iterable[str] = (),
+                     excluded: Iterable[str] = (),
+                     within: Optional[Iterable[str]] = None) -> List[str]:
+    """
+    Returns the fewest CIDR blocks which together cover every peer block and
+    overlap no local or excluded block, in address order (IPv4 before IPv6).
+
+    Without `within`, the summary covers exactly the peer blocks, merging nested
+    and adjacent blocks. With `within`, the summary may also cover addresses in
+    those blocks which are not local or excluded, so that peers allocated
+    sparsely from a supernet are reached by a handful of routes.
+
+    :param peers: The CIDR blocks to route to, e.g. the `base_cidr` of each peered VPC.
+    :param local: The CIDR blocks of the VPC itself, which must not be routed elsewhere.
+    :param excluded: Other CIDR blocks which must not be covered, e.g. ranges reached through a different gateway.
+    :param within: CIDR blocks whose unused addresses may be covered, e.g. the supernet from which peers are allocated.
+    """
+    peer_blocks = _by_version(peers)
+    forbidden_blocks = _by_version(local)
+    for version, blocks in _by_version(excluded).items():
+        forbidden_blocks.setdefault(version, []).extend(blocks)
+    within_blocks = _by_version(within or ())
+
+    summary: List[str] = []
+    for version in sorted(peer_blocks):
+        max_prefix_length = peer_blocks[version][0].max_prefix_length
+        forbidden = _merge(forbidden_blocks.get(version, ()))
+        forbidden_starts = [start for start, _ in forbidden]
+        for block in peer_blocks[version]:
+            i = bisect_right(forbidden_starts, block.last) - 1
+            if i >= 0 and forbidden[i][1] >= block.network:
+                raise ValueError(f"Peer block {block} overlaps a local or excluded block")
+
+        peer_intervals = _merge(peer_blocks[version])
+        allowed = _subtract(_merge(peer_blocks[version] + within_blocks.get(version, [])), forbidden)
+
+        # The largest blocks within the allowed ranges are disjoint, and any
+        # block covering part of a peer lies within one of them, so choosing
+        # those which contain peer addresses gives the fewest blocks.
+        i = 0
+        for start, end in allowed:
+            for network, prefix_length in _interval_blocks(start, end, max_prefix_length):
+                last = network + (1 << (max_prefix_length - prefix_length)) - 1
+                while i < len(peer_intervals) and peer_intervals[i][1] < network:
+                    i += 1
+                if i < len(peer_intervals) and peer_intervals[i][0] <= last:
+                    summary.append(str(CidrBlock(network, prefix_length, version)))
+    return summary
+
+
+def _by_version(cidrs: Iterable[str]) -> Dict[int, List[CidrBlock]]:
+    blocks: Dict[int, List[CidrBlock]] = {}
+    for cidr in cidrs:
+        block = CidrBlock.parse(cidr)
+        blocks.setdefault(block.version, []).append(block)
+    return blocks
+
+
+def _merge(blocks: Iterable[CidrBlock]) -> List[Interval]:
+    # Returns the addresses covered by the blocks as sorted, disjoint and non-adjacent intervals
+    merged: List[Interval] = []
+    for start, end in sorted((block.network, block.last) for block in blocks):
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _subtract(intervals: List[Interval], removed: List[Interval]) -> List[Interval]:
+    result: List[Interval] = []
+    j = 0
+    for start, end in intervals:
+        while j < len(removed) and removed[j][1] < start:
+            j += 1
+        k = j
+        while start <= end and k < len(removed) and removed[k][0] <= end:
+            if removed[k][0] > start:
+                result.append((start, removed[k][0] - 1))
+            start = max(start, removed[k][1] + 1)
+            k += 1
+        if start <= end:
+            result.append((start, end))
+    return result
+
+
+def _interval_blocks(start: int, end: int, max_prefix_length: int) -> Iterator[Tuple[int, int]]:
+    # Yields the largest aligned blocks covering an interval, as (network, prefix length)
+    while start <= end:
+        size_bits = (end - start + 1).bit_length() - 1
+        if start:
+            size_bits = min(size_bits, (start & -start).bit_length() - 1)
+        yield start, max_prefix_length - size_bits
+        start += 1 << size_bits
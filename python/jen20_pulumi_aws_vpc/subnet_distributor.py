@@ -7,8 +7,9 @@
 """
 Contains utilities calculate appropriate CIDR address spaces from a base address
 """
-import ipaddress
-import math
+from typing import List
+
+from .subnet_layout import DEFAULT_TIERS, SubnetLayout, ipv6_subnet
 
 
 class SubnetDistributor:
@@ -17,27 +18,38 @@ class SubnetDistributor:
     per AWS availability zone - and then divides each chunk such that half of it
     is allocated to private addresses, one-quarter is allocated to public
     addresses, and the remaining quarter is left spare for future use.
-    """
-
-    @staticmethod
-    def __next_power_of_2(number: int) -> int:
-        return 1 << (number - 1).bit_length()
 
-    @staticmethod
-    def __cidr_subnet(base_address: str, prefix_extension: int, subnet_number: int) -> str:
-        return str(list(ipaddress.ip_network(base_address).subnets(prefix_extension))[subnet_number])
+    This is the layout given by `SubnetLayout` with the default tiers. All
+    calculations are performed on integer `CidrBlock`s, so the cost of a layout
+    does not depend on the size of the base block; strings are only produced
+    for the `private_subnets` and `public_subnets` lists.
 
-    @staticmethod
-    def __make_public_subnet(block: str) -> str:
-        split_base = SubnetDistributor.__cidr_subnet(block, 1, 1)
-        return SubnetDistributor.__cidr_subnet(split_base, 1, 0)
-
-    @staticmethod
-    def __make_private_subnet(block: str) -> str:
-        return SubnetDistributor.__cidr_subnet(block, 1, 0)
+    Each subnet is also numbered with the /64 it takes from the /56 IPv6 block
+    which AWS assigns to a dual-stack VPC, mirroring its IPv4 position.
+    """
 
     def __init__(self, base_cidr: str, az_count: int):
-        new_bits_per_az = int(math.log(SubnetDistributor.__next_power_of_2(az_count), 2))
-        az_bases = [SubnetDistributor.__cidr_subnet(base_cidr, new_bits_per_az, i) for i in range(az_count)]
-        self.private_subnets = list([SubnetDistributor.__make_private_subnet(block) for block in az_bases])
-        self.public_subnets = list([SubnetDistributor.__make_public_subnet(block) for block in az_bases])
+        layout = SubnetLayout(base_cidr, az_count, DEFAULT_TIERS)
+
+        self.private_blocks = layout.blocks["private"]
+        self.public_blocks = layout.blocks["public"]
+        self.private_subnets = [str(block) for block in self.private_blocks]
+        self.public_subnets = [str(block) for block in self.public_blocks]
+        self.private_ipv6_subnet_numbers = [layout.ipv6_subnet_number(block) for block in self.private_blocks]
+        self.public_ipv6_subnet_numbers = [layout.ipv6_subnet_number(block) for block in self.public_blocks]
+
+    def private_ipv6_subnets(self, ipv6_cidr_block: str) -> List[str]:
+        """
+        Returns the IPv6 /64 of each private subnet.
+
+        :param ipv6_cidr_block: The /56 IPv6 CIDR block of the VPC.
+        """
+        return [ipv6_subnet(ipv6_cidr_block, number) for number in self.private_ipv6_subnet_numbers]
+
+    def public_ipv6_subnets(self, ipv6_cidr_block: str) -> List[str]:
+        """
+        Returns the IPv6 /64 of each public subnet.
+
+        :param ipv6_cidr_block: The /56 IPv6 CIDR block of the VPC.
+        """
+        return [ipv6_subnet(ipv6_cidr_block, number) for number in self.public_ipv6_subnet_numbers]
@@ -0,0 +1,217 @@
+# Copyright 2018-2019, James Nugent.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can obtain
+# one at http://mozilla.org/MPL/2.0/.
+
+"""
+Contains the subnet layout engine, which divides the address space of each
+availability zone between tiers of subnets.
+"""
+import functools
+from fractions import Fraction
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .cidr import CidrBlock
+
+#: The number of bits by which a subnet's IPv6 /64 extends the /56 which AWS assigns to a VPC.
+IPV6_SUBNET_NEW_BITS = 8
+
+
+class SubnetRouting:
+    """
+    The ways in which the subnets of a tier can reach the internet.
+    """
+
+    #: Subnets are routed to the internet gateway, and can host NAT gateways.
+    PUBLIC = "public"
+    #: Subnets are routed to the internet through NAT gateways, according to the NAT strategy.
+    PRIVATE = "private"
+    #: Subnets have no route to the internet.
+    ISOLATED = "isolated"
+
+    ALL = (PUBLIC, PRIVATE, ISOLATED)
+
+
+class SubnetTier(NamedTuple):
+    """
+    A tier of subnets, with one subnet in each availability zone. The size of
+    each subnet is given by exactly one of:
+
+      - `new_bits`: the subnet is 1/2^new_bits of the availability zone's block
+      - `prefix_length`: the subnet has this absolute prefix length
+      - `weight`: the subnet takes a share, proportional to its weight, of the
+        space not taken by sized tiers listed before the last weighted tier,
+        rounded down to a power of two. Space lost to rounding is left spare
+    """
+    name: str
+    routing: str = SubnetRouting.PRIVATE
+    new_bits: Optional[int] = None
+    prefix_length: Optional[int] = None
+    weight: Optional[float] = None
+
+
+#: The tiers of the original layout: half of each availability zone is private, a quarter public, and a quarter spare.
+DEFAULT_TIERS = (
+    SubnetTier("private", SubnetRouting.PRIVATE, new_bits=1),
+    SubnetTier("public", SubnetRouting.PUBLIC, new_bits=2),
+)
+
+
+class SubnetLayout:
+    """
+    A SubnetLayout divides a CIDR block into `az_count` equal blocks - one per
+    availability zone - and divides each of those between the given tiers.
+
+    Tiers are placed in order using buddy allocation, each taking the lowest
+    addressed of the smallest free blocks which fits, so the space left spare
+    stays in as few, large blocks as possible. Weighted tiers are rounded to the
+    sizes which leave the least space spare, and of those the sizes closest to
+    their weights. Appending a tier with an explicit size places it in space
+    left spare without re-addressing the subnets of earlier tiers, weighted or
+    not, or fails if there is not enough; appending a weighted tier resizes the
+    existing weighted tiers.
+    """
+
+    def __init__(self, base_cidr: str, az_count: int, tiers: Sequence[SubnetTier] = DEFAULT_TIERS):
+        """
+        Constructs a SubnetLayout.
+
+        :param base_cidr: The CIDR block representing the address space of the entire VPC.
+        :param az_count: The number of availability zones.
+        :param tiers: The tiers of subnets to create in each availability zone.
+        """
+        self.tiers = tuple(tiers)
+        base = CidrBlock.parse(base_cidr)
+        new_bits_per_az = ((1 << (az_count - 1).bit_length()) - 1).bit_length()
+        self.base = base
+        self.new_bits_per_az = new_bits_per_az
+        self.az_blocks = [base.subnet(new_bits_per_az, i) for i in range(az_count)]
+
+        placements, spare = _place_tiers(self.tiers, base.prefix_length + new_bits_per_az, base.max_prefix_length)
+
+        self.blocks: Dict[str, List[CidrBlock]] = {
+            tier.name: [block.subnet(new_bits, number) for block in self.az_blocks]
+            for tier, (new_bits, number) in zip(self.tiers, placements)
+        }
+        self.spare_blocks: List[List[CidrBlock]] = [[block.subnet(new_bits, number) for new_bits, number in spare]
+                                                    for block in self.az_blocks]
+
+    def subnets(self, tier_name: str) -> List[str]:
+        """
+        Returns the CIDR block of the tier's subnet in each availability zone.
+
+        :param tier_name: The name of the tier.
+        """
+        return [str(block) for block in self.blocks[tier_name]]
+
+    def ipv6_subnet_number(self, block: CidrBlock) -> int:
+        """
+        Returns the number of the IPv6 /64 for a subnet of this layout within
+        the VPC's /56. Each availability zone has an equal share of the /64s,
+        mirroring the division of the base block, and the subnet takes the /64
+        at the same relative offset within its zone's share as its block has
+        within the zone's block. Subnets added in spare space therefore never
+        renumber existing subnets. This is computed directly from the block's
+        address, without enumerating subnets.
+
+        :param block: The block of a subnet within the layout, such as a tier's block or a part of one.
+        """
+        share_bits = IPV6_SUBNET_NEW_BITS - self.new_bits_per_az
+        if share_bits < 0:
+            raise ValueError(f"A /56 cannot be divided between {len(self.az_blocks)} availability zones")
+        if not self.base.contains(block):
+            raise ValueError(f"Subnet block {block} is not within {self.base}")
+
+        zone_host_bits = self.base.max_prefix_length - self.base.prefix_length - self.new_bits_per_az
+        offset = block.network - self.base.network
+        az_index, zone_offset = offset >> zone_host_bits, offset & ((1 << zone_host_bits) - 1)
+        if zone_host_bits >= share_bits:
+            slot = zone_offset >> (zone_host_bits - share_bits)
+        else:
+            slot = zone_offset << (share_bits - zone_host_bits)
+        return (az_index << share_bits) | slot
+
+
+def ipv6_subnet(ipv6_cidr_block: str, number: int) -> str:
+    """
+    Returns the `number`th /64 of the IPv6 CIDR block assigned to a VPC.
+
+    :param ipv6_cidr_block: The IPv6 CIDR block of the VPC, usually an Amazon-provided /56.
+    :param number: The number of the /64, e.g. from `SubnetLayout.ipv6_subnet_number`.
+    """
+    block = CidrBlock.parse(ipv6_cidr_block)
+    return str(block.subnet(64 - block.prefix_length, number))
+
+
+@functools.lru_cache(maxsize=256)
+def _place_tiers(tiers: Tuple[SubnetTier, ...], az_prefix_length: int, max_prefix_length: int) \
+        -> Tuple[Tuple[Tuple[int, int], ...], Tuple[Tuple[int, int], ...]]:
+    # Returns the (new bits, subnet number) of each tier within an availability
+    # zone's block, and of each spare block.
+    names = [tier.name for tier in tiers]
+    if len(set(names)) != len(names):
+        raise ValueError("Subnet tier names must be unique")
+
+    max_new_bits = max_prefix_length - az_prefix_length
+    tier_bits: List[Optional[int]] = []
+    for tier in tiers:
+        if tier.routing not in SubnetRouting.ALL:
+            raise ValueError(f"Subnet tier {tier.name!r} has routing {tier.routing!r}, which is not one of "
+                             f"{', '.join(SubnetRouting.ALL)}")
+        if sum(size is not None for size in (tier.new_bits, tier.prefix_length, tier.weight)) != 1:
+            raise ValueError(f"Subnet tier {tier.name!r} must have exactly one of new_bits, prefix_length or weight")
+        if tier.weight is not None and tier.weight <= 0:
+            raise ValueError(f"Subnet tier {tier.name!r} must have a positive weight")
+        bits = tier.new_bits if tier.prefix_length is None else tier.prefix_length - az_prefix_length
+        if bits is not None and not 0 <= bits <= max_new_bits:
+            raise ValueError(f"Subnet tier {tier.name!r} must have a prefix length between /{az_prefix_length} and "
+                             f"/{max_prefix_length}, not /{az_prefix_length + bits}")
+        tier_bits.append(bits)
+
+    def unallocated(sizes: Sequence[Optional[int]]) -> Fraction:
+        return 1 - sum(Fraction(1, 1 << bits) for bits in sizes if bits is not None)
+
+    # Weighted tiers share the space left by the explicitly sized tiers listed
+    # before the last of them. Tiers listed after it take space the weighted
+    # tiers leave spare, so appending them never resizes the weighted tiers.
+    weighted = [i for i, tier in enumerate(tiers) if tier.weight is not None]
+    if weighted:
+        remaining = unallocated(tier_bits[:weighted[-1]])
+        if remaining >= 0:
+            weighted_bits = _weighted_bits([tiers[i].weight for i in weighted], remaining, max_new_bits)
+            for i, bits in zip(weighted, weighted_bits):
+                tier_bits[i] = bits
+
+    if unallocated(tier_bits) < 0:
+        raise ValueError(f"Subnet tiers {', '.join(names)} do not fit in a /{az_prefix_length} per availability zone")
+
+    # Best-fit buddy allocation never fails when the blocks fit in total
+    free = [(0, 0)]
+    placements = []
+    for bits in tier_bits:
+        depth, number = max((block for block in free if block[0] <= bits), key=lambda block: (block[0], -block[1]))
+        free.remove((depth, number))
+        while depth < bits:
+            depth, number = depth + 1, number * 2
+            free.append((depth, number + 1))
+        placements.append((bits, number))
+    spare = sorted(free, key=lambda block: block[1] << (max_new_bits - block[0]))
+    return tuple(placements), tuple(spare)
+
+
+def _weighted_bits(weights: List[float], remaining: Fraction, max_new_bits: int) -> List[int]:
+    # Each tier is rounded down to the largest power of two not exceeding its
+    # share. Rounding a tier up would take space from the others, changing the
+    # ratio between them, so space lost to rounding is left spare instead.
+    total_weight = sum(weights)
+    weighted_bits = []
+    for weight in weights:
+        target = remaining * Fraction(weight) / Fraction(total_weight)
+        bits = 0
+        while bits <= max_new_bits and Fraction(1, 1 << bits) > target:
+            bits += 1
+        if bits > max_new_bits:
+            raise ValueError("A weighted subnet tier is too small for the address space available")
+        weighted_bits.append(bits)
+    return weighted_bits
@@ -7,48 +7,49 @@
 """
 Contains a Pulumi ComponentResource for creating a good-practice AWS VPC.
 """
-import json
-from typing import Mapping, Sequence
+import contextlib
+import functools
+from typing import Callable, ContextManager, Iterable, List, Optional, TypeVar
 
 import pulumi
 from pulumi import Input
 from pulumi_aws import cloudwatch, config, ec2, iam
 
-from .iam_helpers import assume_role_policy_for_principal
-from .subnet_distributor import SubnetDistributor
+try:
+    from pulumi_aws.ec2 import FlowLogDestinationOptionsArgs
+except ImportError:
+    # Older versions of pulumi_aws can only deliver plain-text flow logs to S3
+    FlowLogDestinationOptionsArgs = None
 
+from .availability_zones import available_zone_names, zone_name
+from .iam_helpers import assume_role_policy_for_principal, policy_document, policy_statement
+from .instrumentation import Instrumentation
+from .plan import SubnetPlan, VpcPlan
+from .route_summary import summarise_routes
+from .subnet_layout import ipv6_subnet
+from .vpc_args import VpcArgs
 
-class VpcArgs:
-    """
-    The arguments necessary to construct a `Vpc` resource.
-    """
+T = TypeVar("T")
+
+# The span of work in an uninstrumented Vpc, which records nothing
+_NO_SPAN = contextlib.nullcontext()
 
-    def __init__(self,
-                 description: str,
-                 base_tags: Mapping[str, str],
-                 base_cidr: str,
-                 availability_zone_names: pulumi.Input[Sequence[pulumi.Input[str]]],
-                 zone_name: pulumi.Input[str] = "",
-                 create_s3_endpoint: bool = True,
-                 create_dynamodb_endpoint: bool = True):
-        """
-        Constructs a VpcArgs.
-
-        :param description: A human-readable description used to construct resource name tags.
-        :param base_tags: Tags which are applied to all taggable resources.
-        :param base_cidr: The CIDR block representing the address space of the entire VPC.
-        :param availability_zone_names: A list of availability zone names in which to create subnets.
-        :param zone_name: The name of a private Route 53 zone to create and set in a DHCP Option Set for the VPC.
-        :param create_s3_endpoint: Whether or not to create a VPC endpoint and routes for S3 access.
-        :param create_dynamodb_endpoint:  Whether or not to create a VPC endpoint and routes for DynamoDB access.
-        """
-        self.description = description
-        self.base_tags = base_tags
-        self.base_cidr = base_cidr
-        self.availability_zone_names = availability_zone_names
-        self.zone_name = zone_name
-        self.create_s3_endpoint = create_s3_endpoint
-        self.create_dynamodb_endpoint = create_dynamodb_endpoint
+
+def _span(instrumentation: Optional[Instrumentation], component: str, kind: str, name: str) -> ContextManager:
+    if instrumentation is None:
+        return _NO_SPAN
+    return instrumentation.span(component, kind, name)
+
+
+def _instrumented(method: Callable[..., T]) -> Callable[..., T]:
+    # Records a span for each call of a Vpc method, if the Vpc is instrumented
+    @functools.wraps(method)
+    def wrapper(self: 'Vpc', *args, **kwargs) -> T:
+        if self.instrumentation is None:
+            return method(self, *args, **kwargs)
+        with self.instrumentation.span(self.name, "operation", method.__name__):
+            return method(self, *args, **kwargs)
+    return wrapper
 
 
 class Vpc(pulumi.ComponentResource):
@@ -57,10 +58,15 @@ class Vpc(pulumi.ComponentResource):
 
       - DHCP options for the given private hosted zone name
       - An Internet gateway
-      - Subnets of appropriate sizes for public and private subnets, for each availability zone specified
-      - A route table routing traffic from public subnets to the internet gateway
-      - NAT gateways (and accoutrements) for each private subnet, and appropriate routing
+      - Subnets for each tier of the subnet layout, in each availability zone specified
+      - A route table routing traffic from public subnets to the internet gateway, and one for each isolated tier
+      - NAT gateways (and accoutrements) for private subnets according to the NAT strategy, and appropriate routing
       - Optionally, S3 and DynamoDB endpoints
+      - Optionally, interface endpoints for other AWS services, sharing a security group
+      - Optionally, an IPv6 block with a /64 for each subnet, and an egress-only internet gateway for private subnets
+
+    If `VpcArgs.instrumentation` is given, the time taken to plan the VPC, register each child resource and run each
+    method is recorded.
     """
 
     def __init__(self,
@@ -74,218 +80,478 @@ class Vpc(pulumi.ComponentResource):
         :param args: A VpcArgs object containing the arguments for VPC constructin.
         :param opts: A pulumi.ResourceOptions object.
         """
-        super().__init__('Vpc', name, None, opts)
-
-        # Make base info available to other methods
-        self.name = name
-        self.description = args.description
-        self.base_tags = args.base_tags
+        with _span(args.instrumentation, name, "component", "Vpc"):
+            super().__init__('Vpc', name, None, opts)
+
+            # Make base info available to other methods
+            self.name = name
+            self.description = args.description
+            self.base_tags = args.base_tags
+            self.instrumentation = args.instrumentation
+
+            self._create_resources(name, args)
+            super().register_outputs({})
+
+    def _create_resources(self, name: str, args: VpcArgs):
+        # Compute every address, name and tag up-front, then register the planned resources
+        with _span(self.instrumentation, name, "operation", "plan"):
+            self.plan = VpcPlan.from_args(name, args, args.region or config.region)
+        plan = self.plan
+        resources = {}
+
+        # Zone names may not be known until the program is running; only their number affects the plan
+        availability_zone_names = args.availability_zone_names
+        if availability_zone_names is None:
+            availability_zone_names = available_zone_names(pulumi.InvokeOptions(parent=self))
+
+        def availability_zone(index: int) -> Input[str]:
+            if isinstance(availability_zone_names, (list, tuple)):
+                return availability_zone_names[index]
+            return pulumi.Output.from_input(availability_zone_names).apply(lambda names: zone_name(names, index))
+
+        def parent_opts(parent_name: str,
+                        depends_on: Optional[List[pulumi.Resource]] = None) -> pulumi.ResourceOptions:
+            return pulumi.ResourceOptions(parent=resources[parent_name], depends_on=depends_on)
 
         # Create VPC and Internet Gateway resources
-        self.vpc = ec2.Vpc(f"{name}-vpc",
-                           cidr_block=args.base_cidr,
-                           enable_dns_hostnames=True,
-                           enable_dns_support=True,
-                           tags={**args.base_tags, "Name": f"{args.description} VPC"},
-                           opts=pulumi.ResourceOptions(
-                               parent=self,
-                           ))
-
-        self.internet_gateway = ec2.InternetGateway(f"{name}-igw",
-                                                    vpc_id=self.vpc.id,
-                                                    tags={**args.base_tags,
-                                                          "Name": f"{args.description} VPC Internet Gateway"},
-                                                    opts=pulumi.ResourceOptions(
-                                                        parent=self.vpc,
-                                                    ))
-
-        # Calculate subnet CIDR blocks and create subnets
-        subnet_distributor = SubnetDistributor(args.base_cidr, len(args.availability_zone_names))
-
-        self.public_subnets = [ec2.Subnet(f"{name}-public-subnet-{i}",
-                                          vpc_id=self.vpc.id,
-                                          cidr_block=cidr,
-                                          availability_zone=args.availability_zone_names[i],
-                                          map_public_ip_on_launch=True,
-                                          tags={**args.base_tags, "Name": f"{args.description} Public Subnet {i}"},
-                                          opts=pulumi.ResourceOptions(
-                                              parent=self.vpc,
-                                          ))
-                               for i, cidr in enumerate(subnet_distributor.public_subnets)]
-
-        self.private_subnets = [ec2.Subnet(f"{name}-private-subnet-{i}",
-                                           vpc_id=self.vpc.id,
-                                           cidr_block=cidr,
-                                           availability_zone=args.availability_zone_names[i],
-                                           tags={**args.base_tags, "Name": f"{args.description} Private Subnet {i}"},
-                                           opts=pulumi.ResourceOptions(
-                                               parent=self.vpc,
-                                           ))
-                                for i, cidr in enumerate(subnet_distributor.private_subnets)]
+        self.vpc = self._create(ec2.Vpc, plan.vpc_resource_name,
+                                cidr_block=plan.cidr_block,
+                                assign_generated_ipv6_cidr_block=plan.enable_ipv6 or None,
+                                enable_dns_hostnames=True,
+                                enable_dns_support=True,
+                                tags=plan.tags(plan.vpc_name_tag),
+                                opts=pulumi.ResourceOptions(
+                                    parent=self,
+                                ))
+        resources[plan.vpc_resource_name] = self.vpc
+
+        self.internet_gateway = self._create(ec2.InternetGateway, plan.internet_gateway_resource_name,
+                                             vpc_id=self.vpc.id,
+                                             tags=plan.tags(plan.internet_gateway_name_tag),
+                                             opts=parent_opts(plan.vpc_resource_name))
+
+        # Create an egress-only internet gateway for IPv6 traffic from private subnets if necessary
+        self.egress_only_internet_gateway: Optional[ec2.EgressOnlyInternetGateway] = None
+        if plan.egress_only_internet_gateway_resource_name is not None:
+            self.egress_only_internet_gateway = self._create(
+                ec2.EgressOnlyInternetGateway,
+                plan.egress_only_internet_gateway_resource_name,
+                vpc_id=self.vpc.id,
+                tags=plan.tags(plan.egress_only_internet_gateway_name_tag),
+                opts=parent_opts(plan.vpc_resource_name))
+
+        # Create subnets
+        def make_subnet(subnet: SubnetPlan) -> ec2.Subnet:
+            ipv6_cidr_block = None
+            if subnet.ipv6_subnet_number is not None:
+                number = subnet.ipv6_subnet_number
+                ipv6_cidr_block = self.vpc.ipv6_cidr_block.apply(lambda cidr: ipv6_subnet(cidr, number))
+            resources[subnet.resource_name] = self._create(
+                ec2.Subnet,
+                subnet.resource_name,
+                vpc_id=self.vpc.id,
+                cidr_block=subnet.cidr_block,
+                ipv6_cidr_block=ipv6_cidr_block,
+                assign_ipv6_address_on_creation=ipv6_cidr_block is not None or None,
+                availability_zone=availability_zone(subnet.availability_zone_index),
+                # Left unset rather than False for private subnets, matching existing stacks
+                map_public_ip_on_launch=subnet.map_public_ip_on_launch or None,
+                tags=plan.tags(subnet.name_tag),
+                opts=parent_opts(plan.vpc_resource_name))
+            return resources[subnet.resource_name]
+
+        self.public_subnets = [make_subnet(subnet) for subnet in plan.public_subnets]
+        self.private_subnets = [make_subnet(subnet) for subnet in plan.private_subnets]
+        self.isolated_subnets = [make_subnet(subnet) for subnet in plan.isolated_subnets]
 
         # Adopt the default route table for this VPC and adapt it for use with public subnets
-        self.public_route_table = ec2.DefaultRouteTable(f"{name}-public-rt",
-                                                        default_route_table_id=self.vpc.default_route_table_id,
-                                                        tags={**args.base_tags,
-                                                              "Name": f"{args.description} Public Route Table"},
-                                                        opts=pulumi.ResourceOptions(
-                                                            parent=self.vpc,
-                                                        ))
-
-        ec2.Route(f"{name}-route-public-sn-to-ig",
-                  route_table_id=self.public_route_table.id,
-                  destination_cidr_block="0.0.0.0/0",
-                  gateway_id=self.internet_gateway.id,
-                  opts=pulumi.ResourceOptions(
-                      parent=self.public_route_table
-                  ))
-
-        for i, subnet in enumerate(self.public_subnets):
-            ec2.RouteTableAssociation(f"{name}-public-rta-{i + 1}",
-                                      subnet_id=subnet.id,
-                                      route_table_id=self.public_route_table,
-                                      opts=pulumi.ResourceOptions(
-                                          parent=self.public_route_table
-                                      ))
-
+        self.public_route_table = self._create(ec2.DefaultRouteTable, plan.public_route_table.resource_name,
+                                               default_route_table_id=self.vpc.default_route_table_id,
+                                               tags=plan.tags(plan.public_route_table.name_tag),
+                                               opts=parent_opts(plan.public_route_table.parent))
+        resources[plan.public_route_table.resource_name] = self.public_route_table
+
+        self._create(ec2.Route, plan.public_route_table.default_route_name,
+                     route_table_id=self.public_route_table.id,
+                     destination_cidr_block="0.0.0.0/0",
+                     gateway_id=self.internet_gateway.id,
+                     opts=parent_opts(plan.public_route_table.resource_name))
+
+        if plan.public_route_table.ipv6_default_route_name is not None:
+            self._create(ec2.Route, plan.public_route_table.ipv6_default_route_name,
+                         route_table_id=self.public_route_table.id,
+                         destination_ipv6_cidr_block="::/0",
+                         gateway_id=self.internet_gateway.id,
+                         opts=parent_opts(plan.public_route_table.resource_name))
+
+        for association_name, subnet_index in plan.public_route_table.associations:
+            self._create(ec2.RouteTableAssociation, association_name,
+                         subnet_id=self.public_subnets[subnet_index].id,
+                         route_table_id=self.public_route_table.id,
+                         opts=parent_opts(plan.public_route_table.resource_name))
+
+        # Create NAT Gateways
         self.nat_elastic_ip_addresses: [ec2.Eip] = list()
         self.nat_gateways: [ec2.NatGateway] = list()
+
+        for nat_gateway in plan.nat_gateways:
+            self.nat_elastic_ip_addresses.append(self._create(ec2.Eip, nat_gateway.eip_resource_name,
+                                                              tags=plan.tags(nat_gateway.eip_name_tag),
+                                                              opts=parent_opts(nat_gateway.parent)))
+
+            resources[nat_gateway.resource_name] = self._create(
+                ec2.NatGateway,
+                nat_gateway.resource_name,
+                allocation_id=self.nat_elastic_ip_addresses[-1].id,
+                subnet_id=self.public_subnets[nat_gateway.public_subnet_index].id,
+                tags=plan.tags(nat_gateway.name_tag),
+                # NAT gateways require an attached internet gateway
+                opts=parent_opts(nat_gateway.parent, [self.internet_gateway]))
+            self.nat_gateways.append(resources[nat_gateway.resource_name])
+
+        # Create route tables routing each group of private subnets to its NAT Gateway, if any
         self.private_route_tables: [ec2.RouteTable] = list()
 
-        # Create a NAT Gateway and appropriate route table for each private subnet
-        for i, subnet in enumerate(self.private_subnets):
-            self.nat_elastic_ip_addresses.append(ec2.Eip(f"{name}-nat-{i + 1}",
-                                                         tags={**args.base_tags,
-                                                               "Name": f"{args.description} NAT Gateway EIP {i + 1}"},
-                                                         opts=pulumi.ResourceOptions(
-                                                             parent=subnet
-                                                         )))
-
-            self.nat_gateways.append(ec2.NatGateway(f"{name}-nat-gateway-{i + 1}",
-                                                    allocation_id=self.nat_elastic_ip_addresses[i].id,
-                                                    subnet_id=self.public_subnets[i].id,
-                                                    tags={**args.base_tags,
-                                                          "Name": f"{args.description} NAT Gateway {i + 1}"},
-                                                    opts=pulumi.ResourceOptions(
-                                                        parent=subnet
-                                                    )))
-
-            self.private_route_tables.append(ec2.RouteTable(f"{name}-private-rt-{i + 1}",
-                                                            vpc_id=self.vpc.id,
-                                                            tags={**args.base_tags,
-                                                                  "Name": f"{args.description} Private RT {i + 1}"},
-                                                            opts=pulumi.ResourceOptions(
-                                                                parent=subnet
-                                                            )))
-
-            ec2.Route(f"{name}-route-private-sn-to-nat-{i + 1}",
-                      route_table_id=self.private_route_tables[i].id,
-                      destination_cidr_block="0.0.0.0/0",
-                      nat_gateway_id=self.nat_gateways[i].id,
-                      opts=pulumi.ResourceOptions(
-                          parent=self.private_route_tables[i]
-                      ))
-
-            ec2.RouteTableAssociation(f"{name}-private-rta-{i + 1}",
-                                      subnet_id=subnet.id,
-                                      route_table_id=self.private_route_tables[i].id,
-                                      opts=pulumi.ResourceOptions(
-                                          parent=self.private_route_tables[i]
-                                      ))
-
-        # Create S3 endpoint if necessary
-        if args.create_s3_endpoint:
-            ec2.VpcEndpoint(f"{name}-s3-endpoint",
-                            vpc_id=self.vpc.id,
-                            service_name=f"com.amazonaws.{config.region}.s3",
-                            route_table_ids=[self.public_route_table.id,
-                                             *[rt.id for rt in self.private_route_tables]],
-                            opts=pulumi.ResourceOptions(
-                                parent=self.vpc
-                            ))
-
-        # Create DynamoDB endpoint if necessary
-        if args.create_dynamodb_endpoint:
-            ec2.VpcEndpoint(f"{name}-dynamodb-endpoint",
-                            vpc_id=self.vpc.id,
-                            service_name=f"com.amazonaws.{config.region}.dynamodb",
-                            route_table_ids=[self.public_route_table.id,
-                                             *[rt.id for rt in self.private_route_tables]],
-                            opts=pulumi.ResourceOptions(
-                                parent=self.vpc
-                            ))
-
-        super().register_outputs({})
-
-    def enableFlowLoggingToS3(self, bucketArn: Input[str], trafficType: Input[str]):
+        for route_table in plan.private_route_tables:
+            resources[route_table.resource_name] = self._create(ec2.RouteTable, route_table.resource_name,
+                                                                vpc_id=self.vpc.id,
+                                                                tags=plan.tags(route_table.name_tag),
+                                                                opts=parent_opts(route_table.parent))
+            self.private_route_tables.append(resources[route_table.resource_name])
+
+            if route_table.nat_gateway_index is not None:
+                self._create(ec2.Route, route_table.default_route_name,
+                             route_table_id=self.private_route_tables[-1].id,
+                             destination_cidr_block="0.0.0.0/0",
+                             nat_gateway_id=self.nat_gateways[route_table.nat_gateway_index].id,
+                             opts=parent_opts(route_table.resource_name))
+
+            # IPv6 traffic leaves through the egress-only internet gateway rather than a NAT gateway
+            if route_table.ipv6_default_route_name is not None:
+                self._create(ec2.Route, route_table.ipv6_default_route_name,
+                             route_table_id=self.private_route_tables[-1].id,
+                             destination_ipv6_cidr_block="::/0",
+                             egress_only_gateway_id=self.egress_only_internet_gateway.id,
+                             opts=parent_opts(route_table.resource_name))
+
+            for association_name, subnet_index in route_table.associations:
+                self._create(ec2.RouteTableAssociation, association_name,
+                             subnet_id=self.private_subnets[subnet_index].id,
+                             route_table_id=self.private_route_tables[-1].id,
+                             opts=parent_opts(route_table.resource_name))
+
+        # Create a route table without routes to the internet for each isolated tier
+        self.isolated_route_tables: [ec2.RouteTable] = list()
+
+        for route_table in plan.isolated_route_tables:
+            resources[route_table.resource_name] = self._create(ec2.RouteTable, route_table.resource_name,
+                                                                vpc_id=self.vpc.id,
+                                                                tags=plan.tags(route_table.name_tag),
+                                                                opts=parent_opts(route_table.parent))
+            self.isolated_route_tables.append(resources[route_table.resource_name])
+
+            for association_name, subnet_index in route_table.associations:
+                self._create(ec2.RouteTableAssociation, association_name,
+                             subnet_id=self.isolated_subnets[subnet_index].id,
+                             route_table_id=self.isolated_route_tables[-1].id,
+                             opts=parent_opts(route_table.resource_name))
+
+        # Create S3 and DynamoDB endpoints if necessary
+        for endpoint in plan.endpoints:
+            self._create(ec2.VpcEndpoint, endpoint.resource_name,
+                         vpc_id=self.vpc.id,
+                         service_name=endpoint.service_name,
+                         route_table_ids=[self.public_route_table.id,
+                                          *[rt.id for rt in self.private_route_tables],
+                                          *[rt.id for rt in self.isolated_route_tables]],
+                         opts=parent_opts(plan.vpc_resource_name))
+
+        # Create interface endpoints and their shared security group if necessary
+        self.interface_endpoint_security_group: Optional[ec2.SecurityGroup] = None
+        self.interface_endpoints: [ec2.VpcEndpoint] = list()
+
+        security_group = plan.interface_endpoint_security_group
+        if security_group is not None:
+            self.interface_endpoint_security_group = self._create(
+                ec2.SecurityGroup,
+                security_group.resource_name,
+                vpc_id=self.vpc.id,
+                description=security_group.description,
+                ingress=[{
+                    "protocol": "tcp",
+                    "from_port": 443,
+                    "to_port": 443,
+                    "cidr_blocks": [plan.cidr_block],
+                    # Dual-stack clients may reach the endpoints over IPv6
+                    "ipv6_cidr_blocks": [self.vpc.ipv6_cidr_block] if plan.enable_ipv6 else None,
+                }],
+                tags=plan.tags(security_group.name_tag),
+                opts=parent_opts(plan.vpc_resource_name))
+
+        for endpoint in plan.interface_endpoints:
+            self.interface_endpoints.append(self._create(
+                ec2.VpcEndpoint,
+                endpoint.resource_name,
+                vpc_id=self.vpc.id,
+                service_name=endpoint.service_name,
+                vpc_endpoint_type="Interface",
+                private_dns_enabled=True,
+                subnet_ids=[self.private_subnets[i].id for i in endpoint.subnet_indices],
+                security_group_ids=[self.interface_endpoint_security_group.id],
+                tags=plan.tags(endpoint.name_tag),
+                opts=parent_opts(plan.vpc_resource_name)))
+
+        # Create alarms for NAT Gateway saturation if necessary
+        self.nat_gateway_alarms: [cloudwatch.MetricAlarm] = list()
+
+        for alarm in plan.nat_gateway_alarms:
+            nat_gateway = plan.nat_gateways[alarm.nat_gateway_index]
+            self.nat_gateway_alarms.append(self._create(
+                cloudwatch.MetricAlarm,
+                alarm.resource_name,
+                alarm_description=f"{nat_gateway.name_tag}: {_NAT_GATEWAY_ALARM_DESCRIPTIONS[alarm.metric]}",
+                comparison_operator="GreaterThanThreshold",
+                evaluation_periods=1,
+                threshold=alarm.threshold,
+                treat_missing_data="notBreaching",
+                alarm_actions=args.nat_gateway_alarm_actions,
+                tags=plan.tags(alarm.name_tag),
+                **_nat_gateway_alarm_metric(alarm.metric, self.nat_gateways[alarm.nat_gateway_index].id),
+                opts=parent_opts(nat_gateway.resource_name)))
+
+    def _create(self, factory: Callable[..., T], resource_name: str, **kwargs) -> T:
+        # Registers a child resource, through the instrumentation if there is any
+        if self.instrumentation is None:
+            return factory(resource_name, **kwargs)
+        return self.instrumentation.register(self.name, factory, resource_name, **kwargs)
+
+    @_instrumented
+    def addSummarisedRoutes(self,
+                            name: str,
+                            peer_cidrs: Iterable[str],
+                            excluded_cidrs: Iterable[str] = (),
+                            within_cidrs: Optional[Iterable[str]] = None,
+                            public: bool = True,
+                            private: bool = True,
+                            **target: Input[str]) -> List[ec2.Route]:
+        """
+        Routes traffic for a set of peer CIDR blocks, such as other VPCs reached by peering, a transit gateway or a
+        VPN, through a single target. The blocks are summarised with `summarise_routes` so that as few routes as
+        possible are added to each route table. Routes are named by destination, so changing the peers only adds
+        and removes the affected routes.
+        :param self: VPC instance
+        :param name: A name for this set of routes, used to construct route resource names
+        :param peer_cidrs: The CIDR blocks to route to the target
+        :param excluded_cidrs: CIDR blocks which must not be routed to the target
+        :param within_cidrs: CIDR blocks whose unused addresses may also be routed to the target, allowing fewer routes
+        :param public: Whether to add the routes to the public route table
+        :param private: Whether to add the routes to the private route tables
+        :param target: Exactly one route target, e.g. `transit_gateway_id=tgw.id` or `vpc_peering_connection_id=...`
+        :return: The routes created
         """
-        Enable VPC flow logging to S3, for the specified traffic type
+        if len(target) != 1:
+            raise ValueError(f"Exactly one route target must be given, not {', '.join(sorted(target)) or 'none'}")
+
+        route_tables = []
+        if public:
+            route_tables.append((self.plan.public_route_table.resource_name, self.public_route_table))
+        if private:
+            route_tables.extend((route_table_plan.resource_name, route_table)
+                                for route_table_plan, route_table in zip(self.plan.private_route_tables,
+                                                                         self.private_route_tables))
+
+        routes = []
+        for cidr in summarise_routes(peer_cidrs, [self.plan.cidr_block], excluded_cidrs, within_cidrs):
+            destination = {"destination_ipv6_cidr_block" if ":" in cidr else "destination_cidr_block": cidr}
+            for route_table_name, route_table in route_tables:
+                route_name = f"{route_table_name}-{name}-{cidr.replace('/', '-').replace(':', '-')}"
+                routes.append(self._create(ec2.Route, route_name,
+                                           route_table_id=route_table.id,
+                                           **destination,
+                                           **target,
+                                           opts=pulumi.ResourceOptions(
+                                               parent=route_table,
+                                           )))
+        return routes
+
+    @_instrumented
+    def enableFlowLoggingToS3(self,
+                              bucketArn: Input[str],
+                              trafficType: Input[str],
+                              file_format: str = "plain-text",
+                              hive_compatible_partitions: bool = False,
+                              per_hour_partition: bool = False,
+                              max_aggregation_interval: int = 600,
+                              log_format: Optional[Input[str]] = None):
+        """
+        Enable VPC flow logging to S3, for the specified traffic type. By default, logs are delivered as plain-text
+        files without partitioning. Parquet files in hive-compatible partitions by hour minimise the data scanned
+        when querying the logs with Athena, but require a version of pulumi_aws supporting destination options, and
+        cannot be read by `flowlogs.read_flow_log`, which parses plain-text logs only.
         :param self: VPC instance
         :param bucketArn: The arn of the s3 bucket to send logs to
         :param trafficType: The traffic type to log: "ALL", "ACCEPT" or "REJECT"
+        :param file_format: The format of log files: "plain-text" or "parquet"
+        :param hive_compatible_partitions: Whether to use hive-compatible prefixes for log files
+        :param per_hour_partition: Whether to partition log files by hour rather than by day
+        :param max_aggregation_interval: The maximum interval in seconds over which packets are aggregated into a
+               flow log record: 60 or 600
+        :param log_format: The fields to include in each record, e.g. "${version} ${srcaddr} ${dstaddr}". Defaults
+               to the AWS default format
         :return: None
         """
-        ec2.FlowLog(f"{self.name}-flow-logs",
-                    log_destination=bucketArn,
-                    log_destination_type="s3",
-                    vpc_id=self.vpc.id,
-                    traffic_type=trafficType,
-                    opts=pulumi.ResourceOptions(
-                       parent=self.vpc,
-                    ))
-
-    def enableFlowLoggingToCloudWatchLogs(self, trafficType: Input[str]):
+        _check_max_aggregation_interval(max_aggregation_interval)
+        if file_format not in _FLOW_LOG_FILE_FORMATS:
+            raise ValueError(f"file_format must be one of {', '.join(_FLOW_LOG_FILE_FORMATS)}, not {file_format!r}")
+
+        destination_options = None
+        if file_format != "plain-text" or hive_compatible_partitions or per_hour_partition:
+            if FlowLogDestinationOptionsArgs is None:
+                raise ValueError("Parquet files and partitioning of flow logs require a newer version of pulumi_aws; "
+                                 "use file_format=\"plain-text\" and disable partitioning")
+            destination_options = FlowLogDestinationOptionsArgs(file_format=file_format,
+                                                                hive_compatible_partitions=hive_compatible_partitions,
+                                                                per_hour_partition=per_hour_partition)
+
+        self._create(ec2.FlowLog, f"{self.name}-flow-logs",
+                     log_destination=bucketArn,
+                     log_destination_type="s3",
+                     destination_options=destination_options,
+                     max_aggregation_interval=max_aggregation_interval,
+                     log_format=log_format,
+                     vpc_id=self.vpc.id,
+                     traffic_type=trafficType,
+                     opts=pulumi.ResourceOptions(
+                        parent=self.vpc,
+                     ))
+
+    @_instrumented
+    def enableFlowLoggingToCloudWatchLogs(self,
+                                          trafficType: Input[str],
+                                          retention_in_days: Optional[int] = None,
+                                          kms_key_id: Optional[Input[str]] = None,
+                                          max_aggregation_interval: int = 600,
+                                          log_format: Optional[Input[str]] = None):
         """
         Enable VPC flow logging to CloudWatch Logs, for the specified traffic type
         :param self: VPC instance
         :param trafficType: The traffic type to log: "ALL", "ACCEPT" or "REJECT"
+        :param retention_in_days: The number of days for which to retain log events. Must be a retention period
+               supported by CloudWatch Logs. Defaults to retaining them indefinitely
+        :param kms_key_id: The ARN of a KMS key with which to encrypt the log group
+        :param max_aggregation_interval: The maximum interval in seconds over which packets are aggregated into a
+               flow log record: 60 or 600
+        :param log_format: The fields to include in each record, e.g. "${version} ${srcaddr} ${dstaddr}". Defaults
+               to the AWS default format
         :return: None
         """
-        self.flow_logs_role = iam.Role(f"{self.name}-flow-logs-role",
-                                       tags={**self.base_tags,
-                                             "Name": f"{self.description} VPC Flow Logs"},
-                                       assume_role_policy=assume_role_policy_for_principal({
-                                           "Service": "vpc-flow-logs.amazonaws.com",
-                                       }),
-                                       opts=pulumi.ResourceOptions(
-                                           parent=self.vpc,
-                                       ))
-
-        self.flow_logs_group = cloudwatch.LogGroup(f"{self.name}-vpc-flow-logs",
-                                                   tags={**self.base_tags,
-                                                         "Name": f"{self.description} VPC Flow Logs"},
-                                                   opts=pulumi.ResourceOptions(
-                                                       parent=self.vpc,
-                                                   ))
-
-        iam.RolePolicy(f"{self.name}-flow-log-policy",
-                       name="vpc-flow-logs",
-                       role=self.flow_logs_role.id,
-                       policy=json.dumps({
-                           "Version": "2012-10-17",
-                           "Statement": [
-                               {
-                                   "Effect": "Allow",
-                                   "Resource": "*",
-                                   "Action": [
-                                       "logs:CreateLogGroup",
-                                       "logs:CreateLogStream",
-                                       "logs:PutLogEvents",
-                                       "logs:DescribeLogGroups",
-                                       "logs:DescribeLogStreams",
-                                   ]
-                               }
-                           ]
-                       }),
-                       opts=pulumi.ResourceOptions(
-                           parent=self.flow_logs_role
-                       ))
-
-        ec2.FlowLog(f"{self.name}-flow-logs",
-                    log_destination=self.flow_logs_group.arn,
-                    iam_role_arn=self.flow_logs_role.arn,
-                    vpc_id=self.vpc.id,
-                    traffic_type=trafficType,
-                    opts=pulumi.ResourceOptions(
-                        parent=self.flow_logs_role
-                    ))
+        _check_max_aggregation_interval(max_aggregation_interval)
+        if retention_in_days is not None and retention_in_days not in _LOG_RETENTION_DAYS:
+            raise ValueError(f"retention_in_days must be one of {', '.join(map(str, _LOG_RETENTION_DAYS))}, "
+                             f"not {retention_in_days!r}")
+
+        self.flow_logs_role = self._create(iam.Role, f"{self.name}-flow-logs-role",
+                                           tags={**self.base_tags,
+                                                 "Name": f"{self.description} VPC Flow Logs"},
+                                           assume_role_policy=assume_role_policy_for_principal({
+                                               "Service": "vpc-flow-logs.amazonaws.com",
+                                           }),
+                                           opts=pulumi.ResourceOptions(
+                                               parent=self.vpc,
+                                           ))
+
+        self.flow_logs_group = self._create(cloudwatch.LogGroup, f"{self.name}-vpc-flow-logs",
+                                            retention_in_days=retention_in_days,
+                                            kms_key_id=kms_key_id,
+                                            tags={**self.base_tags,
+                                                  "Name": f"{self.description} VPC Flow Logs"},
+                                            opts=pulumi.ResourceOptions(
+                                                parent=self.vpc,
+                                            ))
+
+        self._create(iam.RolePolicy, f"{self.name}-flow-log-policy",
+                     name="vpc-flow-logs",
+                     role=self.flow_logs_role.id,
+                     policy=policy_document(_FLOW_LOGS_POLICY_STATEMENT),
+                     opts=pulumi.ResourceOptions(
+                         parent=self.flow_logs_role
+                     ))
+
+        self._create(ec2.FlowLog, f"{self.name}-flow-logs",
+                     log_destination=self.flow_logs_group.arn,
+                     iam_role_arn=self.flow_logs_role.arn,
+                     max_aggregation_interval=max_aggregation_interval,
+                     log_format=log_format,
+                     vpc_id=self.vpc.id,
+                     traffic_type=trafficType,
+                     opts=pulumi.ResourceOptions(
+                         parent=self.flow_logs_role
+                     ))
+
+
+_FLOW_LOG_FILE_FORMATS = ("plain-text", "parquet")
+
+# The retention periods supported by CloudWatch Logs
+_LOG_RETENTION_DAYS = (1, 3, 5, 7, 14, 30, 60, 90, 120, 150, 180, 365, 400, 545, 731, 1096, 1827, 2192, 2557, 2922,
+                       3288, 3653)
+
+# The permissions needed to deliver flow logs to CloudWatch Logs
+_FLOW_LOGS_POLICY_STATEMENT = policy_statement(
+    actions=[
+        "logs:CreateLogGroup",
+        "logs:CreateLogStream",
+        "logs:PutLogEvents",
+        "logs:DescribeLogGroups",
+        "logs:DescribeLogStreams",
+    ],
+    resources="*",
+)
+
+
+def _check_max_aggregation_interval(max_aggregation_interval: int):
+    if max_aggregation_interval not in (60, 600):
+        raise ValueError(f"max_aggregation_interval must be 60 or 600, not {max_aggregation_interval!r}")
+
+
+_NAT_GATEWAY_ALARM_DESCRIPTIONS = {
+    "ErrorPortAllocation": "the NAT gateway could not allocate a source port",
+    "PacketsDropCount": "the NAT gateway dropped more than 0.01% of packets",
+    "Bandwidth": "the NAT gateway is approaching its bandwidth limit",
+}
+
+
+def _nat_gateway_alarm_metric(metric: str, nat_gateway_id: Input[str]) -> dict:
+    def query(query_id: str, metric_name: str) -> dict:
+        return {
+            "id": query_id,
+            "metric": {
+                "namespace": "AWS/NATGateway",
+                "metric_name": metric_name,
+                "dimensions": {"NatGatewayId": nat_gateway_id},
+                "period": 300,
+                "stat": "Sum",
+            },
+        }
+
+    if metric == "ErrorPortAllocation":
+        return {
+            "namespace": "AWS/NATGateway",
+            "metric_name": metric,
+            "dimensions": {"NatGatewayId": nat_gateway_id},
+            "period": 300,
+            "statistic": "Sum",
+        }
+    if metric == "PacketsDropCount":
+        return {"metric_queries": [
+            query("dropped", "PacketsDropCount"),
+            query("from_source", "PacketsInFromSource"),
+            query("from_destination", "PacketsInFromDestination"),
+            {"id": "drop_percentage", "expression": "100 * dropped / (from_source + from_destination)",
+             "label": "Packets dropped (%)", "return_data": True},
+        ]}
+    return {"metric_queries": [
+        query("to_destination", "BytesOutToDestination"),
+        query("to_source", "BytesOutToSource"),
+        {"id": "gbps", "expression": "(to_destination + to_source) * 8 / PERIOD(to_destination) / 1000000000",
+         "label": "Throughput (Gbps)", "return_data": True},
+    ]}
@@ -0,0 +1,156 @@
+# Copyright 2018-2019, James Nugent.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can obtain
+# one at http://mozilla.org/MPL/2.0/.
+
+"""
+Contains the arguments for the Vpc component. This module does not import
+Pulumi, so that VPCs can be planned without it.
+"""
+from typing import TYPE_CHECKING, Mapping, Optional, Sequence
+
+from .instrumentation import Instrumentation
+from .subnet_layout import DEFAULT_TIERS, SubnetRouting, SubnetTier
+
+if TYPE_CHECKING:
+    import pulumi
+
+
+class NatStrategy:
+    """
+    The NAT gateway topologies which a `Vpc` can create for its private subnets.
+    """
+
+    #: Private subnets have no IPv4 route to the internet.
+    NONE = "none"
+    #: A single NAT gateway is shared by all private subnets.
+    SINGLE = "single"
+    #: Each NAT gateway is shared by the private subnets of `azs_per_nat_gateway` availability zones.
+    PER_N_AZS = "per_n_azs"
+    #: Each private subnet has a NAT gateway in its own availability zone.
+    PER_AZ = "per_az"
+
+    ALL = (NONE, SINGLE, PER_N_AZS, PER_AZ)
+
+
+class VpcArgs:
+    """
+    The arguments necessary to construct a `Vpc` resource.
+    """
+
+    def __init__(self,
+                 description: str,
+                 base_tags: Mapping[str, str],
+                 base_cidr: str,
+                 availability_zone_names: 'Optional[pulumi.Input[Sequence[pulumi.Input[str]]]]' = None,
+                 zone_name: 'pulumi.Input[str]' = "",
+                 create_s3_endpoint: bool = True,
+                 create_dynamodb_endpoint: bool = True,
+                 availability_zone_count: Optional[int] = None,
+                 nat_strategy: str = NatStrategy.PER_AZ,
+                 azs_per_nat_gateway: int = 2,
+                 nat_gateways_per_az: int = 1,
+                 nat_gateway_alarms: bool = False,
+                 nat_gateway_alarm_actions: 'Optional[Sequence[pulumi.Input[str]]]' = None,
+                 nat_gateway_bandwidth_alarm_gbps: float = 80.0,
+                 interface_endpoints: Optional[Sequence[str]] = None,
+                 subnet_tiers: Sequence[SubnetTier] = DEFAULT_TIERS,
+                 enable_ipv6: bool = False,
+                 region: Optional[str] = None,
+                 instrumentation: Optional[Instrumentation] = None):
+        """
+        Constructs a VpcArgs.
+
+        :param description: A human-readable description used to construct resource name tags.
+        :param base_tags: Tags which are applied to all taggable resources.
+        :param base_cidr: The CIDR block representing the address space of the entire VPC.
+        :param availability_zone_names: The availability zone names in which to create subnets. This may be a list,
+               or an Output resolving to a list, in which case `availability_zone_count` must also be given. If
+               omitted, the available zones in the region are looked up without blocking program execution.
+        :param zone_name: The name of a private Route 53 zone to create and set in a DHCP Option Set for the VPC.
+        :param create_s3_endpoint: Whether or not to create a VPC endpoint and routes for S3 access.
+        :param create_dynamodb_endpoint:  Whether or not to create a VPC endpoint and routes for DynamoDB access.
+        :param availability_zone_count: The number of availability zones in which to create subnets. Subnet
+               addresses depend only on this count, so they can be planned before zone names are known. Defaults to
+               the length of `availability_zone_names` if that is a list.
+        :param nat_strategy: One of the `NatStrategy` values, controlling how many NAT gateways are created. Private
+               subnets sharing a NAT gateway also share a route table.
+        :param azs_per_nat_gateway: The number of availability zones sharing each NAT gateway when `nat_strategy` is
+               `NatStrategy.PER_N_AZS`.
+        :param nat_gateways_per_az: The number of NAT gateways in each availability zone, to increase the number of
+               concurrent connections available to private subnets. If greater than one, each private subnet is split
+               into this many parts (rounded up to a power of two), each routed through its own NAT gateway. Changing
+               this re-addresses the private subnets. Requires `NatStrategy.PER_AZ`.
+        :param nat_gateway_alarms: Whether to create CloudWatch alarms for each NAT gateway on port allocation errors,
+               dropped packets, and bandwidth.
+        :param nat_gateway_alarm_actions: The ARNs of actions, such as SNS topics, to notify when a NAT gateway alarm
+               changes to the ALARM state.
+        :param nat_gateway_bandwidth_alarm_gbps: The throughput of a NAT gateway, in Gbps, above which its bandwidth
+               alarm is triggered.
+        :param interface_endpoints: The services for which to create interface VPC endpoints with private DNS, so
+               that traffic to them does not pass through the NAT gateways. Services are named by the part following
+               the region, e.g. "ecr.api", "sts" or "logs", or in full. The endpoints are placed in a private subnet in
+               each availability zone, and share a security group admitting HTTPS traffic from the VPC.
+        :param subnet_tiers: The tiers of subnets to create in each availability zone, and their sizes. There must be
+               at least one public and one private tier; NAT gateways and interface endpoints are placed in the first
+               of each. Defaults to a private subnet of half of each zone and a public subnet of a quarter, leaving a
+               quarter spare. Appending tiers with explicit sizes uses spare space without re-addressing subnets,
+               and fails if there is not enough. Appending weighted tiers resizes existing weighted tiers.
+        :param enable_ipv6: Whether to request an Amazon-provided /56 IPv6 block for the VPC and make every subnet
+               dual-stack, with a /64 at the position mirroring its IPv4 block. Public subnets route IPv6 traffic to
+               the internet gateway, and private subnets to an egress-only internet gateway, bypassing the NAT
+               gateways. This applies with any `nat_strategy`, including `NatStrategy.NONE`.
+        :param region: The AWS region in which the VPC is created, used to name endpoint services. Defaults to the
+               region configured for the AWS provider. This must be given if the VPC is created with an explicit
+               provider for another region.
+        :param instrumentation: An Instrumentation which records the time taken to plan the VPC, register each of its
+               resources, and run each of its methods. VPCs without instrumentation do no timing.
+        """
+        self.description = description
+        self.base_tags = base_tags
+        self.base_cidr = base_cidr
+        self.availability_zone_names = availability_zone_names
+        self.zone_name = zone_name
+        self.create_s3_endpoint = create_s3_endpoint
+        self.create_dynamodb_endpoint = create_dynamodb_endpoint
+
+        if availability_zone_count is None:
+            if not isinstance(availability_zone_names, (list, tuple)):
+                raise ValueError("availability_zone_count must be given unless availability_zone_names is a list")
+            availability_zone_count = len(availability_zone_names)
+        elif (isinstance(availability_zone_names, (list, tuple))
+              and len(availability_zone_names) < availability_zone_count):
+            raise ValueError(f"{availability_zone_count} availability zones were requested, but only "
+                             f"{len(availability_zone_names)} names were given")
+        self.availability_zone_count = availability_zone_count
+
+        if nat_strategy not in NatStrategy.ALL:
+            raise ValueError(f"nat_strategy must be one of {', '.join(NatStrategy.ALL)}, not {nat_strategy!r}")
+        if azs_per_nat_gateway < 1:
+            raise ValueError("azs_per_nat_gateway must be at least 1")
+        self.nat_strategy = nat_strategy
+        self.azs_per_nat_gateway = azs_per_nat_gateway
+
+        if nat_gateways_per_az < 1:
+            raise ValueError("nat_gateways_per_az must be at least 1")
+        if nat_gateways_per_az > 1 and nat_strategy != NatStrategy.PER_AZ:
+            raise ValueError(f"nat_gateways_per_az requires nat_strategy {NatStrategy.PER_AZ!r}")
+        self.nat_gateways_per_az = nat_gateways_per_az
+        self.nat_gateway_alarms = nat_gateway_alarms
+        self.nat_gateway_alarm_actions = nat_gateway_alarm_actions
+        self.nat_gateway_bandwidth_alarm_gbps = nat_gateway_bandwidth_alarm_gbps
+
+        interface_endpoints = tuple(interface_endpoints or ())
+        if len(set(interface_endpoints)) != len(interface_endpoints):
+            raise ValueError("interface_endpoints must not contain duplicate services")
+        self.interface_endpoints = interface_endpoints
+
+        subnet_tiers = tuple(subnet_tiers)
+        for routing in (SubnetRouting.PUBLIC, SubnetRouting.PRIVATE):
+            if not any(tier.routing == routing for tier in subnet_tiers):
+                raise ValueError(f"subnet_tiers must include a tier with {routing} routing")
+        self.subnet_tiers = subnet_tiers
+        self.enable_ipv6 = enable_ipv6
+        self.region = region
+        self.instrumentation = instrumentation
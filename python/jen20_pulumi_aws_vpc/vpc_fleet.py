@@ -0,0 +1,96 @@
+# Copyright 2018-2019, James Nugent.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can obtain
+# one at http://mozilla.org/MPL/2.0/.
+
+"""
+Contains a Pulumi ComponentResource for creating many VPCs at once.
+"""
+import functools
+from typing import Dict, List, Mapping, Optional
+
+import pulumi
+from pulumi_aws import config
+
+from .availability_zones import available_zone_names, zone_name
+from .fleet_args import VpcFleetArgs
+from .plan import VpcPlan
+from .vpc import Vpc
+
+
+class VpcFleet(pulumi.ComponentResource):
+    """
+    Creates a fleet of good-practice AWS VPCs using Pulumi, for example one for each environment in each region.
+    Compared with constructing each `Vpc` separately, a fleet:
+
+      - Resolves the default region once, rather than once per VPC. The region is read from the `aws:region`
+        configuration, so must be given for each VPC if the fleet is created with an explicit AWS provider, unless
+        that provider is also given in `VpcFleetArgs.providers`
+      - Looks up the available zones once for each region, rather than once per VPC
+      - Plans every VPC before registering any resources, so invalid arguments fail fast
+      - Validates that the VPCs do not overlap
+    """
+
+    def __init__(self,
+                 name: str,
+                 args: VpcFleetArgs,
+                 opts: pulumi.ResourceOptions = None):
+        """
+        Constructs a VpcFleet.
+
+        :param name: The Pulumi resource name.
+        :param args: A VpcFleetArgs object containing the arguments for each VPC.
+        :param opts: A pulumi.ResourceOptions object.
+        """
+        super().__init__('VpcFleet', name, None, opts)
+
+        # The region of an explicit provider is not known until it is created, so cannot be used to plan the VPCs
+        # unless it is also one of the fleet's providers by region
+        fleet_provider = _aws_provider(opts)
+        if fleet_provider is None:
+            vpc_args = args.with_region(config.region)
+        else:
+            vpc_args = args.with_region(next((region for region, provider in args.providers.items()
+                                              if provider is fleet_provider), None))
+            missing = sorted(name for name, vpc in vpc_args.items() if vpc.region is None)
+            if missing:
+                raise ValueError("The region of each VPC must be given when a fleet is created with an AWS provider "
+                                 f"which is not in its providers: {', '.join(missing)}")
+        self.plans: Dict[str, VpcPlan] = {name: VpcPlan.from_args(name, vpc, vpc.region)
+                                          for name, vpc in vpc_args.items()}
+
+        # Zones are looked up once per region, with the provider for that region. Each VPC is given the same list of
+        # zone name Outputs, rather than resolving a name from the lookup for each of its subnets.
+        zone_counts: Dict[Optional[str], int] = {}
+        for vpc in vpc_args.values():
+            if vpc.availability_zone_names is None:
+                zone_counts[vpc.region] = max(zone_counts.get(vpc.region, 0), vpc.availability_zone_count)
+
+        zone_names: Dict[Optional[str], List[pulumi.Output]] = {}
+        for region, zone_count in zone_counts.items():
+            names = available_zone_names(pulumi.InvokeOptions(parent=self, provider=args.providers.get(region)))
+            zone_names[region] = [names.apply(functools.partial(zone_name, index=i)) for i in range(zone_count)]
+
+        self.vpcs: Dict[str, Vpc] = {}
+        for vpc_name, vpc in vpc_args.items():
+            provider = args.providers.get(vpc.region)
+            if vpc.availability_zone_names is None:
+                vpc.availability_zone_names = zone_names[vpc.region]
+
+            self.vpcs[vpc_name] = Vpc(vpc_name, vpc, opts=pulumi.ResourceOptions(
+                parent=self,
+                providers={"aws": provider} if provider is not None else None,
+            ))
+
+        super().register_outputs({})
+
+
+def _aws_provider(opts: Optional[pulumi.ResourceOptions]) -> Optional[pulumi.ProviderResource]:
+    if opts is None:
+        return None
+    if opts.provider is not None and getattr(opts.provider, "package", None) == "aws":
+        return opts.provider
+    if isinstance(opts.providers, Mapping):
+        return opts.providers.get("aws")
+    return next((provider for provider in opts.providers or () if getattr(provider, "package", None) == "aws"), None)
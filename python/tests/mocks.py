@@ -0,0 +1,71 @@
+# Copyright 2018-2019, James Nugent.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can obtain
+# one at http://mozilla.org/MPL/2.0/.
+
+"""
+Helpers for registering components under pulumi.runtime mocks.
+"""
+import collections
+from typing import Callable, List
+
+import pulumi
+
+# The availability zones returned by a mocked getAvailabilityZones call
+AVAILABILITY_ZONE_NAMES = ["us-west-2a", "us-west-2b", "us-west-2c", "us-west-2d"]
+
+# The IPv6 block assigned to a mocked VPC which requests one
+IPV6_CIDR_BLOCK = "2600:1f14:abc:de00::/56"
+
+
+class RecordingMocks(pulumi.runtime.Mocks):
+    """
+    Mocks which record every resource registered and call made, and echo inputs back as state. VPCs requesting an IPv6
+    block are assigned `IPV6_CIDR_BLOCK`.
+    """
+
+    def __init__(self):
+        self.resources: List[pulumi.runtime.MockResourceArgs] = []
+        self.calls: List[pulumi.runtime.MockCallArgs] = []
+
+    def new_resource(self, args: pulumi.runtime.MockResourceArgs):
+        self.resources.append(args)
+        state = dict(args.inputs)
+        if args.typ == "aws:ec2/vpc:Vpc" and args.inputs.get("assignGeneratedIpv6CidrBlock"):
+            state["ipv6CidrBlock"] = IPV6_CIDR_BLOCK
+        return f"{args.name}-id", state
+
+    def call(self, args: pulumi.runtime.MockCallArgs):
+        self.calls.append(args)
+        if args.token == "aws:index/getAvailabilityZones:getAvailabilityZones":
+            return {"names": AVAILABILITY_ZONE_NAMES}
+        return {}
+
+    def named(self, name: str) -> pulumi.runtime.MockResourceArgs:
+        """
+        Returns the registered resource with the given name.
+        """
+        return next(resource for resource in self.resources if resource.name == name)
+
+    def of_type(self, typ: str) -> List[pulumi.runtime.MockResourceArgs]:
+        """
+        Returns the registered resources with the given type token, in registration order.
+        """
+        return [resource for resource in self.resources if resource.typ == typ]
+
+    def type_counts(self) -> collections.Counter:
+        """
+        Returns the number of registered resources of each type.
+        """
+        return collections.Counter(resource.typ for resource in self.resources)
+
+
+def register(program: Callable[[], object]) -> RecordingMocks:
+    """
+    Runs `program` under mocks and waits for all of its resources to be registered.
+    """
+    mocks = RecordingMocks()
+    pulumi.runtime.set_mocks(mocks, preview=False)
+    pulumi.runtime.test(program)()
+    return mocks
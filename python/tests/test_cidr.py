@@ -0,0 +1,51 @@
+# Copyright 2018-2019, James Nugent.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can obtain
+# one at http://mozilla.org/MPL/2.0/.
+
+import ipaddress
+import unittest
+
+from jen20_pulumi_aws_vpc.cidr import CidrBlock
+
+
+class CidrBlockTests(unittest.TestCase):
+    def test_parse_and_format_round_trip(self):
+        for cidr in ["10.0.0.0/16", "192.168.4.0/22", "0.0.0.0/0", "2001:db8::/56", "2001:db8:0:ff00::/64"]:
+            self.assertEqual(str(CidrBlock.parse(cidr)), cidr)
+
+    def test_parse_rejects_host_bits(self):
+        with self.assertRaises(ValueError):
+            CidrBlock.parse("10.0.0.1/16")
+
+    def test_subnet_matches_ipaddress(self):
+        for base in ["10.0.0.0/8", "172.16.0.0/12", "10.1.0.0/20", "2001:db8::/48"]:
+            network = ipaddress.ip_network(base)
+            block = CidrBlock.parse(base)
+            for new_bits in range(0, 5):
+                expected = [str(subnet) for subnet in network.subnets(new_bits)]
+                actual = [str(block.subnet(new_bits, i)) for i in range(1 << new_bits)]
+                self.assertListEqual(actual, expected)
+
+    def test_subnet_deep_ipv6_split(self):
+        block = CidrBlock.parse("2001:db8::/48")
+        self.assertEqual(str(block.subnet(16, 65535)), "2001:db8:0:ffff::/64")
+
+    def test_subnet_rejects_too_many_bits(self):
+        with self.assertRaises(ValueError):
+            CidrBlock.parse("10.0.0.0/30").subnet(3, 0)
+
+    def test_subnet_rejects_out_of_range_number(self):
+        with self.assertRaises(ValueError):
+            CidrBlock.parse("10.0.0.0/16").subnet(2, 4)
+
+    def test_contains_and_overlaps(self):
+        outer = CidrBlock.parse("10.0.0.0/16")
+        inner = CidrBlock.parse("10.0.128.0/17")
+        other = CidrBlock.parse("10.1.0.0/16")
+        self.assertTrue(outer.contains(inner))
+        self.assertFalse(inner.contains(outer))
+        self.assertTrue(inner.overlaps(outer))
+        self.assertFalse(outer.overlaps(other))
+        self.assertFalse(outer.overlaps(CidrBlock.parse("::/0")))
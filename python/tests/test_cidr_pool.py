@@ -0,0 +1,113 @@
+# Copyright 2018-2019, James Nugent.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can obtain
+# one at http://mozilla.org/MPL/2.0/.
+
+import ipaddress
+import random
+import unittest
+
+from jen20_pulumi_aws_vpc.cidr_pool import CidrPool
+
+
+class CidrPoolTests(unittest.TestCase):
+    def test_allocates_in_address_order(self):
+        sut = CidrPool("10.0.0.0/8")
+        self.assertListEqual([sut.allocate(16) for _ in range(3)], [
+            "10.0.0.0/16",
+            "10.1.0.0/16",
+            "10.2.0.0/16",
+        ])
+
+    def test_smaller_blocks_fill_fragments_first(self):
+        sut = CidrPool("10.0.0.0/8")
+        self.assertEqual(sut.allocate(16), "10.0.0.0/16")
+        self.assertEqual(sut.allocate(20), "10.1.0.0/20")
+        self.assertEqual(sut.allocate(16), "10.2.0.0/16")
+        self.assertEqual(sut.allocate(17), "10.1.128.0/17")
+        self.assertEqual(sut.allocate(20), "10.1.16.0/20")
+
+    def test_skips_used_blocks(self):
+        sut = CidrPool("10.0.0.0/8", used=["10.0.0.0/16", "10.2.0.0/15", "192.168.0.0/16"])
+        self.assertListEqual([sut.allocate(16) for _ in range(3)], [
+            "10.1.0.0/16",
+            "10.4.0.0/16",
+            "10.5.0.0/16",
+        ])
+        self.assertListEqual(sut.allocated, [
+            "10.0.0.0/16",
+            "10.1.0.0/16",
+            "10.2.0.0/15",
+            "10.4.0.0/16",
+            "10.5.0.0/16",
+        ])
+
+    def test_nested_and_duplicate_used_blocks_are_merged(self):
+        sut = CidrPool("10.0.0.0/8", used=["10.0.0.0/17", "10.0.0.0/16", "10.0.0.0/16", "10.2.0.0/24", "10.2.0.0/15",
+                                           "10.2.128.0/17"])
+        self.assertListEqual(sut.allocated, ["10.0.0.0/16", "10.2.0.0/15"])
+        self.assertListEqual([sut.allocate(16) for _ in range(2)], ["10.1.0.0/16", "10.4.0.0/16"])
+
+    def test_overlapping_reservation_is_rejected(self):
+        sut = CidrPool("10.0.0.0/8", used=["10.0.0.0/16"])
+        with self.assertRaises(ValueError):
+            sut.reserve("10.0.128.0/17")
+        with self.assertRaises(ValueError):
+            sut.reserve("10.0.0.0/15")
+        with self.assertRaises(ValueError):
+            sut.reserve("11.0.0.0/16")
+
+    def test_release_coalesces_for_reuse(self):
+        sut = CidrPool("10.0.0.0/14")
+        blocks = [sut.allocate(16) for _ in range(4)]
+        with self.assertRaises(ValueError):
+            sut.allocate(16)
+
+        for block in blocks:
+            sut.release(block)
+        self.assertEqual(sut.free_addresses, 1 << 18)
+        self.assertEqual(sut.allocate(14), "10.0.0.0/14")
+
+    def test_release_of_unallocated_block_is_rejected(self):
+        sut = CidrPool("10.0.0.0/8")
+        sut.allocate(16)
+        with self.assertRaises(ValueError):
+            sut.release("10.0.0.0/17")
+        with self.assertRaises(ValueError):
+            sut.release("10.1.0.0/16")
+
+    def test_prefix_length_outside_supernet_is_rejected(self):
+        sut = CidrPool("10.0.0.0/8")
+        with self.assertRaises(ValueError):
+            sut.allocate(7)
+        with self.assertRaises(ValueError):
+            sut.allocate(33)
+
+    def test_ipv6_allocation(self):
+        sut = CidrPool("2001:db8::/48")
+        self.assertEqual(sut.allocate(56), "2001:db8::/56")
+        self.assertEqual(sut.allocate(64), "2001:db8:0:100::/64")
+
+    def test_random_allocations_never_overlap(self):
+        rng = random.Random(20)
+        sut = CidrPool("10.0.0.0/8")
+        live = []
+        for _ in range(5000):
+            if live and rng.random() < 0.3:
+                sut.release(live.pop(rng.randrange(len(live))))
+            else:
+                live.append(sut.allocate(rng.randint(19, 28)))
+
+        networks = sorted(ipaddress.ip_network(block) for block in live)
+        for previous, current in zip(networks, networks[1:]):
+            self.assertFalse(previous.overlaps(current))
+        self.assertListEqual(sut.allocated, [str(network) for network in networks])
+        self.assertEqual(sut.free_addresses, (1 << 24) - sum(network.num_addresses for network in networks))
+
+    def test_ten_thousand_allocations(self):
+        sut = CidrPool("10.0.0.0/8")
+        blocks = [sut.allocate(22) for _ in range(10000)]
+
+        self.assertEqual(len(set(blocks)), 10000)
+        self.assertListEqual(sut.allocated, sorted(blocks, key=lambda block: ipaddress.ip_network(block)))
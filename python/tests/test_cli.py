@@ -0,0 +1,124 @@
+# Copyright 2018-2019, James Nugent.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can obtain
+# one at http://mozilla.org/MPL/2.0/.
+
+import io
+import json
+import os
+import tempfile
+import unittest
+from typing import List, Tuple
+from unittest import mock
+
+from jen20_pulumi_aws_vpc import SubnetDistributor, cli
+
+VPCS = """\
+base_cidr,az_count,name
+10.0.0.0/16,3,production
+
+# Staging shares production's supernet
+10.0.128.0/17,2,staging
+10.1.0.0/16,4,development
+"""
+
+
+def run(*argv: str, stdin: str = "") -> Tuple[int, List[dict], str]:
+    stdout, stderr = io.StringIO(), io.StringIO()
+    status = cli.main(list(argv), stdin=io.StringIO(stdin), stdout=stdout, stderr=stderr)
+    return status, [json.loads(line) for line in stdout.getvalue().splitlines()], stderr.getvalue()
+
+
+class PlanTests(unittest.TestCase):
+    def test_layouts(self):
+        status, layouts, errors = run("plan", stdin=VPCS)
+
+        self.assertEqual((status, errors), (0, ""))
+        self.assertListEqual([layout["name"] for layout in layouts], ["production", "staging", "development"])
+        for layout in layouts:
+            distributor = SubnetDistributor(layout["base_cidr"], layout["az_count"])
+            zones = layout["availability_zones"]
+            self.assertListEqual([zone["private"] for zone in zones], distributor.private_subnets)
+            self.assertListEqual([zone["public"] for zone in zones], distributor.public_subnets)
+
+        self.assertDictEqual(layouts[0]["availability_zones"][1], {
+            "index": 1,
+            "cidr_block": "10.0.64.0/18",
+            "private": "10.0.64.0/19",
+            "public": "10.0.96.0/20",
+            "spare": ["10.0.112.0/20"],
+        })
+
+    def test_headerless_input(self):
+        status, layouts, _ = run("plan", "--az-count", "2", stdin="10.0.0.0/16\n10.1.0.0/16,3,development\n")
+
+        self.assertEqual(status, 0)
+        self.assertListEqual([(layout["name"], layout["az_count"]) for layout in layouts],
+                             [("line 1", 2), ("development", 3)])
+
+    def test_invalid_rows_are_reported(self):
+        status, layouts, errors = run("plan", stdin="10.0.0.0/16,3\n10.0.0.1/16,3\n10.1.0.0/16\n10.2.0.0/16,none\n"
+                                                    "10.3.0.0/16,\u00b2\n10.4.0.0/16,0\n")
+
+        self.assertEqual(status, 1)
+        self.assertListEqual([layout["name"] for layout in layouts], ["line 1"])
+        self.assertListEqual([line.split(":")[0] for line in errors.splitlines()],
+                             ["line 2", "line 3", "line 4", "line 5", "line 6"])
+        self.assertIn("--az-count", errors.splitlines()[1])
+
+    def test_file_input(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "vpcs.csv")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(VPCS)
+
+            self.assertEqual(run("plan", path)[:2], run("plan", stdin=VPCS)[:2])
+            status, _, errors = run("plan", os.path.join(directory, "missing.csv"))
+            self.assertEqual(status, 2)
+            self.assertIn("missing.csv", errors)
+
+    def test_output_errors_are_not_reported_as_input_errors(self):
+        class ClosedPipe(io.StringIO):
+            def write(self, s):
+                raise BrokenPipeError()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "vpcs.csv")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(VPCS)
+
+            with self.assertRaises(BrokenPipeError):
+                cli.main(["plan", path], stdout=ClosedPipe(), stderr=io.StringIO())
+
+    def test_process_pool(self):
+        vpcs = "".join(f"10.{i}.0.0/16,{i % 4 + 1},vpc-{i}\n" for i in range(40))
+
+        with mock.patch.object(cli, "_MIN_ROWS_PER_PROCESS", 8):
+            pooled = run("plan", "--jobs", "2", stdin=vpcs)
+        self.assertTupleEqual(pooled, run("plan", "--jobs", "1", stdin=vpcs))
+        self.assertEqual(len(pooled[1]), 40)
+
+
+class CheckTests(unittest.TestCase):
+    def test_overlaps(self):
+        status, overlaps, errors = run("plan", "--check", stdin=VPCS + "10.0.0.0/24,1,shared-services\n")
+
+        self.assertEqual((status, errors), (1, ""))
+        self.assertListEqual(overlaps, [
+            {"name": "shared-services", "base_cidr": "10.0.0.0/24",
+             "overlaps": "production", "overlaps_base_cidr": "10.0.0.0/16"},
+            {"name": "staging", "base_cidr": "10.0.128.0/17",
+             "overlaps": "production", "overlaps_base_cidr": "10.0.0.0/16"},
+        ])
+
+    def test_no_overlaps(self):
+        self.assertTupleEqual(run("plan", "--check", stdin="10.0.0.0/16\n10.1.0.0/16\n"), (0, [], ""))
+
+    def test_invalid_rows_are_reported(self):
+        status, overlaps, errors = run("plan", "--check",
+                                       stdin="name,base_cidr\na,10.0.0.0/16\nb,nonsense\na,10.1.0.0/16\n")
+
+        self.assertEqual((status, overlaps), (1, []))
+        self.assertListEqual([line.split(":")[0] for line in errors.splitlines()], ["line 3", "line 4"])
+        self.assertIn("also named on line 2", errors)
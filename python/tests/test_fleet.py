@@ -0,0 +1,137 @@
+# Copyright 2018-2019, James Nugent.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can obtain
+# one at http://mozilla.org/MPL/2.0/.
+
+import ipaddress
+import random
+import unittest
+
+import pulumi
+import pulumi_aws
+
+from jen20_pulumi_aws_vpc import CidrPool, VpcArgs, VpcFleet, VpcFleetArgs
+from jen20_pulumi_aws_vpc.fleet_args import find_overlaps
+
+from .mocks import register
+
+
+def make_args(base_cidr: str, **kwargs) -> VpcArgs:
+    return VpcArgs(**{
+        "description": "Test",
+        "base_tags": {"Project": "Test"},
+        "base_cidr": base_cidr,
+        "availability_zone_count": 2,
+        **kwargs,
+    })
+
+
+class FindOverlapsTests(unittest.TestCase):
+    def test_overlaps(self):
+        self.assertListEqual(find_overlaps({
+            "a": "10.0.0.0/16",
+            "b": "10.1.0.0/16",
+            "c": "10.0.0.0/8",
+            "d": "10.1.128.0/17",
+            "e": "2001:db8::/56",
+            "f": "172.16.0.0/12",
+        }), [("c", "a"), ("c", "b"), ("c", "d")])
+        self.assertListEqual(find_overlaps({"a": "10.0.0.0/16", "b": "10.1.0.0/16", "c": "0::/0"}), [])
+
+    def test_every_overlapping_block_is_reported(self):
+        rng = random.Random(16)
+        for _ in range(500):
+            networks = {f"vpc-{i}": ipaddress.ip_network((rng.getrandbits(32) & 0x0fffffff, rng.randint(6, 16)),
+                                                         strict=False)
+                        for i in range(rng.randint(1, 30))}
+            overlapping = {name for name, network in networks.items()
+                           if any(other != name and network.overlaps(other_network)
+                                  for other, other_network in networks.items())}
+
+            overlaps = find_overlaps({name: str(network) for name, network in networks.items()})
+            self.assertSetEqual({name for pair in overlaps for name in pair}, overlapping)
+            for first, second in overlaps:
+                self.assertTrue(networks[first].overlaps(networks[second]))
+
+
+class VpcFleetArgsTests(unittest.TestCase):
+    def test_overlapping_vpcs_are_rejected(self):
+        with self.assertRaisesRegex(ValueError, "prod overlaps dev"):
+            VpcFleetArgs({"prod": make_args("10.0.0.0/16"), "dev": make_args("10.0.128.0/20")})
+
+    def test_from_supernet(self):
+        sut = VpcFleetArgs.from_supernet("10.0.0.0/8", 16, {
+            "prod": {"description": "Production", "region": "us-west-2"},
+            "staging": {"description": "Staging", "availability_zone_count": 3},
+            "dev": {"description": "Development"},
+        }, used=["10.1.0.0/16"], base_tags={"Project": "Test"}, availability_zone_count=2)
+
+        self.assertDictEqual({name: args.base_cidr for name, args in sut.vpcs.items()}, {
+            "prod": "10.0.0.0/16",
+            "staging": "10.2.0.0/16",
+            "dev": "10.3.0.0/16",
+        })
+        self.assertEqual(sut.vpcs["staging"].availability_zone_count, 3)
+        self.assertEqual(sut.vpcs["dev"].availability_zone_count, 2)
+        self.assertEqual(sut.vpcs["dev"].description, "Development")
+
+        plans = sut.plans("eu-west-1")
+        self.assertEqual(plans["prod"].endpoints[0].service_name, "com.amazonaws.us-west-2.s3")
+        self.assertEqual(plans["dev"].endpoints[0].service_name, "com.amazonaws.eu-west-1.s3")
+        self.assertEqual(len(plans["staging"].private_subnets), 3)
+        self.assertIsNone(sut.vpcs["dev"].region)
+
+
+class VpcFleetTests(unittest.TestCase):
+    def test_registers_vpcs_with_shared_zone_lookups(self):
+        components = []
+
+        def program():
+            provider = pulumi_aws.Provider("eu-west-1", region="eu-west-1")
+            components.append(VpcFleet("fleet", VpcFleetArgs({
+                "prod-usw2": make_args("10.0.0.0/16"),
+                "dev-usw2": make_args("10.1.0.0/16"),
+                "prod-euw1": make_args("10.2.0.0/16", region="eu-west-1"),
+                "dev-euw1": make_args("10.3.0.0/16", region="eu-west-1"),
+                "test-euw1": make_args("10.4.0.0/16", region="eu-west-1",
+                                       availability_zone_names=["eu-west-1a", "eu-west-1b"]),
+            }, providers={"eu-west-1": provider})))
+
+        mocks = register(program)
+        fleet = components[0]
+
+        self.assertListEqual(sorted("eu-west-1" in (call.provider or "") for call in mocks.calls), [False, True])
+        self.assertEqual(mocks.type_counts()["aws:ec2/vpc:Vpc"], 5)
+        self.assertListEqual(sorted(resource.name for resource in mocks.resources if resource.typ == "Vpc"),
+                             sorted(fleet.plans))
+        self.assertEqual(mocks.named("dev-usw2-private-subnet-1").inputs["availabilityZone"], "us-west-2b")
+        self.assertEqual(mocks.named("test-euw1-private-subnet-1").inputs["availabilityZone"], "eu-west-1b")
+        self.assertEqual(mocks.named("prod-euw1-s3-endpoint").inputs["serviceName"],
+                         "com.amazonaws.eu-west-1.s3")
+        self.assertIn("eu-west-1", mocks.named("prod-euw1-vpc").provider)
+        self.assertNotIn("eu-west-1", mocks.named("prod-usw2-vpc").provider or "")
+        self.assertIs(fleet.vpcs["dev-euw1"].plan, fleet.plans["dev-euw1"])
+
+    def test_region_of_explicit_provider(self):
+        def program(by_region=False):
+            provider = pulumi_aws.Provider("eu-west-1", region="eu-west-1")
+            VpcFleet("fleet", VpcFleetArgs({
+                "prod": make_args("10.0.0.0/16", region="us-east-1"),
+                "dev": make_args("10.1.0.0/16"),
+            }, providers={"eu-west-1": provider} if by_region else None),
+                opts=pulumi.ResourceOptions(provider=provider))
+
+        with self.assertRaisesRegex(ValueError, "must be given .*: dev"):
+            register(program)
+
+        mocks = register(lambda: program(by_region=True))
+        self.assertEqual(mocks.named("dev-s3-endpoint").inputs["serviceName"], "com.amazonaws.eu-west-1.s3")
+        self.assertEqual(mocks.named("prod-s3-endpoint").inputs["serviceName"], "com.amazonaws.us-east-1.s3")
+
+    def test_too_few_available_zones(self):
+        with self.assertRaises(ValueError):
+            register(lambda: VpcFleet("fleet", VpcFleetArgs({
+                "small": make_args("10.0.0.0/16"),
+                "large": make_args("10.1.0.0/16", availability_zone_count=5),
+            })))
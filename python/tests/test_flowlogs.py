@@ -0,0 +1,140 @@
+# Copyright 2018-2019, James Nugent.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can obtain
+# one at http://mozilla.org/MPL/2.0/.
+
+import gzip
+import io
+import os
+import tempfile
+import unittest
+
+from jen20_pulumi_aws_vpc import SubnetDistributor, VpcArgs, VpcPlan
+from jen20_pulumi_aws_vpc.flowlogs import (DEFAULT_FIELDS, BytesPerSubnet, RejectedFlows, TopFlows, TopTalkers,
+                                           aggregate, parse_format, read_flow_log)
+
+DEFAULT_RECORDS = """\
+2 123456789010 eni-1235b8ca123456789 10.0.0.10 172.31.16.21 20641 22 6 20 4249 1418530010 1418530070 ACCEPT OK
+2 123456789010 eni-1235b8ca123456789 172.31.16.21 10.0.0.10 22 20641 6 10 5060 1418530010 1418530070 ACCEPT OK
+2 123456789010 eni-1235b8ca123456789 172.31.9.69 10.0.0.10 49761 3389 6 20 4249 1418530010 1418530070 REJECT OK
+2 123456789010 eni-1235b8ca123456789 10.0.64.5 10.0.32.7 443 50000 6 5 1200 1418530010 1418530070 ACCEPT OK
+2 123456789010 eni-1a2b3c4d - - - - - - - 1431280876 1431280934 - NODATA
+"""
+
+V5_HEADER = "version vpc-id subnet-id srcaddr dstaddr bytes action flow-direction traffic-path"
+V5_RECORDS = """\
+5 vpc-0461a061 subnet-0b9c1c3d 10.0.0.10 52.95.128.1 1500 ACCEPT egress 8
+5 vpc-0461a061 subnet-0b9c1c3d 52.95.128.1 10.0.0.10 9000 ACCEPT ingress -
+"""
+
+
+def gzipped(text: str) -> bytes:
+    return gzip.compress(text.encode("utf-8"))
+
+
+class FlowLogParserTests(unittest.TestCase):
+    def test_default_format(self):
+        batches = list(read_flow_log(io.BytesIO(DEFAULT_RECORDS.encode("utf-8"))))
+        self.assertEqual(len(batches), 1)
+        batch = batches[0]
+
+        self.assertEqual(batch.fields, DEFAULT_FIELDS)
+        self.assertEqual(len(batch), 5)
+        self.assertListEqual(list(batch.column("bytes")), [4249, 5060, 4249, 1200, -1])
+        self.assertListEqual(batch.column("action"), ["ACCEPT", "ACCEPT", "REJECT", "ACCEPT", "-"])
+        self.assertEqual(batch.column("bytes").typecode, "q")
+        self.assertEqual(next(iter(batch))[:5], (2, "123456789010", "eni-1235b8ca123456789", "10.0.0.10",
+                                                 "172.31.16.21"))
+
+    def test_gzipped_file_with_header(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "flow.log.gz")
+            with open(path, "wb") as f:
+                f.write(gzipped(f"{V5_HEADER}\n{V5_RECORDS}"))
+
+            batch, = read_flow_log(path)
+
+        self.assertEqual(batch.fields, tuple(V5_HEADER.split()))
+        self.assertListEqual(batch.column("flow-direction"), ["egress", "ingress"])
+        self.assertListEqual(list(batch.column("traffic-path")), [8, -1])
+
+    def test_custom_format_without_header(self):
+        log_format = "${" + "} ${".join(V5_HEADER.split()) + "}"
+        self.assertEqual(parse_format(log_format), tuple(V5_HEADER.split()))
+
+        batch, = read_flow_log(io.BytesIO(gzipped(V5_RECORDS)), log_format=log_format)
+        self.assertListEqual(batch.column("vpc-id"), ["vpc-0461a061", "vpc-0461a061"])
+
+    def test_batches(self):
+        source = io.BytesIO("".join(DEFAULT_RECORDS.splitlines(keepends=True)[:4] * 5).encode("utf-8"))
+        self.assertListEqual([len(batch) for batch in read_flow_log(source, batch_size=7)], [7, 7, 6])
+
+    def test_skips_malformed_lines(self):
+        source = io.BytesIO(b"2 123456789010 eni-1235b8ca123456789 10.0.0.10\n" + DEFAULT_RECORDS.encode("utf-8"))
+        self.assertEqual(sum(len(batch) for batch in read_flow_log(source)), 5)
+
+    def test_does_not_close_file_objects(self):
+        source = io.BytesIO(DEFAULT_RECORDS.encode("utf-8"))
+        list(read_flow_log(source))
+        self.assertFalse(source.closed)
+
+    def test_empty(self):
+        self.assertListEqual(list(read_flow_log(io.BytesIO(b""))), [])
+
+
+class FlowLogAggregationTests(unittest.TestCase):
+    def batches(self):
+        return read_flow_log(io.BytesIO(DEFAULT_RECORDS.encode("utf-8")))
+
+    def test_top_talkers(self):
+        talkers, = aggregate(self.batches(), TopTalkers())
+        self.assertListEqual(talkers.top(2), [
+            (("172.31.16.21", "10.0.0.10"), 5060),
+            (("10.0.0.10", "172.31.16.21"), 4249),
+        ])
+        self.assertEqual(talkers.total, 14758)
+        self.assertEqual(talkers.error, 0)
+
+    def test_rejected_flows(self):
+        rejected, = aggregate(self.batches(), RejectedFlows())
+        self.assertListEqual(rejected.top(), [(("172.31.9.69", "10.0.0.10", 3389, 6), 1)])
+
+    def test_bounded_capacity_keeps_heavy_groups(self):
+        lines = [f"2 1 eni-1 10.0.{i // 256}.{i % 256} 10.1.0.1 1 2 6 1 10 0 60 ACCEPT OK" for i in range(5000)]
+        lines += ["2 1 eni-1 10.9.9.9 10.1.0.1 1 2 6 1 100000 0 60 ACCEPT OK"] * 3
+        sut = TopFlows(("srcaddr",), capacity=100)
+        aggregate(read_flow_log(io.BytesIO("\n".join(lines).encode("utf-8")), batch_size=512), sut)
+
+        self.assertLessEqual(len(sut.top(1000)), 100)
+        (key, total), = sut.top(1)
+        self.assertEqual(key, ("10.9.9.9",))
+        self.assertGreaterEqual(total, 300000 - sut.error)
+        self.assertLessEqual(sut.error, sut.total // 101)
+
+    def test_bytes_per_subnet_from_distributor(self):
+        sut, = aggregate(self.batches(), BytesPerSubnet.from_distributor(SubnetDistributor("10.0.0.0/16", 3)))
+
+        self.assertDictEqual(sut.sent, {
+            "public-0": 0, "public-1": 0, "public-2": 0,
+            "private-0": 4249, "private-1": 1200, "private-2": 0,
+        })
+        self.assertDictEqual(sut.received, {
+            "public-0": 1200, "public-1": 0, "public-2": 0,
+            "private-0": 9309, "private-1": 0, "private-2": 0,
+        })
+
+    def test_bytes_per_subnet_from_plan(self):
+        plan = VpcPlan.from_args("test", VpcArgs("Test", {}, "10.0.0.0/16", availability_zone_count=3,
+                                                 nat_gateways_per_az=2), "us-west-2")
+        sut = BytesPerSubnet.from_plan(plan)
+
+        self.assertEqual(sut.subnet_of("10.0.0.10"), "test-private-subnet-0-0")
+        self.assertEqual(sut.subnet_of("10.0.16.10"), "test-private-subnet-0-1")
+        self.assertEqual(sut.subnet_of("10.0.32.7"), "test-public-subnet-0")
+        self.assertIsNone(sut.subnet_of("10.0.48.1"))
+        self.assertIsNone(sut.subnet_of("2001:db8::1"))
+
+    def test_bytes_per_subnet_rejects_overlapping_subnets(self):
+        with self.assertRaises(ValueError):
+            BytesPerSubnet({"a": "10.0.0.0/16", "b": "10.0.128.0/17"})
@@ -0,0 +1,82 @@
+# Copyright 2018-2019, James Nugent.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can obtain
+# one at http://mozilla.org/MPL/2.0/.
+
+import unittest
+
+from jen20_pulumi_aws_vpc import Vpc, assume_role_policy_for_principal, policy_document, policy_statement
+
+from .mocks import register
+from .test_vpc import make_args
+
+FLOW_LOGS_ASSUME_ROLE_POLICY = (
+    '{"Statement":[{"Action":"sts:AssumeRole","Effect":"Allow",'
+    '"Principal":{"Service":"vpc-flow-logs.amazonaws.com"}}],"Version":"2012-10-17"}'
+)
+
+FLOW_LOGS_ROLE_POLICY = (
+    '{"Statement":[{"Action":["logs:CreateLogGroup","logs:CreateLogStream","logs:DescribeLogGroups",'
+    '"logs:DescribeLogStreams","logs:PutLogEvents"],"Effect":"Allow","Resource":"*"}],"Version":"2012-10-17"}'
+)
+
+
+class PolicyDocumentTests(unittest.TestCase):
+    def test_assume_role_policy(self):
+        self.assertEqual(assume_role_policy_for_principal({"Service": "vpc-flow-logs.amazonaws.com"}),
+                         FLOW_LOGS_ASSUME_ROLE_POLICY)
+        self.assertEqual(assume_role_policy_for_principal("*"),
+                         '{"Statement":[{"Action":"sts:AssumeRole","Effect":"Allow","Principal":"*"}],'
+                         '"Version":"2012-10-17"}')
+
+    def test_canonical_form(self):
+        self.assertEqual(
+            policy_document(policy_statement(
+                actions=["s3:PutObject", "s3:GetObject", "s3:PutObject"],
+                resources=["arn:aws:s3:::b/*", "arn:aws:s3:::a/*"],
+                principals={"Service": ["ec2.amazonaws.com", "delivery.logs.amazonaws.com"], "AWS": "123456789012"},
+                conditions={
+                    "StringEquals": {"aws:SourceAccount": "123456789012"},
+                    "ArnLike": {"aws:SourceArn": ["arn:aws:logs:*:123456789012:*", "arn:aws:ec2:*:123456789012:*"]},
+                },
+                effect="Deny",
+                sid="Logs",
+            )),
+            '{"Statement":[{"Action":["s3:GetObject","s3:PutObject"],'
+            '"Condition":{"ArnLike":{"aws:SourceArn":["arn:aws:ec2:*:123456789012:*",'
+            '"arn:aws:logs:*:123456789012:*"]},"StringEquals":{"aws:SourceAccount":"123456789012"}},'
+            '"Effect":"Deny","Principal":{"AWS":"123456789012","Service":["delivery.logs.amazonaws.com",'
+            '"ec2.amazonaws.com"]},"Resource":["arn:aws:s3:::a/*","arn:aws:s3:::b/*"],"Sid":"Logs"}],'
+            '"Version":"2012-10-17"}')
+
+    def test_statement_order_is_kept(self):
+        first = policy_statement("ec2:DescribeVpcs", "*")
+        second = policy_statement("ec2:DeleteVpc", "*", effect="Deny")
+
+        self.assertRegex(policy_document(first, second), r'"ec2:DescribeVpcs".*"ec2:DeleteVpc"')
+        self.assertRegex(policy_document(second, first), r'"ec2:DeleteVpc".*"ec2:DescribeVpcs"')
+
+    def test_equivalent_statements_are_equal(self):
+        first = policy_statement(["logs:PutLogEvents", "logs:CreateLogStream"], "*",
+                                 conditions={"Bool": {"aws:SecureTransport": "true"}, "IpAddress": {}})
+        second = policy_statement(("logs:CreateLogStream", "logs:PutLogEvents", "logs:CreateLogStream"), ["*"],
+                                  conditions={"IpAddress": {}, "Bool": {"aws:SecureTransport": ["true"]}})
+
+        self.assertEqual(first, second)
+        self.assertEqual(hash(first), hash(second))
+        self.assertIs(policy_document(first), policy_document(second))
+
+    def test_invalid_statements(self):
+        with self.assertRaisesRegex(ValueError, "effect must be"):
+            policy_statement("sts:AssumeRole", effect="allow")
+        with self.assertRaisesRegex(ValueError, "at least one action"):
+            policy_statement([])
+        with self.assertRaises(TypeError):
+            policy_statement("sts:AssumeRole", (), "*")
+
+    def test_flow_logs_policies(self):
+        mocks = register(lambda: Vpc("test", make_args()).enableFlowLoggingToCloudWatchLogs("ALL"))
+
+        self.assertEqual(mocks.named("test-flow-logs-role").inputs["assumeRolePolicy"], FLOW_LOGS_ASSUME_ROLE_POLICY)
+        self.assertEqual(mocks.named("test-flow-log-policy").inputs["policy"], FLOW_LOGS_ROLE_POLICY)
@@ -0,0 +1,42 @@
+# Copyright 2018-2019, James Nugent.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can obtain
+# one at http://mozilla.org/MPL/2.0/.
+
+import os
+import subprocess
+import sys
+import unittest
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def imported_pulumi_modules(statement: str) -> int:
+    completed = subprocess.run(
+        [sys.executable, "-c",
+         f"{statement}; import sys; print(sum(name.split('.')[0] in ('pulumi', 'pulumi_aws') for name in sys.modules))"],
+        cwd=PACKAGE_ROOT, capture_output=True, text=True, check=True)
+    return int(completed.stdout.strip())
+
+
+class ImportTests(unittest.TestCase):
+    def test_planning_does_not_import_pulumi(self):
+        self.assertEqual(imported_pulumi_modules(
+            "from jen20_pulumi_aws_vpc import CidrPool, SubnetDistributor, VpcArgs, VpcFleetArgs, VpcPlan; "
+            "VpcPlan.from_args('test', VpcArgs('Test', {}, '10.0.0.0/16', ['a', 'b']), 'us-west-2'); "
+            "VpcFleetArgs({'test': VpcArgs('Test', {}, '10.0.0.0/16', ['a', 'b'])}).plans('us-west-2')"), 0)
+
+    def test_cli_does_not_import_pulumi(self):
+        self.assertEqual(imported_pulumi_modules(
+            "import io, jen20_pulumi_aws_vpc.__main__; from jen20_pulumi_aws_vpc import cli; "
+            "cli.main(['plan', '--check'], stdin=io.StringIO('10.0.0.0/16,3'), stdout=io.StringIO()); "
+            "cli.main(['plan'], stdin=io.StringIO('10.0.0.0/16,3'), stdout=io.StringIO())"), 0)
+
+    def test_vpc_is_loaded_on_first_access(self):
+        self.assertGreater(imported_pulumi_modules("import jen20_pulumi_aws_vpc; jen20_pulumi_aws_vpc.Vpc"), 0)
+
+    def test_unknown_attribute(self):
+        import jen20_pulumi_aws_vpc  # pylint: disable=import-outside-toplevel
+        with self.assertRaises(AttributeError):
+            getattr(jen20_pulumi_aws_vpc, "NoSuchThing")
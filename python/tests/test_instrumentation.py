@@ -0,0 +1,123 @@
+# Copyright 2018-2019, James Nugent.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can obtain
+# one at http://mozilla.org/MPL/2.0/.
+
+import logging
+import unittest
+from unittest import mock
+
+from jen20_pulumi_aws_vpc import Instrumentation, Vpc
+
+from .mocks import register
+from .test_vpc import make_args
+
+
+class InstrumentationTests(unittest.TestCase):
+    def test_span(self):
+        instrumentation = Instrumentation()
+        with instrumentation.span("test", "operation", "outer"):
+            with instrumentation.span("test", "operation", "inner"):
+                pass
+
+        inner, outer = instrumentation.spans
+        self.assertEqual((inner.name, inner.depth), ("inner", 1))
+        self.assertEqual((outer.name, outer.depth), ("outer", 0))
+        self.assertGreaterEqual(outer.duration, inner.duration)
+
+    def test_span_is_recorded_on_error(self):
+        instrumentation = Instrumentation()
+        with self.assertRaises(ValueError):
+            with instrumentation.span("test", "operation", "failing"):
+                raise ValueError("failed")
+
+        self.assertListEqual([span.name for span in instrumentation.spans], ["failing"])
+        with instrumentation.span("test", "operation", "next"):
+            pass
+        self.assertEqual(instrumentation.spans[-1].depth, 0)
+
+    def test_register(self):
+        class Resource:
+            def __init__(self, resource_name, **kwargs):
+                self.name = resource_name
+                self.kwargs = kwargs
+
+        instrumentation = Instrumentation()
+        resource = instrumentation.register("test", Resource, "test-resource", name="inner")
+
+        self.assertEqual(resource.name, "test-resource")
+        self.assertDictEqual(resource.kwargs, {"name": "inner"})
+        span = instrumentation.spans[0]
+        self.assertEqual((span.kind, span.name, span.parent), ("resource", "test-resource", "test"))
+        self.assertTrue(span.type.endswith("Resource"))
+
+    def test_on_span_and_logger(self):
+        received = []
+        logger = logging.getLogger("jen20_pulumi_aws_vpc.tests")
+        instrumentation = Instrumentation(on_span=received.append, logger=logger, level=logging.INFO)
+
+        with self.assertLogs(logger, logging.INFO) as logs:
+            with instrumentation.span("test", "operation", "plan"):
+                pass
+
+        self.assertListEqual(received, instrumentation.spans)
+        self.assertRegex(logs.output[0], r"test operation plan took [0-9.]+ms")
+
+
+class VpcInstrumentationTests(unittest.TestCase):
+    def test_records_resource_registration(self):
+        instrumentation = Instrumentation()
+        components = []
+        register(lambda: components.append(Vpc("test", make_args(instrumentation=instrumentation))))
+        vpc = components[0]
+
+        resources = [span for span in instrumentation.spans if span.kind == "resource"]
+        self.assertListEqual(sorted(span.name for span in resources),
+                             sorted(resource.name for resource in vpc.plan.resources()))
+        self.assertTrue(all(span.depth == 1 for span in resources))
+
+        by_name = {span.name: span for span in resources}
+        self.assertEqual(by_name["test-vpc"].type, "aws:ec2/vpc:Vpc")
+        self.assertEqual(by_name["test-vpc"].parent, "test")
+        self.assertEqual(by_name["test-public-subnet-1"].parent, "test-vpc")
+
+    def test_records_plan_and_component(self):
+        instrumentation = Instrumentation()
+        register(lambda: Vpc("test", make_args(instrumentation=instrumentation)))
+
+        plan = next(span for span in instrumentation.spans if span.kind == "operation")
+        component = instrumentation.spans[-1]
+        self.assertEqual((plan.name, plan.depth), ("plan", 1))
+        self.assertEqual((component.kind, component.name, component.depth), ("component", "Vpc", 0))
+        self.assertTrue(all(span.start >= component.start for span in instrumentation.spans))
+
+    def test_records_methods(self):
+        instrumentation = Instrumentation()
+        register(lambda: Vpc("test", make_args(instrumentation=instrumentation)).enableFlowLoggingToCloudWatchLogs(
+            "ALL"))
+
+        method = instrumentation.spans[-1]
+        self.assertEqual((method.kind, method.name, method.depth),
+                         ("operation", "enableFlowLoggingToCloudWatchLogs", 0))
+        nested = [span.name for span in instrumentation.spans if span.start >= method.start]
+        self.assertListEqual(nested[:-1], ["test-flow-logs-role", "test-vpc-flow-logs", "test-flow-log-policy",
+                                           "test-flow-logs"])
+
+    def test_summary(self):
+        instrumentation = Instrumentation()
+        components = []
+        register(lambda: components.append(Vpc("test", make_args(instrumentation=instrumentation))))
+
+        summary = instrumentation.summary()["test"]
+        self.assertEqual(summary.resource_count, len(list(components[0].plan.resources())))
+        self.assertListEqual(list(summary.operations), ["plan"])
+        self.assertGreater(summary.elapsed, summary.registration)
+        self.assertGreater(summary.registration, 0)
+
+    def test_uninstrumented_vpc_records_nothing(self):
+        with mock.patch.object(Instrumentation, "register", side_effect=AssertionError("register called")), \
+                mock.patch.object(Instrumentation, "span", side_effect=AssertionError("span called")):
+            mocks = register(lambda: Vpc("test", make_args()).enableFlowLoggingToCloudWatchLogs("ALL"))
+
+        self.assertIsNotNone(mocks.named("test-flow-logs"))
@@ -0,0 +1,303 @@
+# Copyright 2018-2019, James Nugent.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can obtain
+# one at http://mozilla.org/MPL/2.0/.
+
+import unittest
+
+from jen20_pulumi_aws_vpc import NatStrategy, SubnetRouting, SubnetTier, VpcArgs
+from jen20_pulumi_aws_vpc.plan import PlanChange, VpcPlan
+from jen20_pulumi_aws_vpc.subnet_layout import DEFAULT_TIERS
+
+
+def make_args(**kwargs) -> VpcArgs:
+    return VpcArgs(**{
+        "description": "Test",
+        "base_tags": {"Project": "Test"},
+        "base_cidr": "10.0.0.0/16",
+        "availability_zone_names": ["us-west-2a", "us-west-2b", "us-west-2c"],
+        **kwargs,
+    })
+
+
+class VpcPlanTests(unittest.TestCase):
+    def test_plan_layout(self):
+        sut = VpcPlan.from_args("test", make_args(), "us-west-2")
+
+        self.assertEqual(sut.cidr_block, "10.0.0.0/16")
+        self.assertListEqual([subnet.cidr_block for subnet in sut.private_subnets], [
+            "10.0.0.0/19",
+            "10.0.64.0/19",
+            "10.0.128.0/19",
+        ])
+        self.assertListEqual([subnet.cidr_block for subnet in sut.public_subnets], [
+            "10.0.32.0/20",
+            "10.0.96.0/20",
+            "10.0.160.0/20",
+        ])
+        self.assertListEqual([nat.public_subnet_index for nat in sut.nat_gateways], [0, 1, 2])
+        self.assertListEqual([rt.associations for rt in sut.private_route_tables], [
+            (("test-private-rta-1", 0),),
+            (("test-private-rta-2", 1),),
+            (("test-private-rta-3", 2),),
+        ])
+        self.assertListEqual([endpoint.service_name for endpoint in sut.endpoints], [
+            "com.amazonaws.us-west-2.s3",
+            "com.amazonaws.us-west-2.dynamodb",
+        ])
+        self.assertDictEqual(sut.tags(sut.vpc_name_tag), {"Project": "Test", "Name": "Test VPC"})
+
+    def test_plan_resource_count(self):
+        sut = VpcPlan.from_args("test", make_args(create_dynamodb_endpoint=False), "us-west-2")
+        # VPC, IGW, 6 subnets, 3 EIPs, 3 NATs, 4 route tables, 4 routes, 6 associations, 1 endpoint
+        self.assertEqual(len(list(sut.resources())), 29)
+
+    def test_plans_are_memoized_and_hashable(self):
+        first = VpcPlan.from_args("test", make_args(), "us-west-2")
+        second = VpcPlan.from_args("test", make_args(base_tags={"Project": "Test"}), "us-west-2")
+        self.assertIs(first, second)
+        self.assertEqual(len({first, second}), 1)
+
+    def test_diff_of_identical_plans_is_empty(self):
+        plan = VpcPlan.from_args("test", make_args(), "us-west-2")
+        self.assertListEqual(plan.diff(plan), [])
+
+    def test_diff_tag_change_is_update(self):
+        before = VpcPlan.from_args("test", make_args(), "us-west-2")
+        after = VpcPlan.from_args("test", make_args(base_tags={"Project": "Other"}), "us-west-2")
+        changes = before.diff(after)
+        self.assertTrue(changes)
+        self.assertTrue(all(change.action == "update" and change.properties == ("tags",) for change in changes))
+
+    def test_diff_readdressing_is_replace(self):
+        before = VpcPlan.from_args("test", make_args(availability_zone_names=["a", "b"]), "us-west-2")
+        after = VpcPlan.from_args("test", make_args(), "us-west-2")
+        changes = {change.name: change for change in before.diff(after)}
+
+        self.assertEqual(changes["test-private-subnet-0"],
+                         PlanChange("test-private-subnet-0", "aws:ec2/subnet:Subnet", "replace", ("cidr_block",)))
+        self.assertEqual(changes["test-private-subnet-2"].action, "create")
+        self.assertEqual(changes["test-nat-gateway-3"].action, "create")
+        self.assertEqual(changes["test-s3-endpoint"].action, "update")
+        self.assertNotIn("test-vpc", changes)
+
+    def test_diff_single_nat_gateway(self):
+        before = VpcPlan.from_args("test", make_args(), "us-west-2")
+        after = VpcPlan.from_args("test", make_args(nat_strategy=NatStrategy.SINGLE), "us-west-2")
+        changes = {change.name: change.action for change in before.diff(after)}
+        self.assertDictEqual(changes, {
+            "test-nat-2": "delete",
+            "test-nat-3": "delete",
+            "test-nat-gateway-2": "delete",
+            "test-nat-gateway-3": "delete",
+            "test-private-rt-2": "delete",
+            "test-private-rt-3": "delete",
+            "test-private-rta-2": "replace",
+            "test-private-rta-3": "replace",
+            "test-route-private-sn-to-nat-2": "delete",
+            "test-route-private-sn-to-nat-3": "delete",
+            "test-s3-endpoint": "update",
+            "test-dynamodb-endpoint": "update",
+        })
+
+    def test_diff_nat_gateway_allocation_and_subnet_are_replace(self):
+        before = VpcPlan.from_args("test", make_args(), "us-west-2")
+        nat_gateway = before.nat_gateways[0]
+
+        for replaced, properties in ((nat_gateway._replace(eip_resource_name="test-nat-1-b"), ("allocation",)),
+                                     (nat_gateway._replace(public_subnet_index=1), ("subnet",))):
+            after = before._replace(nat_gateways=(replaced,) + before.nat_gateways[1:])
+            changes = {change.name: change for change in before.diff(after)}
+            self.assertEqual(changes["test-nat-gateway-1"],
+                             PlanChange("test-nat-gateway-1", "aws:ec2/natGateway:NatGateway", "replace", properties))
+
+    def test_diff_route_destination_is_replace(self):
+        before = VpcPlan.from_args("test", make_args(enable_ipv6=True), "us-west-2")
+        route_table = before.private_route_tables[0]
+        after = before._replace(private_route_tables=(
+            route_table._replace(nat_gateway_index=None, ipv6_default_route_name=route_table.default_route_name),
+        ) + before.private_route_tables[1:])
+
+        changes = {change.name: change for change in before.diff(after)}
+        self.assertEqual(changes["test-route-private-sn-to-nat-1"],
+                         PlanChange("test-route-private-sn-to-nat-1", "aws:ec2/route:Route", "replace",
+                                    ("destination_cidr_block", "destination_ipv6_cidr_block", "target")))
+
+    def test_diff_security_group_description_is_replace(self):
+        before = VpcPlan.from_args("test", make_args(interface_endpoints=["sts"]), "us-west-2")
+        after = VpcPlan.from_args("test", make_args(interface_endpoints=["sts"], description="Other"), "us-west-2")
+
+        changes = {change.name: change for change in before.diff(after)}
+        self.assertEqual(changes["test-endpoints-sg"],
+                         PlanChange("test-endpoints-sg", "aws:ec2/securityGroup:SecurityGroup", "replace",
+                                    ("description", "tags")))
+        self.assertEqual(changes["test-sts-interface-endpoint"].action, "update")
+
+    def test_nat_gateways_per_az_splits_private_subnets(self):
+        sut = VpcPlan.from_args("test", make_args(nat_gateways_per_az=3), "us-west-2")
+
+        self.assertListEqual([subnet.cidr_block for subnet in sut.private_subnets[:4]], [
+            "10.0.0.0/21",
+            "10.0.8.0/21",
+            "10.0.16.0/21",
+            "10.0.64.0/21",
+        ])
+        self.assertListEqual([subnet.availability_zone_index for subnet in sut.private_subnets],
+                             [0, 0, 0, 1, 1, 1, 2, 2, 2])
+        self.assertListEqual([nat.resource_name for nat in sut.nat_gateways[:4]], [
+            "test-nat-gateway-1-1",
+            "test-nat-gateway-1-2",
+            "test-nat-gateway-1-3",
+            "test-nat-gateway-2-1",
+        ])
+        self.assertListEqual([nat.public_subnet_index for nat in sut.nat_gateways], [0, 0, 0, 1, 1, 1, 2, 2, 2])
+        self.assertEqual(sut.private_route_tables[4].associations, (("test-private-rta-2-2", 4),))
+
+    def test_interface_endpoints(self):
+        sut = VpcPlan.from_args("test", make_args(interface_endpoints=["ecr.api", "com.amazonaws.us-west-2.sts"],
+                                                  nat_gateways_per_az=2), "us-west-2")
+
+        self.assertEqual(sut.interface_endpoint_security_group.resource_name, "test-endpoints-sg")
+        self.assertListEqual([(endpoint.resource_name, endpoint.service_name)
+                              for endpoint in sut.interface_endpoints], [
+            ("test-ecr-api-interface-endpoint", "com.amazonaws.us-west-2.ecr.api"),
+            ("test-sts-interface-endpoint", "com.amazonaws.us-west-2.sts"),
+        ])
+        self.assertEqual(sut.interface_endpoints[0].subnet_indices, (0, 2, 4))
+
+        changes = VpcPlan.from_args("test", make_args(), "us-west-2").diff(
+            VpcPlan.from_args("test", make_args(interface_endpoints=["sts"]), "us-west-2"))
+        self.assertDictEqual({change.name: change.action for change in changes}, {
+            "test-endpoints-sg": "create",
+            "test-sts-interface-endpoint": "create",
+        })
+
+    def test_subnet_tiers(self):
+        sut = VpcPlan.from_args("test", make_args(nat_strategy=NatStrategy.PER_N_AZS, subnet_tiers=[
+            SubnetTier("private", SubnetRouting.PRIVATE, new_bits=1),
+            SubnetTier("public", SubnetRouting.PUBLIC, prefix_length=24),
+            SubnetTier("pods", SubnetRouting.PRIVATE, new_bits=2),
+            SubnetTier("database", SubnetRouting.ISOLATED, new_bits=3),
+        ]), "us-west-2")
+
+        self.assertListEqual([subnet.resource_name for subnet in sut.private_subnets], [
+            "test-private-subnet-0", "test-private-subnet-1", "test-private-subnet-2",
+            "test-pods-subnet-0", "test-pods-subnet-1", "test-pods-subnet-2",
+        ])
+        self.assertEqual(sut.private_subnets[3].cidr_block, "10.0.48.0/20")
+        self.assertEqual(sut.private_subnets[3].name_tag, "Test Pods Subnet 0")
+        self.assertEqual(sut.public_subnets[1].cidr_block, "10.0.96.0/24")
+        self.assertEqual(sut.private_route_tables[0].associations, (
+            ("test-private-rta-1", 0),
+            ("test-private-rta-2", 1),
+            ("test-pods-rta-1", 3),
+            ("test-pods-rta-2", 4),
+        ))
+
+        route_table, = sut.isolated_route_tables
+        self.assertEqual(route_table.resource_name, "test-database-rt")
+        self.assertEqual(route_table.name_tag, "Test Database Route Table")
+        self.assertIsNone(route_table.default_route_name)
+        self.assertListEqual([sut.isolated_subnets[i].resource_name for _, i in route_table.associations],
+                             ["test-database-subnet-0", "test-database-subnet-1", "test-database-subnet-2"])
+
+    def test_tier_resource_names_must_not_collide(self):
+        args = make_args(subnet_tiers=[
+            SubnetTier("web", SubnetRouting.PUBLIC, new_bits=2),
+            SubnetTier("private", SubnetRouting.PRIVATE, new_bits=1),
+            SubnetTier("public", SubnetRouting.ISOLATED, new_bits=3),
+        ])
+        with self.assertRaisesRegex(ValueError, "'test-public-rt'"):
+            VpcPlan.from_args("test", args, "us-west-2")
+
+    def test_appended_tier_only_creates_resources(self):
+        before = VpcPlan.from_args("test", make_args(), "us-west-2")
+        after = VpcPlan.from_args("test", make_args(subnet_tiers=DEFAULT_TIERS + (
+            SubnetTier("database", SubnetRouting.ISOLATED, prefix_length=22),
+        )), "us-west-2")
+        self.assertSetEqual({change.action for change in before.diff(after)}, {"create", "update"})
+        self.assertSetEqual({change.name for change in before.diff(after) if change.action == "update"},
+                            {"test-s3-endpoint", "test-dynamodb-endpoint"})
+
+    def test_dual_stack(self):
+        sut = VpcPlan.from_args("test", make_args(enable_ipv6=True, nat_strategy=NatStrategy.SINGLE), "us-west-2")
+
+        self.assertListEqual([subnet.ipv6_subnet_number for subnet in sut.private_subnets], [0, 64, 128])
+        self.assertListEqual([subnet.ipv6_subnet_number for subnet in sut.public_subnets], [32, 96, 160])
+        self.assertEqual(sut.egress_only_internet_gateway_resource_name, "test-eigw")
+        self.assertEqual(sut.public_route_table.ipv6_default_route_name, "test-route-public-sn-to-ig-ipv6")
+        self.assertEqual(sut.private_route_tables[0].ipv6_default_route_name, "test-route-private-sn-to-eigw-1")
+
+        routes = {resource.name: dict(resource.properties) for resource in sut.resources()
+                  if resource.type == "aws:ec2/route:Route"}
+        self.assertDictEqual(routes["test-route-private-sn-to-eigw-1"],
+                             {"destination_ipv6_cidr_block": "::/0", "target": "test-eigw"})
+        self.assertDictEqual(routes["test-route-public-sn-to-ig-ipv6"],
+                             {"destination_ipv6_cidr_block": "::/0", "target": "test-igw"})
+
+    def test_enabling_ipv6_updates_in_place(self):
+        before = VpcPlan.from_args("test", make_args(), "us-west-2")
+        after = VpcPlan.from_args("test", make_args(enable_ipv6=True), "us-west-2")
+        changes = {change.name: change for change in before.diff(after)}
+
+        self.assertEqual(changes["test-vpc"].action, "update")
+        self.assertEqual(changes["test-private-subnet-1"], PlanChange("test-private-subnet-1", "aws:ec2/subnet:Subnet",
+                                                                      "update", ("ipv6_subnet_number",)))
+        self.assertSetEqual({change.name for change in changes.values() if change.action == "create"}, {
+            "test-eigw",
+            "test-route-public-sn-to-ig-ipv6",
+            "test-route-private-sn-to-eigw-1",
+            "test-route-private-sn-to-eigw-2",
+            "test-route-private-sn-to-eigw-3",
+        })
+        self.assertFalse(any(change.action in ("delete", "replace") for change in changes.values()))
+
+    def test_ipv6_subnets_too_close_together(self):
+        with self.assertRaises(ValueError):
+            VpcPlan.from_args("test", make_args(enable_ipv6=True, availability_zone_names=[f"az-{i}" for i in range(9)],
+                                                subnet_tiers=DEFAULT_TIERS + (
+                                                    SubnetTier("a", SubnetRouting.ISOLATED, prefix_length=28),
+                                                    SubnetTier("b", SubnetRouting.ISOLATED, prefix_length=28),
+                                                )), "us-west-2")
+
+
+class VpcArgsTests(unittest.TestCase):
+    def test_availability_zone_count_defaults_to_names(self):
+        self.assertEqual(make_args().availability_zone_count, 3)
+
+    def test_availability_zone_count_required_without_names_list(self):
+        with self.assertRaises(ValueError):
+            make_args(availability_zone_names=None)
+
+    def test_availability_zone_count_exceeds_names(self):
+        with self.assertRaises(ValueError):
+            make_args(availability_zone_count=4)
+
+    def test_plan_depends_only_on_availability_zone_count(self):
+        by_names = VpcPlan.from_args("test", make_args(), "us-west-2")
+        by_count = VpcPlan.from_args("test", make_args(availability_zone_names=None, availability_zone_count=3),
+                                     "us-west-2")
+        self.assertIs(by_names, by_count)
+
+    def test_subnet_tiers_require_public_and_private_tiers(self):
+        with self.assertRaises(ValueError):
+            make_args(subnet_tiers=[SubnetTier("private", SubnetRouting.PRIVATE, new_bits=1)])
+        with self.assertRaises(ValueError):
+            make_args(subnet_tiers=[SubnetTier("public", SubnetRouting.PUBLIC, new_bits=1)])
+
+    def test_duplicate_interface_endpoints(self):
+        with self.assertRaises(ValueError):
+            make_args(interface_endpoints=["sts", "logs", "sts"])
+
+    def test_invalid_nat_strategy(self):
+        with self.assertRaises(ValueError):
+            make_args(nat_strategy="per_subnet")
+        with self.assertRaises(ValueError):
+            make_args(nat_strategy=NatStrategy.PER_N_AZS, azs_per_nat_gateway=0)
+
+    def test_nat_gateways_per_az_requires_per_az_strategy(self):
+        with self.assertRaises(ValueError):
+            make_args(nat_strategy=NatStrategy.SINGLE, nat_gateways_per_az=2)
+        with self.assertRaises(ValueError):
+            make_args(nat_gateways_per_az=0)
@@ -0,0 +1,104 @@
+# Copyright 2018-2019, James Nugent.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can obtain
+# one at http://mozilla.org/MPL/2.0/.
+
+import bisect
+import ipaddress
+import random
+import unittest
+
+from jen20_pulumi_aws_vpc import CidrPool, summarise_routes
+
+
+def networks(cidrs):
+    return [ipaddress.ip_network(cidr) for cidr in cidrs]
+
+
+class SummariseRoutesTests(unittest.TestCase):
+    def test_merges_adjacent_and_nested_blocks(self):
+        self.assertListEqual(summarise_routes(["10.1.0.0/16", "10.2.0.0/16", "10.3.0.0/16", "10.3.4.0/24"],
+                                              local=["10.0.0.0/16"]), [
+            "10.1.0.0/16",
+            "10.2.0.0/15",
+        ])
+
+    def test_covers_unused_addresses_within(self):
+        self.assertListEqual(summarise_routes(["10.1.0.0/16", "10.3.0.0/16", "10.6.0.0/16"],
+                                              local=["10.0.0.0/16"],
+                                              excluded=["10.5.0.0/16"],
+                                              within=["10.0.0.0/8"]), [
+            "10.1.0.0/16",
+            "10.2.0.0/15",
+            "10.6.0.0/15",
+        ])
+
+    def test_single_route_without_conflicts(self):
+        self.assertListEqual(summarise_routes(["10.1.0.0/16", "10.200.0.0/16"], local=["172.16.0.0/16"],
+                                              within=["10.0.0.0/8"]), ["10.0.0.0/8"])
+
+    def test_ipv6(self):
+        self.assertListEqual(summarise_routes(["2001:db8:0:100::/56", "10.1.0.0/16", "2001:db8:0:200::/56"],
+                                              local=["2001:db8::/56"], within=["2001:db8::/48"]), [
+            "10.1.0.0/16",
+            "2001:db8:0:100::/56",
+            "2001:db8:0:200::/55",
+        ])
+
+    def test_peer_overlapping_local_block(self):
+        with self.assertRaises(ValueError):
+            summarise_routes(["10.0.128.0/17"], local=["10.0.0.0/16"])
+        with self.assertRaises(ValueError):
+            summarise_routes(["10.0.0.0/8"], excluded=["10.9.0.0/16"])
+
+    def test_empty(self):
+        self.assertListEqual(summarise_routes([], local=["10.0.0.0/16"]), [])
+
+    def test_exact_summary_matches_collapse_addresses(self):
+        rng = random.Random(13)
+        for _ in range(200):
+            peers = [str(ipaddress.ip_network((rng.getrandbits(32), rng.randint(8, 30)), strict=False))
+                     for _ in range(rng.randint(1, 40))]
+            self.assertListEqual(networks(summarise_routes(peers)),
+                                 list(ipaddress.collapse_addresses(networks(peers))))
+
+    def test_property_coverage_and_no_overlap(self):
+        rng = random.Random(42)
+        for _ in range(200):
+            pool = CidrPool("10.0.0.0/8")
+            blocks = [pool.allocate(rng.randint(12, 24)) for _ in range(rng.randint(2, 60))]
+            rng.shuffle(blocks)
+            local, excluded, peers = blocks[:1], blocks[1:rng.randint(1, len(blocks) - 1)], \
+                blocks[rng.randint(1, len(blocks) - 1):]
+            peers = [peer for peer in peers if peer not in excluded]
+            within = rng.choice([None, ["10.0.0.0/8"], ["10.0.0.0/9", "10.192.0.0/10"]])
+
+            summary = networks(summarise_routes(peers, local, excluded, within))
+            allowed = list(ipaddress.collapse_addresses(networks(peers + (within or []))))
+            forbidden = networks(local + excluded)
+
+            for route in summary:
+                self.assertFalse(any(route.overlaps(block) for block in forbidden), route)
+                self.assertTrue(any(route.subnet_of(block) for block in allowed), route)
+            for a, b in zip(summary, summary[1:]):
+                self.assertFalse(a.overlaps(b))
+            for peer in networks(peers):
+                self.assertTrue(any(peer.subnet_of(route) for route in summary), peer)
+            self.assertLessEqual(len(summary), len(list(ipaddress.collapse_addresses(networks(peers)))))
+
+    def test_ten_thousand_prefixes(self):
+        pool = CidrPool("10.0.0.0/8")
+        blocks = [pool.allocate(24) for _ in range(20000)]
+        random.Random(0).shuffle(blocks)
+
+        summary = summarise_routes(blocks[:10000], local=blocks[10000:10001], excluded=blocks[10001:],
+                                   within=["10.0.0.0/8"])
+
+        self.assertLessEqual(len(summary), 10000)
+        # Routes do not overlap each other, so each blocked block need only be compared with its neighbours
+        routes = sorted(networks(summary))
+        starts = [route.network_address for route in routes]
+        for blocked in networks(blocks[10000:]):
+            i = bisect.bisect_right(starts, blocked.network_address)
+            self.assertFalse(any(route.overlaps(blocked) for route in routes[max(i - 1, 0):i + 1]), blocked)
@@ -4,6 +4,8 @@
 # v. 2.0. If a copy of the MPL was not distributed with this file, You can obtain
 # one at http://mozilla.org/MPL/2.0/.
 
+import ipaddress
+import math
 import unittest
 
 from jen20_pulumi_aws_vpc import SubnetDistributor
@@ -39,3 +41,76 @@ class SubnetDistributorTests(unittest.TestCase):
             "10.0.10.0/24",
             "10.0.14.0/24",
         ])
+
+    def test_distribution_single_az(self):
+        sut = SubnetDistributor("10.0.0.0/16", 1)
+        self.assertListEqual(sut.private_subnets, ["10.0.0.0/17"])
+        self.assertListEqual(sut.public_subnets, ["10.0.128.0/18"])
+
+    def test_distribution_ipv6(self):
+        sut = SubnetDistributor("2001:db8::/48", 3)
+        self.assertListEqual(sut.private_subnets, [
+            "2001:db8::/51",
+            "2001:db8:0:4000::/51",
+            "2001:db8:0:8000::/51",
+        ])
+        self.assertListEqual(sut.public_subnets, [
+            "2001:db8:0:2000::/52",
+            "2001:db8:0:6000::/52",
+            "2001:db8:0:a000::/52",
+        ])
+
+    def test_distribution_matches_enumerated_subnets(self):
+        def cidr_subnet(base, prefix_extension, subnet_number):
+            return str(list(ipaddress.ip_network(base).subnets(prefix_extension))[subnet_number])
+
+        for prefix_length in range(8, 27):
+            base_cidr = f"10.0.0.0/{prefix_length}"
+            for az_count in range(1, 17):
+                new_bits_per_az = int(math.log(1 << (az_count - 1).bit_length(), 2))
+                if prefix_length + new_bits_per_az + 2 > 32:
+                    continue
+                az_bases = [cidr_subnet(base_cidr, new_bits_per_az, i) for i in range(az_count)]
+
+                sut = SubnetDistributor(base_cidr, az_count)
+                self.assertListEqual(sut.private_subnets, [cidr_subnet(block, 1, 0) for block in az_bases])
+                self.assertListEqual(sut.public_subnets,
+                                     [cidr_subnet(cidr_subnet(block, 1, 1), 1, 0) for block in az_bases])
+
+    def test_ipv6_subnets(self):
+        sut = SubnetDistributor("10.0.0.0/16", 3)
+        self.assertListEqual(sut.private_ipv6_subnets("2600:1f14:abc:de00::/56"), [
+            "2600:1f14:abc:de00::/64",
+            "2600:1f14:abc:de40::/64",
+            "2600:1f14:abc:de80::/64",
+        ])
+        self.assertListEqual(sut.public_ipv6_subnets("2600:1f14:abc:de00::/56"), [
+            "2600:1f14:abc:de20::/64",
+            "2600:1f14:abc:de60::/64",
+            "2600:1f14:abc:dea0::/64",
+        ])
+
+    def test_ipv6_subnets_match_enumerated_subnets(self):
+        ipv6_block = ipaddress.ip_network("2001:db8:1234:5600::/56")
+        ipv6_subnets = list(ipv6_block.subnets(new_prefix=64))
+
+        for prefix_length in range(8, 27):
+            base = ipaddress.ip_network(f"10.0.0.0/{prefix_length}")
+            for az_count in range(1, 17):
+                zones = 1 << (az_count - 1).bit_length()
+                if prefix_length + zones.bit_length() + 1 > 32:
+                    continue
+                az_blocks = list(base.subnets(new_prefix=prefix_length + zones.bit_length() - 1))
+                share = len(ipv6_subnets) // zones
+
+                sut = SubnetDistributor(str(base), az_count)
+                expected = []
+                for cidr in sut.private_subnets + sut.public_subnets:
+                    subnet = ipaddress.ip_network(cidr)
+                    az_index = next(i for i, block in enumerate(az_blocks) if subnet.subnet_of(block))
+                    offset = int(subnet.network_address) - int(az_blocks[az_index].network_address)
+                    expected.append(str(ipv6_subnets[az_index * share + offset * share // az_blocks[0].num_addresses]))
+
+                actual = sut.private_ipv6_subnets(str(ipv6_block)) + sut.public_ipv6_subnets(str(ipv6_block))
+                self.assertListEqual(actual, expected)
+                self.assertEqual(len(set(actual)), len(actual))
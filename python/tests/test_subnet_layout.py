@@ -0,0 +1,193 @@
+# Copyright 2018-2019, James Nugent.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can obtain
+# one at http://mozilla.org/MPL/2.0/.
+
+import ipaddress
+import random
+import unittest
+
+from jen20_pulumi_aws_vpc import SubnetDistributor, SubnetLayout, SubnetRouting, SubnetTier
+from jen20_pulumi_aws_vpc.subnet_layout import DEFAULT_TIERS, ipv6_subnet
+
+EKS_TIERS = [
+    SubnetTier("private", SubnetRouting.PRIVATE, new_bits=1),
+    SubnetTier("public", SubnetRouting.PUBLIC, prefix_length=24),
+    SubnetTier("database", SubnetRouting.ISOLATED, new_bits=3),
+]
+
+
+class SubnetLayoutTests(unittest.TestCase):
+    def test_default_tiers_match_original_layout(self):
+        for base_cidr in ("10.0.0.0/16", "10.100.0.0/20", "172.16.0.0/12", "10.0.0.0/24", "2001:db8::/56"):
+            for az_count in range(1, 17):
+                base = ipaddress.ip_network(base_cidr)
+                az_blocks = list(base.subnets(prefixlen_diff=((1 << (az_count - 1).bit_length()) - 1).bit_length()))
+                sut = SubnetLayout(base_cidr, az_count)
+                self.assertListEqual(sut.subnets("private"),
+                                     [str(list(block.subnets(1))[0]) for block in az_blocks[:az_count]])
+                self.assertListEqual(sut.subnets("public"),
+                                     [str(list(block.subnets(2))[2]) for block in az_blocks[:az_count]])
+                self.assertListEqual(SubnetDistributor(base_cidr, az_count).public_subnets, sut.subnets("public"))
+
+    def test_spare_blocks(self):
+        sut = SubnetLayout("10.0.0.0/16", 3, DEFAULT_TIERS)
+        self.assertListEqual([[str(block) for block in blocks] for blocks in sut.spare_blocks],
+                             [["10.0.48.0/20"], ["10.0.112.0/20"], ["10.0.176.0/20"]])
+
+    def test_tiers_with_absolute_sizes(self):
+        sut = SubnetLayout("10.0.0.0/16", 3, EKS_TIERS)
+        self.assertListEqual(sut.subnets("private"), ["10.0.0.0/19", "10.0.64.0/19", "10.0.128.0/19"])
+        self.assertListEqual(sut.subnets("public"), ["10.0.32.0/24", "10.0.96.0/24", "10.0.160.0/24"])
+        self.assertListEqual(sut.subnets("database"), ["10.0.40.0/21", "10.0.104.0/21", "10.0.168.0/21"])
+        self.assertListEqual([str(block) for block in sut.spare_blocks[0]], [
+            "10.0.33.0/24",
+            "10.0.34.0/23",
+            "10.0.36.0/22",
+            "10.0.48.0/20",
+        ])
+
+    def test_appending_tiers_does_not_readdress(self):
+        before = SubnetLayout("10.0.0.0/16", 4, DEFAULT_TIERS)
+        after = SubnetLayout("10.0.0.0/16", 4, DEFAULT_TIERS + (
+            SubnetTier("database", SubnetRouting.ISOLATED, prefix_length=22),
+            SubnetTier("cache", SubnetRouting.ISOLATED, prefix_length=23),
+        ))
+
+        for tier in DEFAULT_TIERS:
+            self.assertListEqual(after.subnets(tier.name), before.subnets(tier.name))
+        for i, spare in enumerate(before.spare_blocks):
+            self.assertTrue(spare[0].contains(after.blocks["database"][i]))
+            self.assertTrue(spare[0].contains(after.blocks["cache"][i]))
+
+    def test_ipv6_subnet_numbers_mirror_layout(self):
+        sut = SubnetLayout("10.0.0.0/16", 3, EKS_TIERS)
+        self.assertListEqual([sut.ipv6_subnet_number(block) for block in sut.blocks["private"]], [0, 64, 128])
+        self.assertListEqual([sut.ipv6_subnet_number(block) for block in sut.blocks["public"]], [32, 96, 160])
+        self.assertListEqual([sut.ipv6_subnet_number(block) for block in sut.blocks["database"]], [40, 104, 168])
+
+        appended = SubnetLayout("10.0.0.0/16", 3, EKS_TIERS + [SubnetTier("cache", SubnetRouting.ISOLATED,
+                                                                           prefix_length=22)])
+        for tier in EKS_TIERS:
+            self.assertListEqual([appended.ipv6_subnet_number(block) for block in appended.blocks[tier.name]],
+                                 [sut.ipv6_subnet_number(block) for block in sut.blocks[tier.name]])
+
+    def test_ipv6_subnet(self):
+        self.assertEqual(ipv6_subnet("2001:db8:0:ff00::/56", 0), "2001:db8:0:ff00::/64")
+        self.assertEqual(ipv6_subnet("2001:db8:0:ff00::/56", 255), "2001:db8:0:ffff::/64")
+        with self.assertRaises(ValueError):
+            ipv6_subnet("2001:db8:0:ff00::/56", 256)
+
+    def test_weighted_tiers_fill_zone(self):
+        sut = SubnetLayout("10.0.0.0/16", 2, [
+            SubnetTier("public", SubnetRouting.PUBLIC, prefix_length=22),
+            SubnetTier("private", SubnetRouting.PRIVATE, weight=4),
+            SubnetTier("pods", SubnetRouting.PRIVATE, weight=2),
+            SubnetTier("database", SubnetRouting.ISOLATED, weight=1),
+        ])
+        self.assertListEqual(sut.subnets("public"), ["10.0.0.0/22", "10.0.128.0/22"])
+        self.assertListEqual(sut.subnets("private"), ["10.0.64.0/18", "10.0.192.0/18"])
+        self.assertListEqual(sut.subnets("pods"), ["10.0.32.0/19", "10.0.160.0/19"])
+        self.assertListEqual(sut.subnets("database"), ["10.0.16.0/20", "10.0.144.0/20"])
+        self.assertListEqual([str(block) for block in sut.spare_blocks[0]],
+                             ["10.0.4.0/22", "10.0.8.0/21"])
+
+    def test_appending_to_weighted_tiers_does_not_re_address(self):
+        tiers = [
+            SubnetTier("public", SubnetRouting.PUBLIC, prefix_length=22),
+            SubnetTier("private", SubnetRouting.PRIVATE, weight=4),
+            SubnetTier("pods", SubnetRouting.PRIVATE, weight=2),
+            SubnetTier("database", SubnetRouting.ISOLATED, weight=1),
+        ]
+        before = SubnetLayout("10.0.0.0/16", 2, tiers)
+        after = SubnetLayout("10.0.0.0/16", 2, tiers + [SubnetTier("cache", SubnetRouting.ISOLATED, prefix_length=22)])
+
+        for tier in tiers:
+            self.assertListEqual(after.blocks[tier.name], before.blocks[tier.name])
+        self.assertListEqual(after.subnets("cache"), ["10.0.4.0/22", "10.0.132.0/22"])
+
+        # Weighted tiers are not shrunk to make room
+        weighted = [
+            SubnetTier("public", SubnetRouting.PUBLIC, new_bits=2),
+            SubnetTier("private", SubnetRouting.PRIVATE, weight=3),
+            SubnetTier("data", SubnetRouting.ISOLATED, weight=1),
+        ]
+        before = SubnetLayout("10.0.0.0/16", 1, weighted)
+        after = SubnetLayout("10.0.0.0/16", 1, weighted + [SubnetTier("db", SubnetRouting.ISOLATED, new_bits=3)])
+        self.assertListEqual(before.subnets("data"), ["10.0.64.0/19"])
+        for tier in weighted:
+            self.assertListEqual(after.blocks[tier.name], before.blocks[tier.name])
+        with self.assertRaises(ValueError):
+            SubnetLayout("10.0.0.0/16", 1, weighted + [SubnetTier("db", SubnetRouting.ISOLATED, new_bits=1)])
+
+    def test_weighted_tiers_are_not_rounded_up(self):
+        sut = SubnetLayout("10.0.0.0/16", 1, [
+            SubnetTier("private", SubnetRouting.PRIVATE, weight=3),
+            SubnetTier("data", SubnetRouting.ISOLATED, weight=1),
+        ])
+        self.assertListEqual(sut.subnets("private"), ["10.0.0.0/17"])
+        self.assertListEqual(sut.subnets("data"), ["10.0.128.0/18"])
+        self.assertListEqual([str(block) for block in sut.spare_blocks[0]], ["10.0.192.0/18"])
+
+        sut = SubnetLayout("10.0.0.0/16", 1, [
+            SubnetTier("a", SubnetRouting.PRIVATE, weight=1),
+            SubnetTier("b", SubnetRouting.PRIVATE, weight=1),
+            SubnetTier("c", SubnetRouting.PRIVATE, weight=1),
+        ])
+        self.assertListEqual([sut.subnets(name)[0] for name in "abc"], ["10.0.0.0/18", "10.0.64.0/18", "10.0.128.0/18"])
+        self.assertListEqual([str(block) for block in sut.spare_blocks[0]], ["10.0.192.0/18"])
+
+    def test_random_appended_tiers_do_not_re_address(self):
+        rng = random.Random(15)
+        for _ in range(300):
+            tiers = []
+            for i in range(rng.randint(1, 5)):
+                size = rng.choice([{"new_bits": rng.randint(2, 6)}, {"prefix_length": rng.randint(22, 26)},
+                                   {"weight": rng.uniform(0.1, 10)}])
+                tiers.append(SubnetTier(f"tier-{i}", rng.choice(SubnetRouting.ALL), **size))
+            appended = SubnetTier("appended", SubnetRouting.ISOLATED, prefix_length=rng.randint(20, 28))
+            try:
+                before = SubnetLayout("10.0.0.0/16", 3, tiers)
+                after = SubnetLayout("10.0.0.0/16", 3, tiers + [appended])
+            except ValueError:
+                continue
+
+            for tier in tiers:
+                self.assertListEqual(after.blocks[tier.name], before.blocks[tier.name])
+
+    def test_random_tiers_do_not_overlap(self):
+        rng = random.Random(14)
+        for _ in range(300):
+            tiers = []
+            for i in range(rng.randint(1, 6)):
+                size = rng.choice([{"new_bits": rng.randint(2, 6)}, {"prefix_length": rng.randint(22, 26)},
+                                   {"weight": rng.uniform(0.1, 10)}])
+                tiers.append(SubnetTier(f"tier-{i}", rng.choice(SubnetRouting.ALL), **size))
+            az_count = rng.randint(1, 6)
+            try:
+                sut = SubnetLayout("10.0.0.0/16", az_count, tiers)
+            except ValueError:
+                continue
+
+            for i, az_block in enumerate(sut.az_blocks):
+                blocks = [sut.blocks[tier.name][i] for tier in tiers] + sut.spare_blocks[i]
+                self.assertEqual(sum(block.num_addresses for block in blocks), az_block.num_addresses)
+                for block in blocks:
+                    self.assertTrue(az_block.contains(block))
+                for a in blocks:
+                    self.assertEqual(sum(a.overlaps(b) for b in blocks), 1)
+
+    def test_invalid_tiers(self):
+        for tiers in (
+                [SubnetTier("a", new_bits=1), SubnetTier("a", new_bits=2)],
+                [SubnetTier("a", new_bits=1, weight=1)],
+                [SubnetTier("a")],
+                [SubnetTier("a", routing="transit", new_bits=1)],
+                [SubnetTier("a", new_bits=1), SubnetTier("b", new_bits=1), SubnetTier("c", new_bits=2)],
+                [SubnetTier("a", prefix_length=16)],
+                [SubnetTier("a", new_bits=0), SubnetTier("b", weight=1)],
+                [SubnetTier("a", weight=0)],
+        ):
+            with self.subTest(tiers=tiers), self.assertRaises(ValueError):
+                SubnetLayout("10.0.0.0/16", 3, tiers)
@@ -0,0 +1,399 @@
+# Copyright 2018-2019, James Nugent.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can obtain
+# one at http://mozilla.org/MPL/2.0/.
+
+import itertools
+import unittest
+from unittest import mock
+
+import pulumi
+
+from jen20_pulumi_aws_vpc import NatStrategy, SubnetRouting, SubnetTier, Vpc, VpcArgs
+from jen20_pulumi_aws_vpc import vpc as vpc_module
+
+from .mocks import IPV6_CIDR_BLOCK, register
+
+
+def make_args(**kwargs) -> VpcArgs:
+    return VpcArgs(**{
+        "description": "Test",
+        "base_tags": {"Project": "Test"},
+        "base_cidr": "10.0.0.0/16",
+        "availability_zone_names": ["us-west-2a", "us-west-2b", "us-west-2c"],
+        **kwargs,
+    })
+
+
+class VpcTests(unittest.TestCase):
+    def test_registers_planned_resources(self):
+        components = []
+        mocks = register(lambda: components.append(Vpc("test", make_args())))
+        vpc = components[0]
+
+        self.assertListEqual(sorted(resource.name for resource in mocks.resources if resource.custom),
+                             sorted(resource.name for resource in vpc.plan.resources()))
+        self.assertEqual(mocks.type_counts()["aws:ec2/natGateway:NatGateway"], 3)
+
+    def test_subnets(self):
+        mocks = register(lambda: Vpc("test", make_args()))
+
+        public = mocks.named("test-public-subnet-1").inputs
+        self.assertEqual(public["cidrBlock"], "10.0.96.0/20")
+        self.assertEqual(public["availabilityZone"], "us-west-2b")
+        self.assertTrue(public["mapPublicIpOnLaunch"])
+        self.assertDictEqual(public["tags"], {"Project": "Test", "Name": "Test Public Subnet 1"})
+
+        private = mocks.named("test-private-subnet-2").inputs
+        self.assertEqual(private["cidrBlock"], "10.0.128.0/19")
+        self.assertEqual(private["availabilityZone"], "us-west-2c")
+        self.assertNotIn("mapPublicIpOnLaunch", private)
+
+    def test_private_routing(self):
+        mocks = register(lambda: Vpc("test", make_args()))
+
+        self.assertEqual(mocks.named("test-nat-gateway-2").inputs["subnetId"], "test-public-subnet-1-id")
+        self.assertEqual(mocks.named("test-route-private-sn-to-nat-2").inputs["natGatewayId"], "test-nat-gateway-2-id")
+        self.assertEqual(mocks.named("test-private-rta-3").inputs["subnetId"], "test-private-subnet-2-id")
+
+    def test_endpoints_are_optional(self):
+        mocks = register(lambda: Vpc("test", make_args(create_s3_endpoint=False, create_dynamodb_endpoint=False)))
+        self.assertListEqual(mocks.of_type("aws:ec2/vpcEndpoint:VpcEndpoint"), [])
+
+    def test_availability_zones_are_looked_up_when_omitted(self):
+        mocks = register(lambda: Vpc("test", make_args(availability_zone_names=None, availability_zone_count=2)))
+
+        subnets = mocks.of_type("aws:ec2/subnet:Subnet")
+        self.assertListEqual([subnet.inputs["availabilityZone"] for subnet in subnets],
+                             ["us-west-2a", "us-west-2b", "us-west-2a", "us-west-2b"])
+        self.assertListEqual([subnet.inputs["cidrBlock"] for subnet in subnets],
+                             ["10.0.64.0/19", "10.0.192.0/19", "10.0.0.0/18", "10.0.128.0/18"])
+
+    def test_availability_zone_names_output(self):
+        def program():
+            names = pulumi.Output.from_input(["eu-west-1a", "eu-west-1b", "eu-west-1c"])
+            Vpc("test", make_args(availability_zone_names=names, availability_zone_count=3))
+
+        mocks = register(program)
+        self.assertEqual(mocks.named("test-private-subnet-2").inputs["availabilityZone"], "eu-west-1c")
+        self.assertEqual(mocks.named("test-private-subnet-2").inputs["cidrBlock"], "10.0.128.0/19")
+
+    def test_too_few_available_zones(self):
+        with self.assertRaises(ValueError):
+            register(lambda: Vpc("test", make_args(availability_zone_names=None, availability_zone_count=5)))
+
+
+class VpcNatStrategyTests(unittest.TestCase):
+    def assert_nat_resources(self, mocks, nat_gateways: int, route_tables: int):
+        counts = mocks.type_counts()
+        self.assertEqual(counts["aws:ec2/eip:Eip"], nat_gateways)
+        self.assertEqual(counts["aws:ec2/natGateway:NatGateway"], nat_gateways)
+        self.assertEqual(counts["aws:ec2/routeTable:RouteTable"], route_tables)
+        self.assertEqual(counts["aws:ec2/route:Route"], nat_gateways + 1)
+        self.assertEqual(counts["aws:ec2/routeTableAssociation:RouteTableAssociation"], 6)
+
+    def test_per_az(self):
+        mocks = register(lambda: Vpc("test", make_args(nat_strategy=NatStrategy.PER_AZ)))
+        self.assert_nat_resources(mocks, nat_gateways=3, route_tables=3)
+        self.assertEqual(len([resource for resource in mocks.resources if resource.custom]), 30)
+
+    def test_single(self):
+        mocks = register(lambda: Vpc("test", make_args(nat_strategy=NatStrategy.SINGLE)))
+        self.assert_nat_resources(mocks, nat_gateways=1, route_tables=1)
+        self.assertEqual(len([resource for resource in mocks.resources if resource.custom]), 22)
+
+        self.assertEqual(mocks.named("test-nat-gateway-1").inputs["subnetId"], "test-public-subnet-0-id")
+        for association in ("test-private-rta-1", "test-private-rta-2", "test-private-rta-3"):
+            self.assertEqual(mocks.named(association).inputs["routeTableId"], "test-private-rt-1-id")
+
+    def test_per_n_azs(self):
+        mocks = register(lambda: Vpc("test", make_args(nat_strategy=NatStrategy.PER_N_AZS, azs_per_nat_gateway=2)))
+        self.assert_nat_resources(mocks, nat_gateways=2, route_tables=2)
+        self.assertEqual(len([resource for resource in mocks.resources if resource.custom]), 26)
+
+        self.assertEqual(mocks.named("test-nat-gateway-2").inputs["subnetId"], "test-public-subnet-2-id")
+        self.assertEqual(mocks.named("test-private-rta-2").inputs["routeTableId"], "test-private-rt-1-id")
+        self.assertEqual(mocks.named("test-private-rta-3").inputs["routeTableId"], "test-private-rt-2-id")
+
+    def test_none(self):
+        mocks = register(lambda: Vpc("test", make_args(nat_strategy=NatStrategy.NONE)))
+        self.assert_nat_resources(mocks, nat_gateways=0, route_tables=1)
+        self.assertEqual(len([resource for resource in mocks.resources if resource.custom]), 19)
+        self.assertEqual(mocks.named("test-s3-endpoint").inputs["routeTableIds"],
+                         ["test-public-rt-id", "test-private-rt-1-id"])
+
+    def test_multiple_nat_gateways_per_az(self):
+        mocks = register(lambda: Vpc("test", make_args(nat_gateways_per_az=2)))
+        counts = mocks.type_counts()
+        self.assertEqual(counts["aws:ec2/natGateway:NatGateway"], 6)
+        self.assertEqual(counts["aws:ec2/routeTable:RouteTable"], 6)
+        self.assertEqual(counts["aws:ec2/subnet:Subnet"], 9)
+
+        self.assertEqual(mocks.named("test-private-subnet-1-1").inputs["cidrBlock"], "10.0.80.0/20")
+        self.assertEqual(mocks.named("test-private-subnet-1-1").inputs["availabilityZone"], "us-west-2b")
+        self.assertEqual(mocks.named("test-nat-gateway-2-2").inputs["subnetId"], "test-public-subnet-1-id")
+        self.assertEqual(mocks.named("test-route-private-sn-to-nat-2-2").inputs["natGatewayId"],
+                         "test-nat-gateway-2-2-id")
+        self.assertEqual(mocks.named("test-private-rta-2-2").inputs["subnetId"], "test-private-subnet-1-1-id")
+
+
+class VpcNatGatewayAlarmTests(unittest.TestCase):
+    def test_alarms_for_each_nat_gateway(self):
+        mocks = register(lambda: Vpc("test", make_args(nat_strategy=NatStrategy.PER_N_AZS,
+                                                       nat_gateway_alarms=True,
+                                                       nat_gateway_alarm_actions=["arn:aws:sns:us-west-2:1:alerts"])))
+        alarms = mocks.of_type("aws:cloudwatch/metricAlarm:MetricAlarm")
+        self.assertListEqual(sorted(alarm.name for alarm in alarms), [
+            "test-nat-gateway-1-bandwidth-alarm",
+            "test-nat-gateway-1-packet-drop-alarm",
+            "test-nat-gateway-1-port-allocation-alarm",
+            "test-nat-gateway-2-bandwidth-alarm",
+            "test-nat-gateway-2-packet-drop-alarm",
+            "test-nat-gateway-2-port-allocation-alarm",
+        ])
+
+        port_allocation = mocks.named("test-nat-gateway-1-port-allocation-alarm").inputs
+        self.assertEqual(port_allocation["metricName"], "ErrorPortAllocation")
+        self.assertDictEqual(port_allocation["dimensions"], {"NatGatewayId": "test-nat-gateway-1-id"})
+        self.assertEqual(port_allocation["threshold"], 0)
+        self.assertListEqual(port_allocation["alarmActions"], ["arn:aws:sns:us-west-2:1:alerts"])
+
+        packet_drop = mocks.named("test-nat-gateway-2-packet-drop-alarm").inputs
+        self.assertListEqual([query["id"] for query in packet_drop["metricQueries"]],
+                             ["dropped", "from_source", "from_destination", "drop_percentage"])
+        self.assertEqual(packet_drop["metricQueries"][0]["metric"]["dimensions"],
+                         {"NatGatewayId": "test-nat-gateway-2-id"})
+        self.assertEqual(packet_drop["threshold"], 0.01)
+
+        self.assertEqual(mocks.named("test-nat-gateway-2-bandwidth-alarm").inputs["threshold"], 80)
+
+    def test_alarms_are_optional(self):
+        mocks = register(lambda: Vpc("test", make_args()))
+        self.assertListEqual(mocks.of_type("aws:cloudwatch/metricAlarm:MetricAlarm"), [])
+
+
+class VpcInterfaceEndpointTests(unittest.TestCase):
+    def test_interface_endpoints_share_security_group(self):
+        mocks = register(lambda: Vpc("test", make_args(interface_endpoints=["ecr.api", "ecr.dkr", "logs"])))
+
+        security_groups = mocks.of_type("aws:ec2/securityGroup:SecurityGroup")
+        self.assertEqual(len(security_groups), 1)
+        self.assertEqual(security_groups[0].inputs["vpcId"], "test-vpc-id")
+        ingress = security_groups[0].inputs["ingress"]
+        self.assertEqual(len(ingress), 1)
+        self.assertEqual((ingress[0]["protocol"], ingress[0]["fromPort"], ingress[0]["toPort"]), ("tcp", 443, 443))
+        self.assertListEqual(ingress[0]["cidrBlocks"], ["10.0.0.0/16"])
+        self.assertNotIn("ipv6CidrBlocks", ingress[0])
+
+        endpoints = [endpoint for endpoint in mocks.of_type("aws:ec2/vpcEndpoint:VpcEndpoint")
+                     if endpoint.inputs.get("vpcEndpointType") == "Interface"]
+        self.assertListEqual(sorted(endpoint.name for endpoint in endpoints), [
+            "test-ecr-api-interface-endpoint",
+            "test-ecr-dkr-interface-endpoint",
+            "test-logs-interface-endpoint",
+        ])
+        for endpoint in endpoints:
+            self.assertTrue(endpoint.inputs["privateDnsEnabled"])
+            self.assertListEqual(endpoint.inputs["subnetIds"], [
+                "test-private-subnet-0-id",
+                "test-private-subnet-1-id",
+                "test-private-subnet-2-id",
+            ])
+            self.assertListEqual(endpoint.inputs["securityGroupIds"], ["test-endpoints-sg-id"])
+            self.assertNotIn("routeTableIds", endpoint.inputs)
+
+    def test_security_group_admits_ipv6(self):
+        mocks = register(lambda: Vpc("test", make_args(interface_endpoints=["sts"], enable_ipv6=True)))
+
+        ingress = mocks.named("test-endpoints-sg").inputs["ingress"]
+        self.assertEqual(len(ingress), 1)
+        self.assertListEqual(ingress[0]["cidrBlocks"], ["10.0.0.0/16"])
+        self.assertListEqual(ingress[0]["ipv6CidrBlocks"], [IPV6_CIDR_BLOCK])
+
+    def test_no_interface_endpoints_by_default(self):
+        mocks = register(lambda: Vpc("test", make_args()))
+        self.assertListEqual(mocks.of_type("aws:ec2/securityGroup:SecurityGroup"), [])
+
+
+class VpcFlowLogTests(unittest.TestCase):
+    def test_s3_destination_options(self):
+        for file_format, hive_compatible_partitions, per_hour_partition, max_aggregation_interval, log_format in \
+                itertools.product(("parquet", "plain-text"), (True, False), (True, False), (60, 600),
+                                  (None, "${version} ${srcaddr} ${dstaddr} ${bytes}")):
+            with self.subTest(file_format=file_format, hive_compatible_partitions=hive_compatible_partitions,
+                              per_hour_partition=per_hour_partition, max_aggregation_interval=max_aggregation_interval,
+                              log_format=log_format):
+                mocks = register(lambda: Vpc("test", make_args()).enableFlowLoggingToS3(
+                    "arn:aws:s3:::flow-logs", "ALL",
+                    file_format=file_format,
+                    hive_compatible_partitions=hive_compatible_partitions,
+                    per_hour_partition=per_hour_partition,
+                    max_aggregation_interval=max_aggregation_interval,
+                    log_format=log_format))
+
+                flow_log = mocks.named("test-flow-logs").inputs
+                self.assertEqual(flow_log["logDestination"], "arn:aws:s3:::flow-logs")
+                self.assertEqual(flow_log["logDestinationType"], "s3")
+                self.assertEqual(flow_log["maxAggregationInterval"], max_aggregation_interval)
+                self.assertEqual(flow_log.get("logFormat"), log_format)
+                if file_format == "plain-text" and not hive_compatible_partitions and not per_hour_partition:
+                    self.assertNotIn("destinationOptions", flow_log)
+                else:
+                    self.assertDictEqual(flow_log["destinationOptions"], {
+                        "fileFormat": file_format,
+                        "hiveCompatiblePartitions": hive_compatible_partitions,
+                        "perHourPartition": per_hour_partition,
+                    })
+
+    def test_s3_defaults(self):
+        mocks = register(lambda: Vpc("test", make_args()).enableFlowLoggingToS3("arn:aws:s3:::flow-logs", "ALL"))
+        flow_log = mocks.named("test-flow-logs").inputs
+        self.assertNotIn("destinationOptions", flow_log)
+        self.assertEqual(flow_log["maxAggregationInterval"], 600)
+
+    def test_s3_without_destination_options_support(self):
+        def program():
+            vpc = Vpc("test", make_args())
+            vpc.enableFlowLoggingToS3("arn:aws:s3:::flow-logs", "ALL")
+            with self.assertRaises(ValueError):
+                vpc.enableFlowLoggingToS3("arn:aws:s3:::flow-logs", "ALL", file_format="parquet")
+
+        with mock.patch.object(vpc_module, "FlowLogDestinationOptionsArgs", None):
+            mocks = register(program)
+        self.assertNotIn("destinationOptions", mocks.named("test-flow-logs").inputs)
+
+    def test_cloudwatch_logs_options(self):
+        for retention_in_days, kms_key_id, max_aggregation_interval, log_format in \
+                itertools.product((None, 7, 90), (None, "arn:aws:kms:us-west-2:1:key/flow-logs"), (60, 600),
+                                  (None, "${version} ${srcaddr} ${dstaddr} ${bytes}")):
+            with self.subTest(retention_in_days=retention_in_days, kms_key_id=kms_key_id,
+                              max_aggregation_interval=max_aggregation_interval, log_format=log_format):
+                mocks = register(lambda: Vpc("test", make_args()).enableFlowLoggingToCloudWatchLogs(
+                    "REJECT",
+                    retention_in_days=retention_in_days,
+                    kms_key_id=kms_key_id,
+                    max_aggregation_interval=max_aggregation_interval,
+                    log_format=log_format))
+
+                log_group = mocks.named("test-vpc-flow-logs").inputs
+                self.assertEqual(log_group.get("retentionInDays"), retention_in_days)
+                self.assertEqual(log_group.get("kmsKeyId"), kms_key_id)
+
+                flow_log = mocks.named("test-flow-logs").inputs
+                self.assertEqual(flow_log["trafficType"], "REJECT")
+                self.assertEqual(flow_log["maxAggregationInterval"], max_aggregation_interval)
+                self.assertEqual(flow_log.get("logFormat"), log_format)
+                self.assertNotIn("destinationOptions", flow_log)
+
+    def test_cloudwatch_logs_default_retention(self):
+        mocks = register(lambda: Vpc("test", make_args()).enableFlowLoggingToCloudWatchLogs("ALL"))
+        self.assertNotIn("retentionInDays", mocks.named("test-vpc-flow-logs").inputs)
+
+    def test_invalid_options(self):
+        def program():
+            vpc = Vpc("test", make_args())
+            with self.assertRaises(ValueError):
+                vpc.enableFlowLoggingToS3("arn:aws:s3:::flow-logs", "ALL", file_format="csv")
+            with self.assertRaises(ValueError):
+                vpc.enableFlowLoggingToS3("arn:aws:s3:::flow-logs", "ALL", max_aggregation_interval=300)
+            with self.assertRaises(ValueError):
+                vpc.enableFlowLoggingToCloudWatchLogs("ALL", retention_in_days=10)
+
+        register(program)
+
+
+class VpcSummarisedRouteTests(unittest.TestCase):
+    def test_routes_added_to_every_route_table(self):
+        routes = []
+        mocks = register(lambda: routes.extend(Vpc("test", make_args()).addSummarisedRoutes(
+            "tgw",
+            ["10.1.0.0/16", "10.2.0.0/16", "10.3.0.0/16"],
+            transit_gateway_id="tgw-1234")))
+
+        self.assertEqual(len(routes), 8)
+        route = mocks.named("test-private-rt-2-tgw-10.2.0.0-15").inputs
+        self.assertDictEqual(route, {
+            "routeTableId": "test-private-rt-2-id",
+            "destinationCidrBlock": "10.2.0.0/15",
+            "transitGatewayId": "tgw-1234",
+        })
+        self.assertEqual(mocks.named("test-public-rt-tgw-10.1.0.0-16").inputs["routeTableId"], "test-public-rt-id")
+
+    def test_private_only(self):
+        mocks = register(lambda: Vpc("test", make_args(nat_strategy=NatStrategy.SINGLE)).addSummarisedRoutes(
+            "peering", ["10.8.0.0/16", "10.9.0.0/16"], within_cidrs=["10.0.0.0/8"], public=False,
+            vpc_peering_connection_id="pcx-1234"))
+
+        routes = [route for route in mocks.of_type("aws:ec2/route:Route") if "-peering-" in route.name]
+        self.assertListEqual([route.name for route in routes], ["test-private-rt-1-peering-10.8.0.0-13"])
+
+    def test_requires_one_target(self):
+        def program():
+            vpc = Vpc("test", make_args())
+            with self.assertRaises(ValueError):
+                vpc.addSummarisedRoutes("tgw", ["10.1.0.0/16"])
+            with self.assertRaises(ValueError):
+                vpc.addSummarisedRoutes("tgw", ["10.1.0.0/16"], transit_gateway_id="tgw-1", gateway_id="igw-1")
+            with self.assertRaises(ValueError):
+                vpc.addSummarisedRoutes("tgw", ["10.0.128.0/17"], transit_gateway_id="tgw-1")
+
+        register(program)
+
+
+class VpcSubnetTierTests(unittest.TestCase):
+    def test_creates_subnets_and_route_tables_for_each_tier(self):
+        mocks = register(lambda: Vpc("test", make_args(subnet_tiers=[
+            SubnetTier("private", SubnetRouting.PRIVATE, new_bits=1),
+            SubnetTier("public", SubnetRouting.PUBLIC, prefix_length=24),
+            SubnetTier("pods", SubnetRouting.PRIVATE, new_bits=2),
+            SubnetTier("database", SubnetRouting.ISOLATED, new_bits=3),
+        ])))
+
+        counts = mocks.type_counts()
+        self.assertEqual(counts["aws:ec2/subnet:Subnet"], 12)
+        self.assertEqual(counts["aws:ec2/routeTable:RouteTable"], 4)
+        self.assertEqual(counts["aws:ec2/routeTableAssociation:RouteTableAssociation"], 12)
+
+        self.assertEqual(mocks.named("test-pods-subnet-1").inputs["cidrBlock"], "10.0.112.0/20")
+        self.assertEqual(mocks.named("test-pods-rta-2").inputs["routeTableId"], "test-private-rt-2-id")
+        self.assertEqual(mocks.named("test-database-subnet-2").inputs["cidrBlock"], "10.0.168.0/21")
+        self.assertNotIn("mapPublicIpOnLaunch", mocks.named("test-database-subnet-2").inputs)
+        self.assertEqual(mocks.named("test-database-rta-3").inputs["subnetId"], "test-database-subnet-2-id")
+        self.assertEqual(mocks.named("test-database-rta-3").inputs["routeTableId"], "test-database-rt-id")
+        self.assertFalse(any(route.inputs["routeTableId"] == "test-database-rt-id"
+                             for route in mocks.of_type("aws:ec2/route:Route")))
+        self.assertIn("test-database-rt-id", mocks.named("test-s3-endpoint").inputs["routeTableIds"])
+
+
+class VpcIpv6Tests(unittest.TestCase):
+    def test_dual_stack(self):
+        mocks = register(lambda: Vpc("test", make_args(enable_ipv6=True)))
+
+        self.assertTrue(mocks.named("test-vpc").inputs["assignGeneratedIpv6CidrBlock"])
+        private = mocks.named("test-private-subnet-1").inputs
+        self.assertEqual(private["ipv6CidrBlock"], "2600:1f14:abc:de40::/64")
+        self.assertTrue(private["assignIpv6AddressOnCreation"])
+        self.assertEqual(mocks.named("test-public-subnet-2").inputs["ipv6CidrBlock"], "2600:1f14:abc:dea0::/64")
+
+        self.assertEqual(mocks.named("test-eigw").inputs["vpcId"], "test-vpc-id")
+        route = mocks.named("test-route-private-sn-to-eigw-2").inputs
+        self.assertEqual(route["routeTableId"], "test-private-rt-2-id")
+        self.assertEqual(route["destinationIpv6CidrBlock"], "::/0")
+        self.assertEqual(route["egressOnlyGatewayId"], "test-eigw-id")
+        self.assertEqual(mocks.named("test-route-public-sn-to-ig-ipv6").inputs["gatewayId"], "test-igw-id")
+
+    def test_ipv6_without_nat_gateways(self):
+        mocks = register(lambda: Vpc("test", make_args(enable_ipv6=True, nat_strategy=NatStrategy.NONE)))
+
+        counts = mocks.type_counts()
+        self.assertEqual(counts["aws:ec2/natGateway:NatGateway"], 0)
+        self.assertEqual(counts["aws:ec2/egressOnlyInternetGateway:EgressOnlyInternetGateway"], 1)
+        self.assertEqual(mocks.named("test-route-private-sn-to-eigw-1").inputs["egressOnlyGatewayId"], "test-eigw-id")
+
+    def test_ipv4_only_by_default(self):
+        mocks = register(lambda: Vpc("test", make_args()))
+
+        self.assertNotIn("assignGeneratedIpv6CidrBlock", mocks.named("test-vpc").inputs)
+        self.assertNotIn("ipv6CidrBlock", mocks.named("test-private-subnet-0").inputs)
+        self.assertEqual(mocks.type_counts()["aws:ec2/egressOnlyInternetGateway:EgressOnlyInternetGateway"], 0)